@@ -1,4 +1,6 @@
 from .vrobot_node import VRobotNodeBase, vrobot_client_runner
 from .srv_apis import req_srv_mission, req_srv_physical_property, req_srv_reset, req_srv_reset_all, req_srv_simparams
 from .node_iox2 import ImageResolution
-from .rtg_pub import RTGPub
\ No newline at end of file
+from .node_iox2_utils import ImageFormat, ImageOutputSpec
+from .rtg_pub import RTGPub
+from .vrobot_async import AsyncVRobotNode, AsyncVRobotClient
\ No newline at end of file
@@ -0,0 +1,85 @@
+# Command encode rate: object API (CommandMsgT + new Builder) vs CommandEncoder templates.
+import argparse
+import json
+import time
+from typing import Any, Callable, Dict, Tuple
+from ubicoders_vrobots_msgs.C000_commands_generated import CommandMsgT
+from ubicoders_vrobots_msgs.VROBOTS_CMDS import VROBOTS_CMDS
+
+from .cmd_encoder import CommandEncoder, pack_command, _vec3_t
+from .perf_stats import LatencyStats, format_summary
+
+
+def _object_api_cmd(name: str, sysId: int, ts: float, i: int) -> bytes:
+    msg = CommandMsgT()
+    msg.timestamp = ts
+    msg.sysId = sysId
+    if name == "pwm":
+        msg.cmdId = VROBOTS_CMDS.SET_PWM
+        msg.intArr = [1500 + i % 7, 1500, 1500, 1500]
+    elif name == "body_ft":
+        msg.cmdId = VROBOTS_CMDS.SET_BODY_FT
+        msg.vec3Arr = [_vec3_t((0.1, 0.2, 9.81 + i % 3)), _vec3_t((0.01, 0.02, 0.03))]
+    else:
+        msg.cmdId = VROBOTS_CMDS.SET_CAR
+        msg.floatArr = [0.5, 0.0 if i % 2 else 0.1, 0.25]
+    return pack_command(msg)
+
+
+def _encoder_cmd(encoder: CommandEncoder) -> Callable[[str, int, float, int], bytes]:
+    def encode(name: str, sysId: int, ts: float, i: int) -> bytes:
+        if name == "pwm":
+            return encoder.encode(VROBOTS_CMDS.SET_PWM, sysId, ts, int_arr=[1500 + i % 7, 1500, 1500, 1500])
+        if name == "body_ft":
+            return encoder.encode(VROBOTS_CMDS.SET_BODY_FT, sysId, ts,
+                                  vec3_arr=[(0.1, 0.2, 9.81 + i % 3), (0.01, 0.02, 0.03)])
+        return encoder.encode(VROBOTS_CMDS.SET_CAR, sysId, ts, float_arr=[0.5, 0.0 if i % 2 else 0.1, 0.25])
+    return encode
+
+
+def _time_encode(encode: Callable[[str, int, float, int], bytes], name: str, n: int,
+                 repeats: int) -> Tuple[Dict[str, Any], float]:
+    stats = LatencyStats(repeats)
+    total = 0.0
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        for i in range(n):
+            encode(name, 1, 1.7e12 + i, i)
+        dt = time.perf_counter() - t0
+        total += dt
+        stats.add(dt / n * 1e6)
+    return stats.summary(), n * repeats / total
+
+
+def run_encode_bench(n: int = 2000, repeats: int = 10) -> Dict[str, Dict[str, Any]]:
+    """Per-encode time in microseconds and encodes/s for each command kind."""
+    fast = _encoder_cmd(CommandEncoder())
+    results = {}
+    for name in ("pwm", "body_ft", "car"):
+        for i in range(8):
+            if fast(name, 1, 1.7e12 + i, i) != _object_api_cmd(name, 1, 1.7e12 + i, i):
+                raise AssertionError(f"[bench_cmd_encode] '{name}' payload differs from the object API")
+        for label, encode in (("object_api", _object_api_cmd), ("encoder", fast)):
+            summary, rate = _time_encode(encode, name, n, repeats)
+            summary["encodes_per_s"] = rate
+            results[f"{name}/{label}"] = summary
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare command encode rate, object API vs CommandEncoder.")
+    parser.add_argument("-n", type=int, default=2000, help="Encodes per batch [default: 2000]")
+    parser.add_argument("--repeats", type=int, default=10, help="Batches [default: 10]")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = run_encode_bench(args.n, args.repeats)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for name, summary in results.items():
+        print(format_summary(name, summary, unit="us") + f" rate={summary['encodes_per_s']:.0f}/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+# Helpers shared by the benchmark modules (vrobot_bench and the bench_* suites it runs).
+import signal
+import subprocess
+import sys
+import tempfile
+from typing import List
+
+from .node_iox2_utils import ImageResolution
+
+
+def resolution_from_label(label: str) -> ImageResolution:
+    for res in ImageResolution:
+        if res.label == label:
+            return res
+    raise ValueError(f"Unsupported resolution '{label}'; must be one of {[r.label for r in ImageResolution]}")
+
+
+def start_child(args: List[str]) -> subprocess.Popen:
+    """python -m args... in a child process."""
+    # stderr goes to a temp file (a pipe nobody reads would block the child once full),
+    # printed by stop_child if the child died or exited with an error
+    log = tempfile.TemporaryFile()
+    proc = subprocess.Popen([sys.executable, "-m", *args], stdout=subprocess.DEVNULL, stderr=log)
+    proc.log = log
+    return proc
+
+
+def stop_child(proc: subprocess.Popen):
+    exited_early = proc.poll() is not None
+    if not exited_early:
+        proc.send_signal(signal.SIGINT)   # Ctrl+C path, so iceoryx2 / Zenoh resources are released
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+    if exited_early or proc.returncode != 0:
+        proc.log.seek(0)
+        err = proc.log.read().decode(errors="replace").strip()
+        print(f"[bench] child {proc.args[2]} exited with {proc.returncode}"
+              + (" before the run ended" if exited_early else "") + (f":\n{err}" if err else ""),
+              file=sys.stderr)
+    proc.log.close()
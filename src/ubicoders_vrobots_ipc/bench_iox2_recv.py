@@ -0,0 +1,92 @@
+# Publish -> get_image_data latency and idle CPU of Iox2Node, event vs poll receive.
+import argparse
+import json
+import time
+from typing import Any, Dict
+
+from .bench_common import resolution_from_label
+from .node_iox2 import Iox2Node, RECV_MODES
+from .node_iox2_utils import ImageResolution
+from .perf_stats import LatencyStats, format_summary
+
+
+def run_recv_latency(
+    recv_mode: str,
+    image_resolution: ImageResolution = ImageResolution.P360,
+    frames: int = 200,
+    rate_hz: float = 30.0,
+    subs_poll_millis: int = 10,
+    idle_secs: float = 1.0,
+    sysId: int = 900,
+) -> Dict[str, Any]:
+    sub_node = Iox2Node(sysId, subs_poll_millis, node_name=f"bench_sub_{recv_mode}_{sysId}", recv_mode=recv_mode)
+    pub_node = Iox2Node(sysId, node_name=f"bench_pub_{recv_mode}_{sysId}")
+    try:
+        sub_node.create_image_subscriber("left", image_resolution)
+        publisher = pub_node.create_image_publisher("left", image_resolution)
+        time.sleep(0.1)  # let the listener thread settle
+
+        # CPU burnt by the listener while nothing is published
+        cpu0, wall0 = time.process_time(), time.perf_counter()
+        time.sleep(idle_secs)
+        idle_cpu_pct = 100.0 * (time.process_time() - cpu0) / (time.perf_counter() - wall0)
+
+        stats = LatencyStats(frames)
+        period = 1.0 / rate_hz
+        last_ts = 0.0
+        missed = 0
+        for _ in range(frames):
+            t_start = time.perf_counter()
+            publisher.publish()
+            got = False
+            while time.perf_counter() - t_start < period:
+                img = sub_node.get_image_data("left", image_resolution)
+                if img is not None and img.ts > last_ts:
+                    stats.add(time.time_ns() / 1e6 - img.ts)
+                    last_ts = img.ts
+                    got = True
+                    break
+                time.sleep(0.0002)
+            if not got:
+                missed += 1
+            remaining = period - (time.perf_counter() - t_start)
+            if remaining > 0:
+                time.sleep(remaining)
+
+        result = stats.summary()
+        result.update({"recv_mode": recv_mode, "resolution": image_resolution.label,
+                       "missed": missed, "idle_cpu_pct": idle_cpu_pct})
+        return result
+    finally:
+        sub_node.shutdown()
+
+
+def run_recv_bench(image_resolution: ImageResolution = ImageResolution.P360, frames: int = 200,
+                   rate_hz: float = 30.0, subs_poll_millis: int = 10, sysId: int = 900) -> Dict[str, Dict[str, Any]]:
+    """run_recv_latency for every receive mode, keyed by mode."""
+    return {mode: run_recv_latency(mode, image_resolution, frames, rate_hz, subs_poll_millis, sysId=sysId + i)
+            for i, mode in enumerate(RECV_MODES)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare Iox2Node receive latency for event vs poll mode.")
+    parser.add_argument("-r", "--resolution", type=str, default="360p", help="360p, 720p or 1080p [default: 360p]")
+    parser.add_argument("-n", "--frames", type=int, default=200, help="Frames per mode [default: 200]")
+    parser.add_argument("--rate", type=float, default=30.0, help="Publish rate in Hz [default: 30]")
+    parser.add_argument("--poll-millis", type=int, default=10, help="subs_poll_millis [default: 10]")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    res = resolution_from_label(args.resolution)
+    results = list(run_recv_bench(res, args.frames, args.rate, args.poll_millis).values())
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for r in results:
+        print(format_summary(f"{r['recv_mode']} {r['resolution']}", r)
+              + f" missed={r['missed']} idle_cpu={r['idle_cpu_pct']:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# Startup time and RSS of N VRobotNodeBase instances, pooled vs per-robot sessions.
+# Each measurement runs in a fresh interpreter so RSS isn't polluted by earlier runs.
+import argparse
+import json
+import subprocess
+import sys
+from typing import Any, Dict, List
+
+
+def _measure(n_robots: int, shared: bool, sysId_base: int = 700):
+    """Runs in the child process; prints one JSON line."""
+    import os
+    import time
+    import psutil
+    from .vrobot_node import VRobotNodeBase
+    from .session_pool import pool_stats
+
+    proc = psutil.Process(os.getpid())
+    rss0 = proc.memory_info().rss
+    threads0 = proc.num_threads()
+    t0 = time.perf_counter()
+    nodes = [VRobotNodeBase(sysId_base + i, shared_sessions=shared) for i in range(n_robots)]
+    startup = time.perf_counter() - t0
+    time.sleep(0.5)  # let transport threads settle
+    result = {
+        "robots": n_robots,
+        "shared": shared,
+        "startup_ms": startup * 1e3,
+        "rss_mb": (proc.memory_info().rss - rss0) / 2**20,
+        "threads": proc.num_threads() - threads0,
+        "zenoh_sessions": pool_stats()["zenoh_opened"] if shared else n_robots,
+    }
+    t0 = time.perf_counter()
+    for node in nodes:
+        node.shutdown()
+    result["shutdown_ms"] = (time.perf_counter() - t0) * 1e3
+    print(json.dumps(result), flush=True)
+
+
+def run_session_bench(robot_counts: List[int], sysId_base: int = 700) -> List[Dict[str, Any]]:
+    results = []
+    for n in robot_counts:
+        for shared in (False, True):
+            out = subprocess.run(
+                [sys.executable, "-c",
+                 "from ubicoders_vrobots_ipc.bench_sessions import _measure; "
+                 f"_measure({n}, {shared}, {sysId_base})"],
+                capture_output=True, text=True, timeout=300,
+            )
+            lines = [l for l in out.stdout.splitlines() if l.startswith("{")]
+            if not lines:
+                print(f"[bench_sessions] {n} robots shared={shared} failed:\n{out.stderr}")
+                continue
+            results.append(json.loads(lines[-1]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup time / RSS vs robot count, pooled vs per-robot sessions.")
+    parser.add_argument("-n", "--robots", type=int, nargs="+", default=[1, 5, 10, 20],
+                        help="Robot counts [default: 1 5 10 20]")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = run_session_bench(args.robots)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for r in results:
+        mode = "shared" if r["shared"] else "per-robot"
+        print(f"{r['robots']:>3} robots {mode:<9} startup={r['startup_ms']:8.1f}ms rss=+{r['rss_mb']:6.1f}MB "
+              f"threads=+{r['threads']:<4} shutdown={r['shutdown_ms']:7.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
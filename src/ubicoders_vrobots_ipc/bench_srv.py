@@ -0,0 +1,125 @@
+# Service round-trip latency: the old per-call path vs the persistent ServiceClient.
+#
+# A z-srv child (ServiceServer) answers on its own key. "legacy" replicates the
+# previous ServiceBase.pack_and_send: acquire a session (a fresh one when nothing else
+# holds it), declare a querier, poll a flag with sleep(0.1), undeclare, release.
+# "client" is ServiceClient.call on one long-lived session and querier. The batch part
+# times `batch` requests sent one call() after another vs pipelined with call_many().
+import argparse
+import json
+import time
+from typing import Any, Dict, Optional
+import zenoh
+
+from .bench_common import start_child, stop_child
+from .perf_stats import LatencyStats, format_summary
+
+
+def _legacy_call(key: str, payload: bytes, timeout: float) -> bool:
+    from .session_pool import acquire_zenoh_session, release_zenoh_session
+
+    got = []
+    session = acquire_zenoh_session()
+    try:
+        querier = session.declare_querier(key, timeout=timeout)
+        querier.get(handler=lambda reply: got.append(reply.ok is not None), payload=zenoh.ZBytes(payload))
+        start = time.time()
+        while not got and time.time() - start < timeout:
+            time.sleep(0.1)
+        querier.undeclare()
+    finally:
+        release_zenoh_session(session)
+    return bool(got)
+
+
+def run_srv_bench(n_calls: int = 50, payload_size: int = 64, key: str = "vr/bench/srv",
+                  timeout: float = 3.0, legacy_calls: int = 20, batch: int = 50, batch_reps: int = 10,
+                  max_in_flight: Optional[int] = None, workers: int = 4) -> Dict[str, Any]:
+    from .srv_client import ServiceClient, ServiceTimeout
+
+    server = start_child(["ubicoders_vrobots_ipc.z_srv", "-k", key, "-q", "-w", str(workers)])
+    try:
+        payload = bytes(payload_size)
+        client = ServiceClient(key, timeout=timeout)
+        deadline = time.monotonic() + 10.0
+        while True:   # until the server is up
+            try:
+                client.call(payload=payload)
+                break
+            except ServiceTimeout:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"[bench_srv] no service on '{key}'") from None
+                time.sleep(0.1)
+        for _ in range(5):
+            client.call(payload=payload)   # warm up routing
+
+        legacy = LatencyStats()
+        legacy_failed = 0
+        for _ in range(legacy_calls):
+            t0 = time.perf_counter()
+            if not _legacy_call(key, payload, timeout):
+                legacy_failed += 1
+            legacy.add((time.perf_counter() - t0) * 1e3)
+
+        pooled = LatencyStats()
+        failed = 0
+        for _ in range(n_calls):
+            t0 = time.perf_counter()
+            try:
+                client.call(payload=payload)
+            except ServiceTimeout:
+                failed += 1
+            pooled.add((time.perf_counter() - t0) * 1e3)
+
+        sequential, pipelined = LatencyStats(), LatencyStats()
+        batch_failed = 0
+        for _ in range(batch_reps):
+            t0 = time.perf_counter()
+            for _ in range(batch):
+                client.call(payload=payload)
+            sequential.add((time.perf_counter() - t0) * 1e3)
+            t0 = time.perf_counter()
+            replies = client.call_many([payload] * batch, max_in_flight=max_in_flight)
+            pipelined.add((time.perf_counter() - t0) * 1e3)
+            batch_failed += sum(r is None for r in replies)
+        mismatches = client.mismatches
+        client.close()
+    finally:
+        stop_child(server)
+    return {
+        "payload_bytes": payload_size,
+        "server_workers": workers,
+        "legacy": {"failed": legacy_failed, "rtt_ms": legacy.summary()},
+        "client": {"failed": failed, "rtt_ms": pooled.summary()},
+        "batch": {"size": batch, "max_in_flight": max_in_flight, "failed": batch_failed, "mismatches": mismatches,
+                  "sequential_ms": sequential.summary(), "pipelined_ms": pipelined.summary()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Service round-trip latency, per-call session vs ServiceClient.")
+    parser.add_argument("-n", "--calls", type=int, default=200, help="ServiceClient calls [default: 200]")
+    parser.add_argument("--legacy-calls", type=int, default=20, help="Per-call-session calls [default: 20]")
+    parser.add_argument("-s", "--size", type=int, default=64, help="Request payload bytes [default: 64]")
+    parser.add_argument("-b", "--batch", type=int, default=50, help="Requests per batch [default: 50]")
+    parser.add_argument("--max-in-flight", type=int, default=None, help="Pipelining window [default: unlimited]")
+    parser.add_argument("-w", "--workers", type=int, default=4, help="Server worker threads [default: 4]")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    result = run_srv_bench(args.calls, args.size, legacy_calls=args.legacy_calls, batch=args.batch,
+                           max_in_flight=args.max_in_flight, workers=args.workers)
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    for name in ("legacy", "client"):
+        r = result[name]
+        print(format_summary(f"{name:<6} rtt", r["rtt_ms"]) + (f" failed={r['failed']}" if r["failed"] else ""))
+    b = result["batch"]
+    print(format_summary(f"batch of {b['size']} sequential", b["sequential_ms"]))
+    print(format_summary(f"batch of {b['size']} pipelined", b["pipelined_ms"])
+          + (f" failed={b['failed']}" if b["failed"] else "") + (f" mismatches={b['mismatches']}" if b["mismatches"] else ""))
+
+
+if __name__ == "__main__":
+    main()
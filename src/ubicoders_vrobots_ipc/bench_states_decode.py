@@ -0,0 +1,92 @@
+# StatesMsg decode time: object API (current states_listener path) vs LazyVRobotState.
+import argparse
+import json
+import time
+from typing import Any, Callable, Dict
+import flatbuffers
+from ubicoders_vrobots_msgs.states_msg_helper import VRobotState, StatesMsgT, Vec3MsgT, Vec4MsgT
+
+from .perf_stats import LatencyStats, format_summary
+from .states_fast import LazyVRobotState
+
+
+def make_states_payload(sysId: int = 0, timestamp: float = 1234.5) -> bytes:
+    """A representative StatesMsg with every vector field set."""
+    def vec3(x, y, z):
+        v = Vec3MsgT()
+        v.x, v.y, v.z = x, y, z
+        return v
+
+    msg = StatesMsgT()
+    msg.name = "bench"
+    msg.sysId = sysId
+    msg.timestamp = timestamp
+    for i, field in enumerate(["linAcc", "linVel", "linPos", "angAcc", "angVel", "euler", "eulerDot",
+                               "force", "torque", "accelerometer", "gyroscope", "magnetometer",
+                               "gpsPos", "gpsVel", "cg", "moi3x1"]):
+        setattr(msg, field, vec3(i + 0.1, i + 0.2, i + 0.3))
+    q = Vec4MsgT()
+    q.x, q.y, q.z, q.w = 0.0, 0.0, 0.0, 1.0
+    msg.quaternion = q
+    msg.altitude = 10.0
+    msg.pwm = [1500, 1500, 1500, 1500]
+    msg.actuators = [0.1, 0.2, 0.3, 0.4]
+    msg.moi3x3 = [1.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 1.0]
+    msg.collisions = []
+
+    builder = flatbuffers.Builder(1024)
+    builder.Finish(msg.Pack(builder), b"R000")
+    return bytes(builder.Output())
+
+
+def _decode_object(payload: bytes):
+    return VRobotState(StatesMsgT.InitFromPackedBuf(payload, 0))
+
+
+def _decode_lazy(payload: bytes):
+    return LazyVRobotState(payload)
+
+
+def _decode_lazy_typical(payload: bytes):
+    # what a controller usually reads each tick
+    s = LazyVRobotState(payload)
+    return s.timestamp, s.linPos, s.linVel, s.quaternion, s.angVel
+
+
+def _time_decode(decode: Callable[[bytes], Any], payload: bytes, n: int, repeats: int) -> Dict[str, float]:
+    stats = LatencyStats(repeats)
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        for _ in range(n):
+            decode(payload)
+        stats.add((time.perf_counter() - t0) / n * 1e6)
+    return stats.summary()
+
+
+def run_decode_bench(n: int = 2000, repeats: int = 20) -> Dict[str, Dict[str, float]]:
+    """Per-decode time in microseconds (percentiles over `repeats` batches of n decodes)."""
+    payload = make_states_payload()
+    return {
+        "object_api": _time_decode(_decode_object, payload, n, repeats),
+        "lazy": _time_decode(_decode_lazy, payload, n, repeats),
+        "lazy_typical_fields": _time_decode(_decode_lazy_typical, payload, n, repeats),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare StatesMsg decode time, object API vs lazy.")
+    parser.add_argument("-n", type=int, default=2000, help="Decodes per batch [default: 2000]")
+    parser.add_argument("--repeats", type=int, default=20, help="Batches [default: 20]")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = run_decode_bench(args.n, args.repeats)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for name, summary in results.items():
+        print(format_summary(name, summary, unit="us"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+# Template-based CommandMsg (CMD0) encoding.
+#
+# FlatBuffers leaves out scalars equal to their default (0) and tables/vectors that
+# are None, so the byte layout of a command only depends on *which* fields are set
+# and on the array lengths - not on the values. CommandEncoder packs the first
+# command of each layout through the object API, records where every value landed,
+# and from then on copies that template and patches the values in place with
+# struct.pack_into. The output is byte-identical to CommandMsgT.Pack + Finish.
+import struct
+from typing import Dict, List, Optional, Sequence, Tuple
+import flatbuffers
+from flatbuffers.table import Table
+from ubicoders_vrobots_msgs.C000_commands_generated import CommandMsg, CommandMsgT, Vec3MsgT, Vec4MsgT
+
+FILE_ID = b"CMD0"
+_MAX_TEMPLATES = 256
+
+_F64 = struct.Struct("<d")
+_U32 = struct.Struct("<I")
+_I32 = struct.Struct("<i")
+_F32 = struct.Struct("<f")
+_ARRAY_STRUCTS: Dict[Tuple[str, int], struct.Struct] = {}
+
+# CommandMsg vtable offsets (C000_commands_generated.CommandMsg)
+_VT_TIMESTAMP, _VT_CMD_ID, _VT_SYS_ID, _VT_INT_VAL, _VT_FLOAT_VAL = 6, 8, 10, 12, 14
+_VT_INT_ARR, _VT_FLOAT_ARR, _VT_VEC3, _VT_VEC4, _VT_VEC3_ARR, _VT_VEC4_ARR = 16, 18, 20, 22, 24, 26
+
+
+def _array_struct(kind: str, n: int) -> struct.Struct:
+    s = _ARRAY_STRUCTS.get((kind, n))
+    if s is None:
+        s = _ARRAY_STRUCTS[(kind, n)] = struct.Struct(f"<{n}{kind}")
+    return s
+
+
+def _mask(vec: Optional[Sequence[float]]) -> Optional[Tuple[bool, ...]]:
+    return None if vec is None else tuple(v != 0 for v in vec)
+
+
+class _Template:
+    def __init__(self, data: bytes, plan: List[Tuple[struct.Struct, int, int]]):
+        self.data = data
+        self.plan = plan  # (struct, offset, n values) in the order of the flattened values
+
+
+class CommandEncoder:
+    """
+    encode(cmdId, sysId, timestamp, ...) -> CMD0 payload bytes.
+    vec3/vec4 are (x, y, z[, w]) tuples, vec3_arr/vec4_arr lists of such tuples.
+    Not thread-safe; use one encoder per publishing thread (VRobotNodeBase has one).
+    """
+    def __init__(self):
+        self._templates: Dict[tuple, _Template] = {}
+
+    def encode(
+        self,
+        cmdId: int,
+        sysId: int,
+        timestamp: float,
+        int_val: int = 0,
+        float_val: float = 0.0,
+        int_arr: Optional[Sequence[int]] = None,
+        float_arr: Optional[Sequence[float]] = None,
+        vec3: Optional[Sequence[float]] = None,
+        vec4: Optional[Sequence[float]] = None,
+        vec3_arr: Optional[Sequence[Sequence[float]]] = None,
+        vec4_arr: Optional[Sequence[Sequence[float]]] = None,
+    ) -> bytes:
+        key = (
+            cmdId != 0, sysId != 0, timestamp != 0, int_val != 0, float_val != 0,
+            None if int_arr is None else len(int_arr),
+            None if float_arr is None else len(float_arr),
+            _mask(vec3), _mask(vec4),
+            None if vec3_arr is None else tuple(_mask(v) for v in vec3_arr),
+            None if vec4_arr is None else tuple(_mask(v) for v in vec4_arr),
+        )
+        template = self._templates.get(key)
+        if template is None:
+            template = self._build_template(cmdId, sysId, timestamp, int_val, float_val, int_arr, float_arr,
+                                            vec3, vec4, vec3_arr, vec4_arr)
+            if len(self._templates) >= _MAX_TEMPLATES:
+                self._templates.clear()
+            self._templates[key] = template
+
+        # flattened in the same order as _build_template's plan; zero values are not stored
+        values: List = [v for v in (cmdId, sysId, timestamp, int_val, float_val) if v != 0]
+        if int_arr is not None:
+            values.extend(int_arr)
+        if float_arr is not None:
+            values.extend(float_arr)
+        for vec in (vec3, vec4):
+            if vec is not None:
+                values.extend(v for v in vec if v != 0)
+        for arr in (vec3_arr, vec4_arr):
+            if arr is not None:
+                for vec in arr:
+                    values.extend(v for v in vec if v != 0)
+
+        buf = bytearray(template.data)
+        i = 0
+        for packer, offset, n in template.plan:
+            if n == 1:
+                packer.pack_into(buf, offset, values[i])
+            else:
+                packer.pack_into(buf, offset, *values[i:i + n])
+            i += n
+        return bytes(buf)
+
+    def encode_msg(self, msg: CommandMsgT) -> bytes:
+        """Encode a CommandMsgT; messages with a name or numpy arrays go through the object API."""
+        if msg.name is not None or not all(isinstance(a, (list, tuple, type(None))) for a in (msg.intArr, msg.floatArr)):
+            return pack_command(msg)
+        xyz = lambda v: (v.x, v.y, v.z)
+        xyzw = lambda v: (v.x, v.y, v.z, v.w)
+        return self.encode(
+            msg.cmdId, msg.sysId, msg.timestamp, msg.intVal, msg.floatVal, msg.intArr, msg.floatArr,
+            None if msg.vec3 is None else xyz(msg.vec3),
+            None if msg.vec4 is None else xyzw(msg.vec4),
+            None if msg.vec3Arr is None else [xyz(v) for v in msg.vec3Arr],
+            None if msg.vec4Arr is None else [xyzw(v) for v in msg.vec4Arr],
+        )
+
+    def _build_template(self, cmdId, sysId, timestamp, int_val, float_val, int_arr, float_arr,
+                        vec3, vec4, vec3_arr, vec4_arr) -> _Template:
+        msg = CommandMsgT()
+        msg.cmdId, msg.sysId, msg.timestamp, msg.intVal, msg.floatVal = cmdId, sysId, timestamp, int_val, float_val
+        msg.intArr = None if int_arr is None else list(int_arr)
+        msg.floatArr = None if float_arr is None else list(float_arr)
+        msg.vec3 = None if vec3 is None else _vec3_t(vec3)
+        msg.vec4 = None if vec4 is None else _vec4_t(vec4)
+        msg.vec3Arr = None if vec3_arr is None else [_vec3_t(v) for v in vec3_arr]
+        msg.vec4Arr = None if vec4_arr is None else [_vec4_t(v) for v in vec4_arr]
+        data = pack_command(msg)
+
+        tab = CommandMsg.GetRootAs(data, 0)._tab
+        plan: List[Tuple[struct.Struct, int, int]] = []
+
+        def add_scalar(table: Table, vt_offset: int, packer: struct.Struct):
+            o = table.Offset(vt_offset)
+            if o:
+                plan.append((packer, table.Pos + o, 1))
+
+        for vt_offset, packer in ((_VT_CMD_ID, _U32), (_VT_SYS_ID, _U32), (_VT_TIMESTAMP, _F64),
+                                  (_VT_INT_VAL, _I32), (_VT_FLOAT_VAL, _F32)):
+            add_scalar(tab, vt_offset, packer)
+        for vt_offset, kind, arr in ((_VT_INT_ARR, "i", int_arr), (_VT_FLOAT_ARR, "f", float_arr)):
+            if arr is not None and len(arr):
+                plan.append((_array_struct(kind, len(arr)), tab.Vector(tab.Offset(vt_offset)), len(arr)))
+
+        def add_vec(pos: int, n: int):
+            sub = Table(data, pos)
+            for k in range(n):
+                add_scalar(sub, 4 + 2 * k, _F32)
+
+        for vt_offset, n, vec in ((_VT_VEC3, 3, vec3), (_VT_VEC4, 4, vec4)):
+            if vec is not None:
+                o = tab.Offset(vt_offset)
+                add_vec(tab.Indirect(tab.Pos + o), n)
+        for vt_offset, n, arr in ((_VT_VEC3_ARR, 3, vec3_arr), (_VT_VEC4_ARR, 4, vec4_arr)):
+            if arr is not None and len(arr):
+                start = tab.Vector(tab.Offset(vt_offset))
+                for j in range(len(arr)):
+                    add_vec(tab.Indirect(start + 4 * j), n)
+        return _Template(data, plan)
+
+
+def _vec3_t(v: Sequence[float]) -> Vec3MsgT:
+    t = Vec3MsgT()
+    t.x, t.y, t.z = v
+    return t
+
+
+def _vec4_t(v: Sequence[float]) -> Vec4MsgT:
+    t = Vec4MsgT()
+    t.x, t.y, t.z, t.w = v
+    return t
+
+
+def pack_command(msg: CommandMsgT) -> bytes:
+    """Reference object-API encoding (what VRobotNodeBase.build_and_publish_cmd used to do)."""
+    builder = flatbuffers.Builder(512)
+    builder.Finish(msg.Pack(builder), FILE_ID)
+    return bytes(builder.Output())
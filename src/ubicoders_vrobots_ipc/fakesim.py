@@ -0,0 +1,385 @@
+# vrobot-fakesim: stands in for the Unity simulator on a headless box.
+#
+# Publishes StatesMsg on vr/{id}/states over Zenoh (StatesEncoder, no object-API pack per
+# message), GenericHeader + ImageData* frames on vr/{id}/cams/{side}/{res} over iceoryx2,
+# consumes vr/{id}/cmd and answers vr/service (ServiceServer; S000 resets the robots).
+# The dynamics are a rigid body per robot, stepped for all robots at once with numpy:
+#   SET_PWM        quad-X motors (PX4 order: front-right, rear-left, front-left, rear-right),
+#                  1000..2000 us, hover at 1500
+#   SET_HELI       thrust along body z
+#   SET_BODY_FT / SET_BODY_FORCE / SET_BODY_TORQUE   body-frame force / torque
+# z is up, the ground is z=0, angles are small-angle Euler integrated. It is not the
+# simulator's physics, only enough for controllers to close a loop on. Other commands
+# are counted and ignored.
+import argparse
+import json
+import math
+import threading
+import time
+from typing import Any, Dict, List, Optional
+import numpy as np
+from ubicoders_vrobots_msgs.C000_commands_generated import CommandMsg
+from ubicoders_vrobots_msgs.S000_srv_resetallmsg_generated import SrvResetAllMsg
+from ubicoders_vrobots_msgs.VROBOTS_CMDS import VROBOTS_CMDS
+
+from .node_iox2 import Iox2ImagePublisher
+from .node_iox2_utils import ImageResolution
+from .scheduler import RateScheduler
+from .session_pool import acquire_iox2_node, acquire_zenoh_session, release_iox2_node, release_zenoh_session
+from .srv_server import ServiceServer, standin_handlers
+from .states_fast import StatesEncoder
+
+CAM_SIDES = ("left", "right", "down")   # the sides Iox2Node.create_image_subscriber accepts
+GRAVITY = 9.81
+_RESOLUTIONS = {r.label: r for r in ImageResolution}
+_CMD_NAMES = {v: k for k, v in vars(VROBOTS_CMDS).items() if k.isupper()}
+
+
+class FakeFleet:
+    """State and command inputs of n robots as (n, 3) / (n, 4) arrays."""
+    def __init__(self, n: int, mass: float = 1.0, arm: float = 0.2, inertia=(0.01, 0.01, 0.02),
+                 yaw_coeff: float = 0.02, drag: float = 0.1, ang_drag: float = 0.5, spacing: float = 2.0):
+        self.n = n
+        self.mass = mass
+        self.arm = arm / math.sqrt(2)             # lever arm of each quad-X motor about x and y
+        self.inertia = np.array(inertia)
+        self.yaw_coeff = yaw_coeff
+        self.drag = drag
+        self.ang_drag = ang_drag
+        self.max_thrust = mass * GRAVITY / 2      # per motor, so 4 motors at 1500 hover
+        self.home = np.zeros((n, 3))
+        self.home[:, 0] = np.arange(n) * spacing
+        self.pwm = np.full((n, 4), 1000.0)
+        self.heli = np.zeros(n)
+        self.body_force = np.zeros((n, 3))
+        self.body_torque = np.zeros((n, 3))
+        self.reset()
+
+    def reset(self, i: Optional[int] = None):
+        """Back to the start pose at rest (every robot if i is None); inputs are cleared."""
+        idx = slice(None) if i is None else i
+        if i is None:
+            self.pos = self.home.copy()
+            self.vel = np.zeros((self.n, 3))
+            self.acc = np.zeros((self.n, 3))
+            self.euler = np.zeros((self.n, 3))
+            self.angvel = np.zeros((self.n, 3))
+            self.angacc = np.zeros((self.n, 3))
+            self.specific_force = np.tile([0.0, 0.0, GRAVITY], (self.n, 1))
+        else:
+            self.pos[i] = self.home[i]
+            for a in (self.vel, self.acc, self.euler, self.angvel, self.angacc):
+                a[i] = 0.0
+            self.specific_force[i] = (0.0, 0.0, GRAVITY)
+        self.pwm[idx] = 1000.0
+        self.heli[idx] = 0.0
+        self.body_force[idx] = 0.0
+        self.body_torque[idx] = 0.0
+
+    def rotation(self) -> np.ndarray:
+        """(n, 3, 3) body-to-world rotations from the ZYX Euler angles."""
+        r, p, y = self.euler[:, 0], self.euler[:, 1], self.euler[:, 2]
+        cr, sr, cp, sp, cy, sy = np.cos(r), np.sin(r), np.cos(p), np.sin(p), np.cos(y), np.sin(y)
+        R = np.empty((self.n, 3, 3))
+        R[:, 0, 0] = cy * cp
+        R[:, 0, 1] = cy * sp * sr - sy * cr
+        R[:, 0, 2] = cy * sp * cr + sy * sr
+        R[:, 1, 0] = sy * cp
+        R[:, 1, 1] = sy * sp * sr + cy * cr
+        R[:, 1, 2] = sy * sp * cr - cy * sr
+        R[:, 2, 0] = -sp
+        R[:, 2, 1] = cp * sr
+        R[:, 2, 2] = cp * cr
+        return R
+
+    def step(self, dt: float):
+        t = self.max_thrust * np.clip((self.pwm - 1000.0) / 1000.0, 0.0, 1.0)
+        thrust = t.sum(axis=1) + self.heli
+        torque = self.body_torque.copy()
+        torque[:, 0] += self.arm * (t[:, 1] + t[:, 2] - t[:, 0] - t[:, 3])
+        torque[:, 1] += self.arm * (t[:, 0] + t[:, 2] - t[:, 1] - t[:, 3])
+        torque[:, 2] += self.yaw_coeff * (t[:, 0] + t[:, 1] - t[:, 2] - t[:, 3])
+        force_body = self.body_force.copy()
+        force_body[:, 2] += thrust
+
+        R = self.rotation()
+        force = np.einsum("nij,nj->ni", R, force_body)
+        self.acc = force / self.mass - self.drag * self.vel
+        self.acc[:, 2] -= GRAVITY
+        self.vel += self.acc * dt
+        self.pos += self.vel * dt
+        self.angacc = torque / self.inertia - self.ang_drag * self.angvel
+        self.angvel += self.angacc * dt
+        self.euler += self.angvel * dt
+        self.euler[:, 2] = (self.euler[:, 2] + math.pi) % (2 * math.pi) - math.pi
+
+        grounded = self.pos[:, 2] <= 0.0
+        if grounded.any():
+            self.pos[grounded, 2] = 0.0
+            self.vel[grounded] = 0.0
+            self.acc[grounded] = 0.0
+            # resting on the ground: no tipping over or spinning until it lifts off
+            resting = grounded & (force[:, 2] < self.mass * GRAVITY)
+            self.angvel[resting] = 0.0
+            self.angacc[resting] = 0.0
+            self.euler[resting, :2] = 0.0
+        # accelerometer: specific force in the body frame
+        self.specific_force = np.einsum("nji,nj->ni", R, self.acc + (0.0, 0.0, GRAVITY))
+
+    def quaternions(self) -> np.ndarray:
+        """(n, 4) x, y, z, w from the Euler angles."""
+        hr, hp, hy = self.euler[:, 0] / 2, self.euler[:, 1] / 2, self.euler[:, 2] / 2
+        cr, sr, cp, sp, cy, sy = np.cos(hr), np.sin(hr), np.cos(hp), np.sin(hp), np.cos(hy), np.sin(hy)
+        return np.stack([
+            sr * cp * cy - cr * sp * sy,
+            cr * sp * cy + sr * cp * sy,
+            cr * cp * sy - sr * sp * cy,
+            cr * cp * cy + sr * sp * sy,
+        ], axis=1)
+
+    def apply_cmd(self, i: int, payload: bytes) -> Optional[int]:
+        """Decode a CMD0 payload into robot i's inputs; returns its cmdId if it was used."""
+        msg = CommandMsg.GetRootAs(payload, 0)
+        cmd = msg.CmdId()
+        if cmd == VROBOTS_CMDS.SET_PWM:
+            pwm = msg.IntArrAsNumpy()
+            if isinstance(pwm, int) or len(pwm) < 4:
+                return None
+            self.pwm[i] = pwm[:4]
+        elif cmd == VROBOTS_CMDS.SET_HELI:
+            self.heli[i] = msg.FloatVal()
+        elif cmd == VROBOTS_CMDS.SET_BODY_FT:
+            if msg.Vec3ArrLength() < 2:
+                return None
+            f, tq = msg.Vec3Arr(0), msg.Vec3Arr(1)
+            self.body_force[i] = (f.X(), f.Y(), f.Z())
+            self.body_torque[i] = (tq.X(), tq.Y(), tq.Z())
+        elif cmd in (VROBOTS_CMDS.SET_BODY_FORCE, VROBOTS_CMDS.SET_BODY_TORQUE):
+            v = msg.Vec3()
+            if v is None:
+                return None
+            target = self.body_force if cmd == VROBOTS_CMDS.SET_BODY_FORCE else self.body_torque
+            target[i] = (v.X(), v.Y(), v.Z())
+        else:
+            return None
+        return cmd
+
+
+class _FakeCamera:
+    """A gradient with a square that moves one step per frame, so consecutive frames differ."""
+    def __init__(self, publisher: Iox2ImagePublisher, res: ImageResolution, seed: int):
+        self.publisher = publisher
+        w, h, _ = res.value
+        self.frame = np.empty((h, w, 4), dtype=np.uint8)
+        self.frame[..., 0] = (np.arange(w) * 255 // max(w - 1, 1)).astype(np.uint8)
+        self.frame[..., 1] = (np.arange(h) * 255 // max(h - 1, 1)).astype(np.uint8)[:, None]
+        self.frame[..., 2] = (seed * 40) % 256
+        self.frame[..., 3] = 255
+        self._background = self.frame.copy()
+        self.size = max(8, h // 10)
+        self._box = None
+        self._k = 0
+
+    def publish(self):
+        h, w = self.frame.shape[:2]
+        if self._box is not None:
+            y, x = self._box
+            self.frame[y:y + self.size, x:x + self.size] = self._background[y:y + self.size, x:x + self.size]
+        x = (self._k * 7) % (w - self.size)
+        y = (self._k * 3) % (h - self.size)
+        self.frame[y:y + self.size, x:x + self.size] = (255, 255, 255, 255)
+        self._box = (y, x)
+        self._k += 1
+        self.publisher.publish(self.frame)
+
+
+class FakeSim:
+    def __init__(self, n_robots: int = 1, first_id: int = 0, state_rate: float = 100.0, cameras: int = 0,
+                 resolution: ImageResolution = ImageResolution.P720, fps: float = 30.0, service: bool = True,
+                 service_workers: int = 2, verbose: bool = False):
+        """cameras: per robot, sides taken from CAM_SIDES in order."""
+        if cameras > len(CAM_SIDES):
+            raise ValueError(f"at most {len(CAM_SIDES)} cameras per robot")
+        self.sysIds = list(range(first_id, first_id + n_robots))
+        self._index = {sysId: i for i, sysId in enumerate(self.sysIds)}
+        self.state_rate = state_rate
+        self.fps = fps
+        self.fleet = FakeFleet(n_robots)
+        self.encoder = StatesEncoder("fakesim", n_pwm=4, n_actuators=0)
+        self.verbose = verbose
+        # stats
+        self.states_published = 0
+        self.frames_published = 0
+        self.cmds: Dict[str, int] = {}
+        self.cmds_ignored = 0
+
+        self.session = acquire_zenoh_session()
+        self._state_pubs = [self.session.declare_publisher(f"vr/{sysId}/states") for sysId in self.sysIds]
+        self._cmd_sub = self.session.declare_subscriber("vr/*/cmd", self._on_cmd)
+
+        self.node = None
+        self._cameras: List[_FakeCamera] = []
+        if cameras:
+            self.node = acquire_iox2_node()
+            for sysId in self.sysIds:
+                for k, side in enumerate(CAM_SIDES[:cameras]):
+                    pub = Iox2ImagePublisher(self.node, f"vr/{sysId}/cams/{side}/{resolution.label}", resolution)
+                    self._cameras.append(_FakeCamera(pub, resolution, sysId + k))
+
+        self.server = None
+        if service:
+            self.server = ServiceServer("vr/service", workers=service_workers)
+            for fid, handler in standin_handlers(verbose=verbose).items():
+                self.server.register(fid, handler)
+            self.server.register("S000", self._on_reset)
+
+        self.state_scheduler = RateScheduler("skip")
+        self.state_loop = self.state_scheduler.add("states", self._tick_states, state_rate)
+        self.camera_scheduler = None
+        if self._cameras:
+            self.camera_scheduler = RateScheduler("skip")
+            self.camera_loop = self.camera_scheduler.add("cameras", self._tick_cameras, fps)
+        self._last_step = None
+        self._threads: List[threading.Thread] = []
+        print(f"[FakeSim] {n_robots} robots (sysId {first_id}..{first_id + n_robots - 1}), states {state_rate:g} Hz, "
+              f"{len(self._cameras)} cameras {resolution.label} @ {fps:g} fps, service={'on' if service else 'off'}")
+
+    def _on_cmd(self, sample):
+        parts = str(sample.key_expr).split("/")
+        i = self._index.get(int(parts[1])) if len(parts) == 3 and parts[1].isdigit() else None
+        if i is None:
+            return
+        try:
+            cmd = self.fleet.apply_cmd(i, sample.payload.to_bytes())
+        except Exception as e:
+            print(f"[FakeSim] bad command on {sample.key_expr}: {e}")
+            cmd = None
+        if cmd is None:
+            self.cmds_ignored += 1
+            return
+        name = _CMD_NAMES.get(cmd, str(cmd))
+        self.cmds[name] = self.cmds.get(name, 0) + 1
+
+    def _on_reset(self, req):
+        msg = SrvResetAllMsg.GetRootAs(req.payload, 0)
+        if msg.ResetAll():
+            self.fleet.reset()
+            return "OK S000 reset all"
+        i = self._index.get(msg.SysId())
+        if i is None:
+            raise ValueError(f"no robot with sysId {msg.SysId()}")
+        self.fleet.reset(i)
+        if self.verbose:
+            print(f"[FakeSim] reset sysId={msg.SysId()}")
+        return f"OK S000 reset sysId={msg.SysId()}"
+
+    def _tick_states(self):
+        now = time.monotonic()
+        dt = 1.0 / self.state_rate if self._last_step is None else min(now - self._last_step, 0.1)
+        self._last_step = now
+        fleet = self.fleet
+        fleet.step(dt)
+        ts = time.time() * 1e3   # unix time in ms, like the simulator
+        pos, vel, acc = fleet.pos.tolist(), fleet.vel.tolist(), fleet.acc.tolist()
+        euler, angvel, angacc = fleet.euler.tolist(), fleet.angvel.tolist(), fleet.angacc.tolist()
+        quat, accel = fleet.quaternions().tolist(), fleet.specific_force.tolist()
+        pwm = fleet.pwm.astype(np.uint32).tolist()
+        encode = self.encoder.encode
+        for i, sysId in enumerate(self.sysIds):
+            payload = encode(
+                sysId, ts, linPos=pos[i], linVel=vel[i], linAcc=acc[i], euler=euler[i], angVel=angvel[i],
+                angAcc=angacc[i], quaternion=quat[i], accelerometer=accel[i], gyroscope=angvel[i],
+                altitude=pos[i][2], mass=fleet.mass, pwm=pwm[i],
+            )
+            self._state_pubs[i].put(payload)
+        self.states_published += len(self.sysIds)
+
+    def _tick_cameras(self):
+        for cam in self._cameras:
+            cam.publish()
+        self.frames_published += len(self._cameras)
+
+    def start(self):
+        """Run the state and camera loops on background threads."""
+        schedulers = [("fakesim-states", self.state_scheduler), ("fakesim-cameras", self.camera_scheduler)]
+        for name, scheduler in schedulers:
+            if scheduler is not None:
+                t = threading.Thread(target=scheduler.run, daemon=True, name=name)
+                t.start()
+                self._threads.append(t)
+
+    def stats(self) -> Dict[str, Any]:
+        out = {
+            "states_published": self.states_published,
+            "frames_published": self.frames_published,
+            "cmds": dict(self.cmds),
+            "cmds_ignored": self.cmds_ignored,
+            "state_loop": self.state_loop.summary(),
+        }
+        if self.camera_scheduler is not None:
+            out["camera_loop"] = self.camera_loop.summary()
+        if self.server is not None:
+            st = self.server.stats()
+            out["service"] = {k: st[k] for k in ("received", "replied", "errors")}
+        return out
+
+    def shutdown(self):
+        self.state_scheduler.stop()
+        if self.camera_scheduler is not None:
+            self.camera_scheduler.stop()
+        for t in self._threads:
+            t.join()
+        self._threads.clear()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server = None
+        if self.session is not None:
+            self._cmd_sub.undeclare()
+            for pub in self._state_pubs:
+                pub.undeclare()
+            release_zenoh_session(self.session)
+            self.session = None
+        self._cameras.clear()
+        if self.node is not None:
+            release_iox2_node(self.node)
+            self.node = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulator stand-in: states, camera frames, commands and vr/service.")
+    parser.add_argument("-n", "--robots", type=int, default=1, help="Number of robots [default: 1]")
+    parser.add_argument("--first-id", type=int, default=0, help="sysId of the first robot [default: 0]")
+    parser.add_argument("--state-rate", type=float, default=100.0, help="States per second per robot [default: 100]")
+    parser.add_argument("-c", "--cameras", type=int, default=0, choices=range(len(CAM_SIDES) + 1),
+                        help=f"Cameras per robot, sides {', '.join(CAM_SIDES)} in order [default: 0]")
+    parser.add_argument("-r", "--resolution", default="720p", choices=list(_RESOLUTIONS),
+                        help="Camera resolution [default: 720p]")
+    parser.add_argument("--fps", type=float, default=30.0, help="Camera frame rate [default: 30]")
+    parser.add_argument("--no-service", action="store_true", help="Don't serve vr/service")
+    parser.add_argument("-d", "--duration", type=float, default=None, help="Stop after this many seconds")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Print service requests")
+    args = parser.parse_args()
+
+    sim = FakeSim(args.robots, args.first_id, args.state_rate, args.cameras, _RESOLUTIONS[args.resolution],
+                  args.fps, service=not args.no_service, verbose=args.verbose)
+    sim.start()
+    t0 = time.monotonic()
+    last = (0, 0, 0)
+    try:
+        while args.duration is None or time.monotonic() - t0 < args.duration:
+            time.sleep(1.0)
+            st = sim.stats()
+            cmds = sum(st["cmds"].values())
+            print(f"[FakeSim] states {st['states_published'] - last[0]}/s, frames {st['frames_published'] - last[1]}/s, "
+                  f"cmds {cmds - last[2]}/s, state loop {st['state_loop']['achieved_hz']:.0f} Hz "
+                  f"(tick p50 {st['state_loop']['exec_p50_ms']:.2f}ms)")
+            last = (st["states_published"], st["frames_published"], cmds)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sim.shutdown()
+        print(json.dumps(sim.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
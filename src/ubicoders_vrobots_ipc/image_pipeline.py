@@ -0,0 +1,162 @@
+# Per-camera image processing in worker processes, frames handed over through shared memory.
+#
+# The listener copies each new frame once into a slot of a per-camera
+# multiprocessing.shared_memory ring; workers map the slot as a read-only ndarray, so
+# pixels are never pickled - only the function, the slot address and the (small)
+# result cross the process boundary. Worker processes are spawned, so scripts using a
+# pipeline need the usual `if __name__ == "__main__":` guard.
+import multiprocessing as mp
+import threading
+import time
+import traceback
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+
+
+class ImageResult:
+    def __init__(self, ts: float = 0, result: Any = None, latency_ms: float = 0.0):
+        self.ts = ts                    # timestamp of the frame the result was computed from
+        self.result = result
+        self.latency_ms = latency_ms    # submit -> result available
+
+
+# --- worker side ----------------------------------------------------------------
+
+_attached: Dict[str, shared_memory.SharedMemory] = {}
+
+
+def _attach(shm_name: str) -> shared_memory.SharedMemory:
+    shm = _attached.get(shm_name)
+    if shm is None:
+        # spawned workers share the parent's resource tracker, the parent unlinks the segment
+        shm = shared_memory.SharedMemory(name=shm_name)
+        _attached[shm_name] = shm
+    return shm
+
+
+def _warmup() -> None:
+    return None
+
+
+def _process_frame(func: Callable[[np.ndarray], Any], shm_name: str, offset: int,
+                   shape: Tuple[int, ...], dtype: str) -> Any:
+    shm = _attach(shm_name)
+    img = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf, offset=offset)
+    img.flags.writeable = False
+    return func(img)
+
+
+# --- parent side ----------------------------------------------------------------
+
+class _FrameRing:
+    """`n_slots` frames of one shape in a single shared-memory segment."""
+    def __init__(self, shape: Tuple[int, ...], dtype: np.dtype, n_slots: int):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.frame_bytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        self.shm = shared_memory.SharedMemory(create=True, size=self.frame_bytes * n_slots)
+        self.free: List[int] = list(range(n_slots))
+
+    def slot_view(self, slot: int) -> np.ndarray:
+        return np.ndarray(self.shape, dtype=self.dtype, buffer=self.shm.buf, offset=slot * self.frame_bytes)
+
+    def close(self):
+        try:
+            self.shm.close()
+            self.shm.unlink()
+        except Exception:
+            pass
+
+
+class ImagePipeline:
+    """
+    register(cam_side, func) then submit() frames; func(image) runs in a worker process
+    and its return value shows up in get_result(cam_side).
+    A camera has at most `slots_per_camera` frames in flight; newer frames are dropped
+    (and counted) until a slot frees up, so slow functions never queue up stale frames.
+    """
+    def __init__(self, max_workers: Optional[int] = None, slots_per_camera: int = 3,
+                 executor: Optional[ProcessPoolExecutor] = None):
+        self.slots_per_camera = slots_per_camera
+        self._own_executor = executor is None
+        self.executor = executor or ProcessPoolExecutor(max_workers, mp_context=mp.get_context("spawn"))
+        if self._own_executor:
+            # start the workers now instead of stalling the first frames on process spawn
+            for _ in range(self.executor._max_workers):
+                self.executor.submit(_warmup)
+        self._lock = threading.Lock()
+        self._funcs: Dict[str, Callable[[np.ndarray], Any]] = {}
+        self._rings: Dict[str, _FrameRing] = {}
+        self._results: Dict[str, ImageResult] = {}
+        self.submitted: Dict[str, int] = {}
+        self.dropped: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+
+    def register(self, cam_side: str, func: Callable[[np.ndarray], Any]):
+        """func must be picklable, i.e. a module-level function."""
+        with self._lock:
+            self._funcs[cam_side] = func
+            self.submitted[cam_side] = 0
+            self.dropped[cam_side] = 0
+            self.errors[cam_side] = 0
+
+    def submit(self, cam_side: str, ts: float, image: np.ndarray) -> bool:
+        """Copy `image` into a free slot and queue it; False if the frame was dropped."""
+        func = self._funcs.get(cam_side)
+        if func is None:
+            raise KeyError(f"[ImagePipeline] no processor registered for '{cam_side}'")
+
+        with self._lock:
+            ring = self._rings.get(cam_side)
+            if ring is None or ring.shape != image.shape or ring.dtype != image.dtype:
+                if ring is not None and len(ring.free) < self.slots_per_camera:
+                    self.dropped[cam_side] += 1  # shape changed while frames are in flight
+                    return False
+                if ring is not None:
+                    ring.close()
+                ring = _FrameRing(image.shape, image.dtype, self.slots_per_camera)
+                self._rings[cam_side] = ring
+            if not ring.free:
+                self.dropped[cam_side] += 1
+                return False
+            slot = ring.free.pop()
+
+        np.copyto(ring.slot_view(slot), image)
+        t_submit = time.perf_counter()
+        future = self.executor.submit(
+            _process_frame, func, ring.shm.name, slot * ring.frame_bytes, ring.shape, ring.dtype.str
+        )
+        future.add_done_callback(lambda f: self._on_done(cam_side, ring, slot, ts, t_submit, f))
+        self.submitted[cam_side] += 1
+        return True
+
+    def _on_done(self, cam_side: str, ring: _FrameRing, slot: int, ts: float, t_submit: float, future: Future):
+        with self._lock:
+            ring.free.append(slot)
+            if future.cancelled():
+                return
+            exc = future.exception()
+            if exc is not None:
+                self.errors[cam_side] += 1
+                if self.errors[cam_side] == 1:
+                    print(f"[ImagePipeline] processor for '{cam_side}' failed: {exc!r}")
+                return
+            latest = self._results.get(cam_side)
+            if latest is None or ts > latest.ts:
+                self._results[cam_side] = ImageResult(ts, future.result(), (time.perf_counter() - t_submit) * 1e3)
+
+    def get_result(self, cam_side: str) -> Optional[ImageResult]:
+        return self._results.get(cam_side)
+
+    def shutdown(self):
+        try:
+            if self._own_executor:
+                self.executor.shutdown(wait=True, cancel_futures=True)
+        except Exception:
+            traceback.print_exc()
+        with self._lock:
+            for ring in self._rings.values():
+                ring.close()
+            self._rings.clear()
@@ -0,0 +1,152 @@
+# One small pool of threads servicing every iceoryx2 subscription in the process.
+#
+# Each subscription registers a handler that processes at most one (the newest) frame
+# per call. Workers run ready handlers round-robin, one call per subscription per turn,
+# so a busy 1080p camera can't starve the others. Subscriptions are woken by their
+# publisher's notifications (Iox2WakeupBridge) and polled every poll_interval as a
+# fallback for publishers that never notify.
+import os
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Callable, List, Optional
+
+from .iox2_wakeup import get_wakeup_bridge
+
+
+def default_reactor_threads() -> int:
+    return max(1, min(4, (os.cpu_count() or 2) // 2))
+
+
+class ReactorSource:
+    def __init__(self, name: str, handler: Callable[[], bool], poll_interval: float, worker: "_ReactorWorker"):
+        self.name = name
+        self.handler = handler          # returns True if it processed a frame
+        self.poll_interval = poll_interval
+        self.next_poll = 0.0
+        self.worker = worker
+        self.lock = threading.Lock()    # held while the handler runs
+        self.active = True
+        self.queued = False
+        self.wakeup_cb: Optional[Callable[[], None]] = None
+        self.serviced = 0               # frames processed
+
+
+class _ReactorWorker:
+    def __init__(self, index: int):
+        self.sources: List[ReactorSource] = []
+        self.ready = deque()
+        self.wake = threading.Event()
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self._run, daemon=True, name=f"iox2-reactor-{index}")
+        self.thread.start()
+
+    def notify(self, src: ReactorSource):
+        if not src.queued:
+            src.queued = True
+            self.ready.append(src)
+        self.wake.set()
+
+    def _run(self):
+        while True:
+            with self.lock:
+                sources = list(self.sources)
+            now = time.monotonic()
+            timeout = 1.0
+            for src in sources:
+                if src.next_poll <= now:
+                    self.notify(src)
+                else:
+                    timeout = min(timeout, src.next_poll - now)
+
+            self.wake.clear()
+            if not self.ready:
+                self.wake.wait(timeout)
+                continue
+
+            # one call per ready source per turn
+            for _ in range(len(self.ready)):
+                src = self.ready.popleft()
+                src.queued = False
+                self._service(src)
+
+    def _service(self, src: ReactorSource):
+        with src.lock:
+            if not src.active:
+                return
+            src.next_poll = time.monotonic() + src.poll_interval
+            try:
+                if src.handler():
+                    src.serviced += 1
+            except Exception:
+                print(f"Listener for topic '{src.name}' exiting.")
+                traceback.print_exc()
+                src.active = False
+                with self.lock:
+                    self.sources.remove(src)
+
+
+class Iox2Reactor:
+    def __init__(self, n_threads: Optional[int] = None):
+        n_threads = n_threads or default_reactor_threads()
+        self.workers = [_ReactorWorker(i) for i in range(n_threads)]
+        self._lock = threading.Lock()
+
+    def register(self, name: str, handler: Callable[[], bool], poll_interval: float = 0.01,
+                 wakeup: bool = True) -> ReactorSource:
+        """
+        Service `handler` whenever the iceoryx2 event service `name` is notified
+        (wakeup=True) and at least every poll_interval seconds.
+        """
+        with self._lock:
+            worker = min(self.workers, key=lambda w: len(w.sources))
+            src = ReactorSource(name, handler, poll_interval, worker)
+            with worker.lock:
+                worker.sources.append(src)
+        if wakeup:
+            try:
+                src.wakeup_cb = lambda: worker.notify(src)
+                get_wakeup_bridge().watch(name, src.wakeup_cb)
+            except Exception as e:
+                src.wakeup_cb = None
+                print(f"[Iox2Reactor] No event wakeup for '{name}' ({e}), falling back to polling")
+        worker.notify(src)
+        return src
+
+    def unregister(self, src: ReactorSource):
+        """Stop servicing src; returns once its handler is no longer running."""
+        with src.lock:
+            src.active = False
+        with src.worker.lock:
+            if src in src.worker.sources:
+                src.worker.sources.remove(src)
+        if src.wakeup_cb is not None:
+            get_wakeup_bridge().unwatch(src.name, src.wakeup_cb)
+
+    def stats(self) -> List[dict]:
+        return [
+            {"thread": w.thread.name, "sources": [(s.name, s.serviced) for s in list(w.sources)]}
+            for w in self.workers
+        ]
+
+
+_reactor: Optional[Iox2Reactor] = None
+_reactor_lock = threading.Lock()
+
+
+def configure_reactor(n_threads: int):
+    """Set the reactor thread count; only effective before the first subscriber is created."""
+    global _reactor
+    with _reactor_lock:
+        if _reactor is not None:
+            raise RuntimeError("[Iox2Reactor] already running")
+        _reactor = Iox2Reactor(n_threads)
+
+
+def get_reactor() -> Iox2Reactor:
+    global _reactor
+    with _reactor_lock:
+        if _reactor is None:
+            _reactor = Iox2Reactor()
+        return _reactor
@@ -0,0 +1,170 @@
+# Wakes python threads on iceoryx2 event notifications without holding the GIL.
+#
+# The iceoryx2 python bindings keep the GIL while a Listener/WaitSet is blocked, so a
+# blocking wait in a listener thread freezes every other thread of the process (and a
+# notifier in the same process can never run). The bridge runs the WaitSet in a small
+# helper process and forwards every notification as a 2-byte token over a pipe; the
+# reader thread here blocks in os.read, which releases the GIL.
+import os
+import struct
+import subprocess
+import sys
+import threading
+import traceback
+from typing import Callable, Dict, List, Optional
+import iceoryx2 as iox2
+
+iox2.set_log_level_from_env_or(iox2.LogLevel.Error)
+
+_TOKEN = struct.Struct("<H")
+
+
+class Iox2WakeupBridge:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tokens: Dict[str, int] = {}                      # event service name -> token
+        self._callbacks: Dict[int, List[Callable[[], None]]] = {}
+
+        pid = os.getpid()
+        self.ctrl_name = f"vr/_wakeup/{pid}"
+        self._node = (
+            iox2.NodeBuilder.new()
+                .name(iox2.NodeName.new(f"vrobots_wakeup_{pid}"))
+                .create(iox2.ServiceType.Ipc)
+        )
+        ctrl = self._node.service_builder(iox2.ServiceName.new(self.ctrl_name)).event().open_or_create()
+        self._ctrl_notifier = ctrl.notifier_builder().create()
+
+        self._proc = subprocess.Popen(
+            [sys.executable, "-c", f"from {__name__} import _bridge_main; _bridge_main({self.ctrl_name!r})"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+        self._reader.start()
+
+    def watch(self, event_service_name: str, callback: Callable[[], None]):
+        """Call `callback` (on the bridge thread, keep it cheap) whenever the event service is notified."""
+        with self._lock:
+            token = self._tokens.get(event_service_name)
+            if token is not None:
+                self._callbacks[token].append(callback)
+                return
+            token = len(self._tokens)
+            if token > 0xFFFF:
+                raise RuntimeError("[Iox2WakeupBridge] too many watched event services")
+            self._tokens[event_service_name] = token
+            self._callbacks[token] = [callback]
+            self._proc.stdin.write(f"watch {token} {event_service_name}\n".encode("utf-8"))
+            self._proc.stdin.flush()
+        self._ctrl_notifier.notify()
+
+    def unwatch(self, event_service_name: str, callback: Callable[[], None]):
+        with self._lock:
+            token = self._tokens.get(event_service_name)
+            if token is not None and callback in self._callbacks[token]:
+                self._callbacks[token].remove(callback)
+
+    def _read_loop(self):
+        fd = self._proc.stdout.fileno()
+        pending = b""
+        try:
+            while True:
+                data = os.read(fd, 4096)
+                if not data:
+                    break
+                data = pending + data
+                usable = len(data) - len(data) % _TOKEN.size
+                pending = data[usable:]
+                for (token,) in _TOKEN.iter_unpack(data[:usable]):
+                    for cb in self._callbacks.get(token, ()):
+                        cb()
+        except Exception:
+            traceback.print_exc()
+        print("[Iox2WakeupBridge] helper process exited, event wakeups stopped")
+
+    def shutdown(self):
+        try:
+            self._proc.stdin.close()
+        except Exception:
+            pass
+        self._proc.terminate()
+
+
+_bridge: Optional[Iox2WakeupBridge] = None
+_bridge_lock = threading.Lock()
+
+
+def get_wakeup_bridge() -> Iox2WakeupBridge:
+    """Process-wide bridge, started on first use."""
+    global _bridge
+    with _bridge_lock:
+        if _bridge is None:
+            _bridge = Iox2WakeupBridge()
+        return _bridge
+
+
+# --- helper process -----------------------------------------------------------
+
+def _bridge_main(ctrl_name: str):
+    import signal
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the parent decides when we stop
+    parent_pid = os.getppid()
+
+    node = (
+        iox2.NodeBuilder.new()
+            .name(iox2.NodeName.new(f"vrobots_wakeup_helper_{os.getpid()}"))
+            .create(iox2.ServiceType.Ipc)
+    )
+    waitset = (
+        iox2.WaitSetBuilder.new()
+            .signal_handling_mode(iox2.SignalHandlingMode.Disabled)
+            .create(iox2.ServiceType.Ipc)
+    )
+    ctrl = node.service_builder(iox2.ServiceName.new(ctrl_name)).event().open_or_create()
+    ctrl_listener = ctrl.listener_builder().create()
+    ctrl_guard = waitset.attach_notification(ctrl_listener)
+    watched = []  # (guard, listener, token)
+
+    stdin_fd = sys.stdin.fileno()
+    os.set_blocking(stdin_fd, False)
+    line_buf = b""
+
+    def drain_commands() -> bool:
+        nonlocal line_buf
+        while True:
+            try:
+                chunk = os.read(stdin_fd, 4096)
+            except BlockingIOError:
+                return True
+            if not chunk:
+                return False  # parent closed the pipe
+            line_buf += chunk
+            *lines, line_buf = line_buf.split(b"\n")
+            for line in lines:
+                cmd, token, name = line.decode("utf-8").split(" ", 2)
+                if cmd == "watch":
+                    event = node.service_builder(iox2.ServiceName.new(name)).event().open_or_create()
+                    listener = event.listener_builder().create()
+                    watched.append((waitset.attach_notification(listener), listener, int(token)))
+
+    if not drain_commands():
+        return
+    while os.getppid() == parent_pid:
+        triggers, _ = waitset.wait_and_process_with_timeout(iox2.Duration.from_millis(500))
+        woken = []
+        for attachment in triggers:
+            if attachment.has_event_from(ctrl_guard):
+                ctrl_listener.try_wait_all()
+                if not drain_commands():
+                    return
+                continue
+            for guard, listener, token in watched:
+                if attachment.has_event_from(guard):
+                    listener.try_wait_all()
+                    woken.append(token)
+        if woken:
+            try:
+                os.write(1, b"".join(_TOKEN.pack(t) for t in woken))
+            except BrokenPipeError:
+                return
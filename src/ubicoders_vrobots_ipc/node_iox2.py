@@ -1,3 +1,4 @@
+import functools
 import time
 import traceback
 from typing import Callable, Dict, Tuple, Optional, Any
@@ -5,26 +6,50 @@ import ctypes
 import iceoryx2 as iox2
 import threading
 from .node_iox2_utils import *
+from .iox2_reactor import get_reactor
+from .session_pool import acquire_iox2_node, release_iox2_node
 from enum import Enum
 iox2.set_log_level_from_env_or(iox2.LogLevel.Error)
 
+RECV_MODES = ("event", "poll")
+
 
 class Iox2Node:
-    def __init__(self, sysId:int=0, subs_poll_millis:int=10, node_name:str=None):
+    """
+    Image subscribers are serviced by the process-wide Iox2Reactor, a few threads shared
+    by every Iox2Node instead of one thread per camera topic.
+    recv_mode="event": a subscription is serviced as soon as the publisher notifies the
+    iceoryx2 event service paired with the image service (same name), see
+    Iox2WakeupBridge. It is still polled every subs_poll_millis, so publishers that
+    never notify behave exactly like poll mode.
+    recv_mode="poll": only poll every subs_poll_millis.
+    node_name=None shares the process-wide iceoryx2 node (see session_pool); a name
+    creates a private node.
+    """
+    def __init__(self, sysId:int=0, subs_poll_millis:int=10, node_name:str=None, recv_mode:str="event"):
+        if recv_mode not in RECV_MODES:
+            raise ValueError(f"Unsupported recv_mode '{recv_mode}'; must be one of {RECV_MODES}")
         self.sysId = sysId
         self.sub_dict = {}      # topic -> (subscriber, ImageResolution)
+        self.sub_zero_copy = {} # topic -> bool
+        self.sub_frames = {}    # topic -> ImageFramePool (pooled mode only)
+        self.sub_converters = {} # topic -> ImageConverter, None = full-resolution BGR
         self.sub_img_data = {}  # topic -> latest image data
-        self.sub_threads = {}   # topic -> Thread
+        self.sub_sources = {}   # topic -> ReactorSource
+        self.sub_callbacks = {} # topic -> [callback(image_state)] run on the reactor thread
+        self.sub_ready_callbacks = {} # topic -> [callback()] run once the frame is readable
         self.stop_event = threading.Event()
+        self.recv_mode = recv_mode
 
-        if node_name is None:
-            node_name = f"vrobot_node_{sysId}"
-
-        self.node = (
-            iox2.NodeBuilder.new()
-                .name(iox2.NodeName.new(node_name))
-                .create(iox2.ServiceType.Ipc)
-        )
+        self.shared = node_name is None
+        if self.shared:
+            self.node = acquire_iox2_node()
+        else:
+            self.node = (
+                iox2.NodeBuilder.new()
+                    .name(iox2.NodeName.new(node_name))
+                    .create(iox2.ServiceType.Ipc)
+            )
         self.subs_poll_millis = subs_poll_millis
 
     def get_topic_name(self, topic: str, image_resolution: ImageResolution) -> str:
@@ -34,9 +59,22 @@ class Iox2Node:
         self,
         cam_side: str,
         image_resolution: ImageResolution = ImageResolution.P720,
+        zero_copy: bool = False,
+        pooled: bool = True,
+        output_spec: Optional[ImageOutputSpec] = None,
     ):
+        """
+        zero_copy=True hands out ImageLease objects (read-only RGBA views into the
+        shared-memory sample) instead of converted BGR copies.
+        pooled=True converts into a triple-buffered pool of preallocated frames; a frame
+        returned by get_image_data is recycled after the next get_image_data, copy() it to keep it.
+        output_spec selects format, ROI and downscale of image_data (default: full BGR).
+        """
         if cam_side not in ["left", "right", "down"]:
             raise ValueError(f"Unsupported topic '{cam_side}'; must be 'left', 'right', or 'down'")
+        if zero_copy and output_spec is not None:
+            raise ValueError("output_spec can't be used with zero_copy, zero-copy frames are raw RGBA")
+        converter = ImageConverter(image_resolution, output_spec) if output_spec is not None else None
 
         topic_name = self.get_topic_name(cam_side, image_resolution)
         # print(f"payload type: {get_payload_type(image_resolution)}")
@@ -48,53 +86,204 @@ class Iox2Node:
         )
         subscriber = service.subscriber_builder().create()
 
-        # store before starting the thread to avoid races
+        # store before registering with the reactor to avoid races
         self.sub_dict[topic_name] = (subscriber, image_resolution)
+        self.sub_zero_copy[topic_name] = zero_copy
+        self.sub_converters[topic_name] = converter
+        if pooled and not zero_copy:
+            self.sub_frames[topic_name] = ImageFramePool(image_resolution, converter)
 
-        t = threading.Thread(target=self._listen_loop, args=(topic_name,), daemon=True)
-        self.sub_threads[topic_name] = t
-        t.start()
+        handler = self._service_zero_copy if zero_copy else self._service_frame
+        self.sub_sources[topic_name] = get_reactor().register(
+            topic_name,
+            functools.partial(handler, topic_name),
+            poll_interval=self.subs_poll_millis / 1000.0,
+            wakeup=self.recv_mode == "event",
+        )
         print(f"[Iox2Node] Created subscriber for topic '{topic_name}'")
 
-    def _listen_loop(self, topic_name: str):
+    def add_frame_callback(self, cam_side: str, image_resolution: ImageResolution,
+                           callback: Callable[[Any], None]):
+        """
+        Call callback(image_state) on the reactor thread for every new frame, before it is
+        handed to get_image_data. Keep it short, it delays every other subscription.
+        """
+        topic_name = self.get_topic_name(cam_side, image_resolution)
+        self.sub_callbacks.setdefault(topic_name, []).append(callback)
+
+    def add_frame_ready_callback(self, cam_side: str, image_resolution: ImageResolution,
+                                 callback: Callable[[], None]):
+        """Call callback() on the reactor thread once a new frame can be read with get_image_data."""
+        topic_name = self.get_topic_name(cam_side, image_resolution)
+        self.sub_ready_callbacks.setdefault(topic_name, []).append(callback)
+
+    def _run_frame_callbacks(self, topic_name: str, img_state):
+        for cb in self.sub_callbacks.get(topic_name, ()):
+            try:
+                cb(img_state)
+            except Exception:
+                print(f"[Iox2Node] frame callback for '{topic_name}' failed")
+                traceback.print_exc()
+
+    def _run_ready_callbacks(self, topic_name: str):
+        for cb in self.sub_ready_callbacks.get(topic_name, ()):
+            try:
+                cb()
+            except Exception:
+                print(f"[Iox2Node] frame ready callback for '{topic_name}' failed")
+                traceback.print_exc()
+
+    def create_image_publisher(
+        self,
+        cam_side: str,
+        image_resolution: ImageResolution = ImageResolution.P720,
+        notify: bool = True,
+    ) -> "Iox2ImagePublisher":
+        topic_name = self.get_topic_name(cam_side, image_resolution)
+        return Iox2ImagePublisher(self.node, topic_name, image_resolution, notify)
+
+    @staticmethod
+    def _receive_latest(subscriber):
+        # skip stale frames, only the newest one is worth converting
+        sample = subscriber.receive()
+        while sample is not None and subscriber.has_samples():
+            sample.delete()
+            sample = subscriber.receive()
+        return sample
+
+    def _service_frame(self, topic_name: str) -> bool:
         subscriber, image_resolution = self.sub_dict[topic_name]
+        sample = self._receive_latest(subscriber)
+        if sample is None:
+            return False
+
+        header = sample.user_header().contents
+        body = sample.payload().contents
+        timestamp = header.timestamp / 10e5 # make it millis
+        image_data = body.image_data
+        flip_mode = body.flip_mode
+        # print(f"topic '{topic_name}' received image ts={timestamp}, flip_mode={flip_mode}, image_data_size={len(image_data)} bytes")
+
+        frames: Optional[ImageFramePool] = self.sub_frames.get(topic_name)
+        converter: Optional[ImageConverter] = self.sub_converters.get(topic_name)
         image_state_type = get_image_state_type(image_resolution)
-        
+        if frames is not None:
+            img_state = frames.back()
+            img_state.update(timestamp, image_data, flip_mode, converter)
+        elif converter is not None:
+            img_state = image_state_type()
+            img_state.update(timestamp, image_data, flip_mode, converter)
+        else:
+            img_state = image_state_type(timestamp, image_data, flip_mode)
+        sample.delete()
+
+        self._run_frame_callbacks(topic_name, img_state)
+        if frames is not None:
+            frames.publish()
+        else:
+            self.sub_img_data[topic_name] = img_state
+        self._run_ready_callbacks(topic_name)
+        return True
+
+    def _service_zero_copy(self, topic_name: str) -> bool:
+        subscriber, image_resolution = self.sub_dict[topic_name]
+        if not subscriber.has_samples():
+            return False
+
+        # give our reference to the previous frame back before borrowing the next,
+        # the subscriber only allows a couple of borrowed samples at a time
+        prev = self.sub_img_data.get(topic_name)
+        if prev is not None:
+            prev._drop_node_ref()
+
         try:
-            while not self.stop_event.is_set():
-                if self.stop_event.is_set():
-                    break
-
-                sample = subscriber.receive()
-                if sample is None:
-                    continue
-
-                header = sample.user_header().contents
-                body = sample.payload().contents
-                timestamp = header.timestamp / 10e5 # make it millis  
-                image_data = body.image_data
-                
-                flip_mode = body.flip_mode        
-                # print(f"topic '{topic_name}' received image ts={timestamp}, flip_mode={flip_mode}, image_data_size={len(image_data)} bytes")      
-                self.sub_img_data[topic_name] = image_state_type(timestamp, image_data, flip_mode)
-                time.sleep(self.subs_poll_millis / 1000.0)
+            sample = self._receive_latest(subscriber)
         except Exception as e:
-            self.stop_event.set()
-            print(f"Listener for topic '{topic_name}' exiting.")
+            # too many borrowed samples - the user is holding leases without releasing
+            print(f"[Iox2Node] '{topic_name}' receive failed: {e}")
+            return False
+        if sample is None:
+            return False
+
+        width, height, channels = image_resolution.value
+        header = sample.user_header().contents
+        timestamp = header.timestamp / 10e5 # make it millis
+        flip_mode = sample.payload().contents.flip_mode
+        img_state = ImageLease(sample, timestamp, flip_mode, width, height, channels)
+        self._run_frame_callbacks(topic_name, img_state)
+        self.sub_img_data[topic_name] = img_state
+        self._run_ready_callbacks(topic_name)
+        return True
 
     def get_image_data(self, cam_side: str, image_resolution: ImageResolution) -> Optional[Any]:
         topic_name = self.get_topic_name(cam_side, image_resolution)
+        frames = self.sub_frames.get(topic_name)
+        if frames is not None:
+            # newest frame, or the one handed out last time if nothing new arrived
+            frame = frames.take() or frames.front()
+            return frame if frame.ts > 0 else None
         if self.sub_img_data.get(topic_name) is None:
             return None
         else:
             return self.sub_img_data[topic_name]
 
     def shutdown(self, timeout: float = 2.0):
-        """Signal threads to stop and wait briefly for them to exit."""
+        """Stop servicing this node's subscriptions; returns once no handler is running."""
         self.stop_event.set()
-        # Give each thread a chance to exit; avoid joining current thread.
-        for topic, t in list(self.sub_threads.items()):
-            if t is threading.current_thread():
-                continue
-            t.join(timeout=timeout)
+        reactor = get_reactor()
+        for topic, src in list(self.sub_sources.items()):
+            reactor.unregister(src)
+        self.sub_sources.clear()
+        # hand zero-copy samples back before the iox2 node goes away
+        for topic, img in list(self.sub_img_data.items()):
+            if isinstance(img, ImageLease):
+                img._drop_node_ref()
+        self.sub_dict.clear()
+        if self.shared and self.node is not None:
+            release_iox2_node(self.node)
+            self.node = None
+
+
+class Iox2ImagePublisher:
+    """
+    Publishes image frames the way the simulator does (GenericHeader + ImageData*),
+    optionally notifying the paired event service so event-mode listeners wake up.
+    """
+    def __init__(self, node, topic_name: str, image_resolution: ImageResolution, notify: bool = True):
+        self.topic_name = topic_name
+        self.image_resolution = image_resolution
+        self.frame_id = 0
+        service = (
+            node.service_builder(iox2.ServiceName.new(topic_name))
+                .publish_subscribe(get_payload_type(image_resolution))
+                .user_header(GenericHeader)
+                .open_or_create()
+        )
+        self.publisher = service.publisher_builder().create()
+        self.notifier = None
+        if notify:
+            event = (
+                node.service_builder(iox2.ServiceName.new(topic_name))
+                    .event()
+                    .open_or_create()
+            )
+            self.notifier = event.notifier_builder().create()
 
+    def publish(self, image_rgba: Optional[np.ndarray] = None, timestamp_ns: Optional[int] = None, flip_mode: int = 0,
+                frame_id: Optional[int] = None):
+        """
+        image_rgba: (h, w, 4) uint8 (or any flat uint8 buffer of that size); None leaves the
+        loaned buffer as is. timestamp_ns defaults to now, frame_id to a running counter.
+        """
+        sample = self.publisher.loan_uninit()
+        header = sample.user_header().contents
+        header.frame_id = self.frame_id if frame_id is None else frame_id
+        header.timestamp = time.time_ns() if timestamp_ns is None else int(timestamp_ns)
+        body = sample.payload().contents
+        body.flip_mode = flip_mode
+        if image_rgba is not None:
+            np.ctypeslib.as_array(body.image_data)[:] = image_rgba.reshape(-1)
+        sample.assume_init().send()
+        self.frame_id += 1
+        if self.notifier is not None:
+            self.notifier.notify()
@@ -1,6 +1,8 @@
 import ctypes
 from enum import Enum
+import threading
 import traceback
+from typing import Optional, Tuple
 import cv2
 import numpy as np
 
@@ -78,6 +80,88 @@ class ImageData1080p(ctypes.Structure):
         return "ImageData1080p"  # Matches C++ IOX2_TYPE_NAME
 
 
+class ImageFormat(Enum):
+    RGBA = "rgba"   # raw simulator pixels
+    BGR = "bgr"     # OpenCV default
+    RGB = "rgb"
+    GRAY = "gray"
+
+    @property
+    def channels(self) -> int:
+        return {"rgba": 4, "bgr": 3, "rgb": 3, "gray": 1}[self.value]
+
+
+_CVT_FROM_RGBA = {
+    ImageFormat.BGR: cv2.COLOR_RGBA2BGR,
+    ImageFormat.RGB: cv2.COLOR_RGBA2RGB,
+    ImageFormat.GRAY: cv2.COLOR_RGBA2GRAY,
+}
+
+
+class ImageOutputSpec:
+    """
+    What an image subscriber produces from each RGBA frame.
+        fmt:   ImageFormat of image_data
+        roi:   (x, y, w, h) in full-resolution pixels of the flipped frame, None = whole frame
+        scale: downscale factor applied after the ROI, 0 < scale <= 1
+        lazy:  only copy the raw ROI on the listener thread and convert on the first
+               image_data access, frames nobody looks at cost one memcpy
+    """
+    def __init__(self, fmt: ImageFormat = ImageFormat.BGR, roi: Optional[Tuple[int, int, int, int]] = None,
+                 scale: float = 1.0, lazy: bool = False):
+        if not 0 < scale <= 1:
+            raise ValueError(f"scale must be in (0, 1], got {scale}")
+        self.fmt = fmt
+        self.roi = roi
+        self.scale = scale
+        self.lazy = lazy
+
+
+class ImageConverter:
+    """Fused ROI -> downscale -> color conversion of one subscription, into caller-provided buffers."""
+    def __init__(self, image_resolution: "ImageResolution", spec: ImageOutputSpec):
+        self.spec = spec
+        width, height = image_resolution.width, image_resolution.height
+        x, y, w, h = spec.roi if spec.roi is not None else (0, 0, width, height)
+        if x < 0 or y < 0 or w <= 0 or h <= 0 or x + w > width or y + h > height:
+            raise ValueError(f"roi {spec.roi} is outside the {width}x{height} frame")
+        self._rows = slice(y, y + h)
+        self._cols = slice(x, x + w)
+        self.out_width = max(1, int(round(w * spec.scale)))
+        self.out_height = max(1, int(round(h * spec.scale)))
+        self._resize = (self.out_width, self.out_height) != (w, h)
+        self._cvt = _CVT_FROM_RGBA.get(spec.fmt)
+        # resize first so the color conversion only touches the small image
+        self._tmp = None
+        if self._resize and self._cvt is not None:
+            self._tmp = np.empty((self.out_height, self.out_width, 4), dtype=np.uint8)
+
+    @property
+    def output_shape(self) -> Tuple[int, ...]:
+        if self.spec.fmt == ImageFormat.GRAY:
+            return (self.out_height, self.out_width)
+        return (self.out_height, self.out_width, self.spec.fmt.channels)
+
+    def new_output(self) -> np.ndarray:
+        return np.empty(self.output_shape, dtype=np.uint8)
+
+    def crop(self, img_rgba: np.ndarray) -> np.ndarray:
+        return img_rgba[self._rows, self._cols]
+
+    def convert(self, src_rgba: np.ndarray, dst: np.ndarray):
+        """src_rgba: the cropped RGBA view, dst: buffer of output_shape."""
+        if self._resize:
+            if self._cvt is None:
+                cv2.resize(src_rgba, (self.out_width, self.out_height), dst=dst, interpolation=cv2.INTER_AREA)
+                return
+            cv2.resize(src_rgba, (self.out_width, self.out_height), dst=self._tmp, interpolation=cv2.INTER_AREA)
+            src_rgba = self._tmp
+        if self._cvt is None:
+            np.copyto(dst, src_rgba)
+        else:
+            cv2.cvtColor(src_rgba, self._cvt, dst=dst)
+
+
 class BaseImageState:
     def __init__(self, ts: ctypes.c_uint64 = 0, image_data=None, flip_mode: int = 0,
                  width: int = 0, height: int = 0, channels: int = 4):
@@ -86,21 +170,19 @@ class BaseImageState:
         self.width: int = width
         self.height: int = height
         self.channels: int = channels
-        self.image_data: np.ndarray = np.zeros((self.height, self.width, self.channels), dtype=np.uint8)
+        self._raw: Optional[np.ndarray] = None                 # lazy mode: raw RGBA ROI
+        self._pending: Optional[ImageConverter] = None         # lazy mode: conversion still to do
         try:
             if image_data is None:
+                self.image_data: np.ndarray = np.zeros((self.height, self.width, self.channels), dtype=np.uint8)
                 return
 
             img_rgba = np.ctypeslib.as_array(image_data).reshape(
                 (self.height, self.width, self.channels)
             )
 
-            if flip_mode == 1:
-                img_rgba = cv2.flip(img_rgba, 1)
-            elif flip_mode == 2:
-                img_rgba = cv2.flip(img_rgba, 0)
-            elif flip_mode == 3:
-                img_rgba = cv2.flip(img_rgba, -1)
+            # flip as a view, cvtColor below is the only copy
+            img_rgba = flip_view(img_rgba, flip_mode)
 
             # store the converted image - copy
             self.image_data: np.ndarray = cv2.cvtColor(img_rgba, cv2.COLOR_RGBA2BGR)
@@ -111,6 +193,195 @@ class BaseImageState:
             traceback.print_exc()
             self.image_data: np.ndarray = np.zeros((self.height, self.width, self.channels), dtype=np.uint8)
 
+    @property
+    def image_data(self) -> np.ndarray:
+        if self._pending is not None:
+            converter, self._pending = self._pending, None
+            if self._image_data is None or self._image_data.shape != converter.output_shape:
+                self._image_data = converter.new_output()
+            converter.convert(self._raw, self._image_data)
+        return self._image_data
+
+    @image_data.setter
+    def image_data(self, value: np.ndarray):
+        self._image_data = value
+        self._pending = None
+
+    def update(self, ts: ctypes.c_uint64, image_data, flip_mode: int = 0,
+               converter: Optional[ImageConverter] = None):
+        """
+        Convert a new RGBA frame into the existing image_data buffer - no allocation after
+        the first call. Without a converter the result is the full-resolution BGR image.
+        """
+        try:
+            img_rgba = np.ctypeslib.as_array(image_data).reshape(
+                (self.height, self.width, self.channels)
+            )
+            img_rgba = flip_view(img_rgba, flip_mode)
+
+            if converter is None:
+                if self._image_data is None or self._image_data.shape != (self.height, self.width, 3):
+                    self._image_data = np.empty((self.height, self.width, 3), dtype=np.uint8)
+                cv2.cvtColor(img_rgba, cv2.COLOR_RGBA2BGR, dst=self._image_data)
+                self._pending = None
+            elif converter.spec.lazy:
+                src = converter.crop(img_rgba)
+                if self._raw is None or self._raw.shape != src.shape:
+                    self._raw = np.empty(src.shape, dtype=np.uint8)
+                np.copyto(self._raw, src)
+                self._pending = converter
+            else:
+                if self._image_data is None or self._image_data.shape != converter.output_shape:
+                    self._image_data = converter.new_output()
+                converter.convert(converter.crop(img_rgba), self._image_data)
+                self._pending = None
+
+            self.ts = ts
+            self.flip_mode = flip_mode
+        except Exception:
+            print(f"[{self.__class__.__name__}] Error ts={ts}")
+            traceback.print_exc()
+
+
+class TripleBuffer:
+    """
+    Single-producer/single-consumer handoff of three preallocated slots.
+    The writer fills back() and publish()es it into the middle slot; the reader's
+    take() swaps the middle slot to the front. The writer never touches the front
+    slot, so the reader's frame stays intact until its next take().
+    """
+    def __init__(self, slots):
+        if len(slots) != 3:
+            raise ValueError("TripleBuffer needs exactly 3 slots")
+        self._slots = list(slots)  # [front, middle, back]
+        self._fresh = False
+        self._lock = threading.Lock()
+
+    def back(self):
+        return self._slots[2]
+
+    def publish(self):
+        with self._lock:
+            self._slots[1], self._slots[2] = self._slots[2], self._slots[1]
+            self._fresh = True
+
+    def take(self):
+        """Newest published slot, or None if nothing new since the last take()."""
+        with self._lock:
+            if not self._fresh:
+                return None
+            self._slots[0], self._slots[1] = self._slots[1], self._slots[0]
+            self._fresh = False
+            return self._slots[0]
+
+    def front(self):
+        return self._slots[0]
+
+
+class ImageFramePool(TripleBuffer):
+    """Three preallocated image states of one resolution, converted into in place by the listener."""
+    def __init__(self, image_resolution: "ImageResolution", converter: Optional[ImageConverter] = None):
+        slots = []
+        for _ in range(3):
+            state = get_image_state_type(image_resolution)()
+            if converter is None:
+                state.image_data = np.zeros((state.height, state.width, 3), dtype=np.uint8)
+            else:
+                state.image_data = np.zeros(converter.output_shape, dtype=np.uint8)
+            slots.append(state)
+        super().__init__(slots)
+
+
+def flip_view(img: np.ndarray, flip_mode: int) -> np.ndarray:
+    """Apply flip_mode (0=none, 1=horizontal, 2=vertical, 3=both) as a negative-stride view, no copy."""
+    if flip_mode == 1:
+        return img[:, ::-1]
+    elif flip_mode == 2:
+        return img[::-1]
+    elif flip_mode == 3:
+        return img[::-1, ::-1]
+    return img
+
+
+class ImageLease:
+    """
+    Zero-copy image state. image_data is a read-only RGBA view straight into the
+    iceoryx2 shared-memory sample, flipped with negative strides.
+
+    The sample is held by the listener until a newer frame arrives and by the user
+    between acquire() and release(); it goes back to iceoryx2 once both let go.
+    Any view taken from image_data is invalid after that - copy() it to keep it.
+    """
+    def __init__(self, sample=None, ts: float = 0, flip_mode: int = 0,
+                 width: int = 0, height: int = 0, channels: int = 4):
+        self.ts = ts
+        self.flip_mode: int = flip_mode
+        self.width: int = width
+        self.height: int = height
+        self.channels: int = channels
+        self._lock = threading.Lock()
+        self._sample = sample
+        self._node_held = sample is not None
+        self._user_held = False
+        self._view: np.ndarray = None
+
+        if sample is not None:
+            img_rgba = np.ctypeslib.as_array(sample.payload().contents.image_data).reshape(
+                (self.height, self.width, self.channels)
+            )
+            self._view = flip_view(img_rgba, flip_mode)
+            self._view.flags.writeable = False
+
+    @property
+    def image_data(self) -> np.ndarray:
+        view = self._view
+        if view is None:
+            if self._sample is None and self.ts == 0:
+                # placeholder before the first frame
+                return np.zeros((self.height, self.width, self.channels), dtype=np.uint8)
+            raise RuntimeError(f"[ImageLease] image ts={self.ts} was already released")
+        return view
+
+    @property
+    def released(self) -> bool:
+        return self._sample is None
+
+    def acquire(self) -> bool:
+        """Take the user lease. Returns False if the sample was already given back."""
+        with self._lock:
+            if self._sample is None:
+                return False
+            self._user_held = True
+            return True
+
+    def release(self):
+        """Give the user lease back. Safe to call more than once."""
+        with self._lock:
+            self._user_held = False
+            self._free_if_unused()
+
+    def _drop_node_ref(self):
+        with self._lock:
+            self._node_held = False
+            self._free_if_unused()
+
+    def _free_if_unused(self):
+        if self._sample is None or self._node_held or self._user_held:
+            return
+        self._view = None
+        sample, self._sample = self._sample, None
+        try:
+            sample.delete()
+        except Exception:
+            traceback.print_exc()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
 # Subclasses for specific resolutions
 class ImageState360p(BaseImageState):
     def __init__(self, ts: ctypes.c_uint64 = 0, image_data=None, flip_mode: int = 0):
@@ -0,0 +1,184 @@
+# Execution backends that isolate VRobotClient nodes from each other.
+#
+# "thread":  every node runs its own RateScheduler on its own worker thread, so a slow
+#            update() only delays that node. Ticks never overlap (a busy node skips or
+#            catches up per the overrun policy instead of queueing work).
+# "process": every node is built by a picklable factory inside its own process and
+#            runs its own scheduler there; heavy image processing can't hold the GIL
+#            for the others. Loop stats come back over a size-1 queue (stale stats are
+#            dropped rather than queued).
+# Both publish the start time of the running tick so the client's watchdog can flag a
+# node whose update() exceeds the timeout; Python threads can't be killed, so a stuck
+# node is reported, and the others keep running untouched.
+import multiprocessing as mp
+from abc import ABC, abstractmethod
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from .scheduler import RateScheduler
+
+EXECUTORS = ("sequential", "thread", "process")
+
+
+class _RunnerBase(ABC):
+    def __init__(self, name: str, rate_hz: float, timeout: float):
+        self.name = name
+        self.rate_hz = rate_hz
+        self.timeout = timeout
+        self.stalled = False
+        self.stalls = 0   # times the node was flagged
+
+    @abstractmethod
+    def tick_started(self) -> float:
+        """monotonic start of the running tick, 0 when idle"""
+
+    @abstractmethod
+    def alive(self) -> bool:
+        """True while the node's thread / process is running"""
+
+    def check(self, now: float) -> Optional[str]:
+        """Update the stall flag; returns a message when the state changed."""
+        started = self.tick_started()
+        busy = now - started if started else 0.0
+        if busy > self.timeout and not self.stalled:
+            self.stalled = True
+            self.stalls += 1
+            return f"'{self.name}' update() running for {busy:.2f}s (timeout {self.timeout:.2f}s)"
+        if busy <= self.timeout and self.stalled:
+            self.stalled = False
+            return f"'{self.name}' recovered"
+        return None
+
+    def poll(self):
+        """Called from the watchdog loop."""
+        pass
+
+    def flags(self) -> Dict[str, Any]:
+        return {"stalled": self.stalled, "stalls": self.stalls, "alive": self.alive()}
+
+
+class ThreadNodeRunner(_RunnerBase):
+    def __init__(self, name: str, vrnode: Any, update_fn: Callable[[Any], None], rate_hz: float,
+                 overrun_policy: str, timeout: float):
+        super().__init__(name, rate_hz, timeout)
+        self.vrnode = vrnode
+        self._update_fn = update_fn
+        self._tick_started = 0.0
+        self.scheduler = RateScheduler(overrun_policy)
+        self.scheduler.add(name, self._tick, rate_hz)
+        self.thread = threading.Thread(target=self.scheduler.run, daemon=True, name=f"vrnode-{name}")
+
+    def _tick(self):
+        self._tick_started = time.monotonic()
+        try:
+            self._update_fn(self.vrnode)
+        finally:
+            self._tick_started = 0.0
+
+    def tick_started(self) -> float:
+        return self._tick_started
+
+    def alive(self) -> bool:
+        return self.thread.is_alive()
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self, timeout: float = 2.0):
+        self.scheduler.stop()
+        if self.thread.is_alive():
+            self.thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        summary = self.scheduler.stats().get(self.name, {})
+        summary.update(self.flags())
+        return summary
+
+    def shutdown_node(self):
+        self.vrnode.shutdown()
+
+
+def _process_node_main(factory: Callable[[], Any], update_fn: Callable[[Any], None], name: str,
+                       rate_hz: float, overrun_policy: str, stop_event, tick_started, stats_queue):
+    import signal
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the parent stops us
+    vrnode = factory()
+    scheduler = RateScheduler(overrun_policy)
+
+    def tick():
+        tick_started.value = time.monotonic()
+        try:
+            update_fn(vrnode)
+        finally:
+            tick_started.value = 0.0
+
+    scheduler.add(name, tick, rate_hz)
+    next_report = 0.0
+    try:
+        while not stop_event.is_set():
+            wait = scheduler.run_once()
+            now = time.monotonic()
+            if now >= next_report:
+                next_report = now + 0.5
+                try:
+                    stats_queue.put_nowait(scheduler.stats()[name])
+                except queue.Full:
+                    pass  # parent hasn't picked up the last report yet
+            if wait > 0:
+                stop_event.wait(wait)
+    finally:
+        vrnode.shutdown()
+
+
+class ProcessNodeRunner(_RunnerBase):
+    def __init__(self, name: str, factory: Callable[[], Any], update_fn: Callable[[Any], None],
+                 rate_hz: float, overrun_policy: str, timeout: float):
+        super().__init__(name, rate_hz, timeout)
+        ctx = mp.get_context("spawn")
+        self._stop_event = ctx.Event()
+        self._tick_started = ctx.Value("d", 0.0, lock=False)
+        self._stats_queue = ctx.Queue(maxsize=1)
+        self._last_stats: Dict[str, Any] = {"name": name, "target_hz": rate_hz}
+        self.process = ctx.Process(
+            target=_process_node_main,
+            args=(factory, update_fn, name, rate_hz, overrun_policy,
+                  self._stop_event, self._tick_started, self._stats_queue),
+            daemon=True, name=f"vrnode-{name}",
+        )
+
+    def tick_started(self) -> float:
+        return self._tick_started.value
+
+    def alive(self) -> bool:
+        return self.process.is_alive()
+
+    def start(self):
+        self.process.start()
+
+    def stop(self, timeout: float = 3.0):
+        self._stop_event.set()
+        self.process.join(timeout)
+        if self.process.is_alive():
+            print(f"[VRobotClient] '{self.name}' did not stop, terminating")
+            self.process.terminate()
+            self.process.join(1.0)
+
+    def poll(self):
+        # keep the size-1 queue empty so the worker can post its next report
+        try:
+            while True:
+                self._last_stats = self._stats_queue.get_nowait()
+        except queue.Empty:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        self.poll()
+        summary = dict(self._last_stats)
+        summary.update(self.flags())
+        summary["exitcode"] = self.process.exitcode
+        return summary
+
+    def shutdown_node(self):
+        pass  # the node lives and shuts down in its process
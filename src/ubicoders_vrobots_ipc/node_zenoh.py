@@ -1,11 +1,14 @@
 import traceback
 from typing import Callable, Dict, Tuple, Optional, Any
 import zenoh
+from .session_pool import acquire_zenoh_session, release_zenoh_session
 
 class ZenohNode:
-    def __init__(self, sysId:int=0):
+    def __init__(self, sysId:int=0, shared:bool=True):
+        """shared=True uses the process-wide session (see session_pool), False opens a private one."""
         self.sysId = sysId
-        self.session = zenoh.open(zenoh.Config())
+        self.shared = shared
+        self.session = acquire_zenoh_session() if shared else zenoh.open(zenoh.Config())
         self.pub_dict: Dict[str, zenoh.Publisher] = {}
         self.sub_dict: Dict[str, zenoh.Subscriber] = {}
 
@@ -31,8 +34,16 @@ class ZenohNode:
         self.pub_dict[topic].put(data)
 
     def shutdown(self):
+        if self.session is None:
+            return
         for sub in self.sub_dict.values():
             sub.undeclare()
         for pub in self.pub_dict.values():
             pub.undeclare()
-        self.session.close()
\ No newline at end of file
+        self.sub_dict.clear()
+        self.pub_dict.clear()
+        if self.shared:
+            release_zenoh_session(self.session)
+        else:
+            self.session.close()
+        self.session = None
\ No newline at end of file
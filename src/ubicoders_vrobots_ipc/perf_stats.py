@@ -0,0 +1,55 @@
+import threading
+from typing import Dict, Optional
+import numpy as np
+
+
+class LatencyStats:
+    """Keeps the last `maxlen` samples and summarizes them as percentiles."""
+    def __init__(self, maxlen: int = 10000):
+        self.maxlen = maxlen
+        self._buf = np.zeros(maxlen, dtype=np.float64)
+        self._count = 0  # total samples ever added
+        self._lock = threading.Lock()
+
+    def add(self, value: float):
+        with self._lock:
+            self._buf[self._count % self.maxlen] = value
+            self._count += 1
+
+    def reset(self):
+        with self._lock:
+            self._count = 0
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def values(self) -> np.ndarray:
+        with self._lock:
+            n = min(self._count, self.maxlen)
+            return self._buf[:n].copy()
+
+    def summary(self) -> Dict[str, float]:
+        vals = self.values()
+        if vals.size == 0:
+            return {"count": 0}
+        p50, p90, p99 = np.percentile(vals, [50, 90, 99])
+        return {
+            "count": int(self._count),
+            "mean": float(vals.mean()),
+            "min": float(vals.min()),
+            "p50": float(p50),
+            "p90": float(p90),
+            "p99": float(p99),
+            "max": float(vals.max()),
+        }
+
+
+def format_summary(name: str, summary: Dict[str, float], unit: str = "ms") -> str:
+    if not summary.get("count"):
+        return f"{name:<28} no samples"
+    return (
+        f"{name:<28} n={summary['count']:<6} mean={summary['mean']:.3f}{unit} "
+        f"p50={summary['p50']:.3f}{unit} p90={summary['p90']:.3f}{unit} "
+        f"p99={summary['p99']:.3f}{unit} max={summary['max']:.3f}{unit}"
+    )
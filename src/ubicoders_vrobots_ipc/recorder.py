@@ -0,0 +1,146 @@
+# vrobot-record: capture Zenoh topics and iceoryx2 camera streams into a .vrrec file.
+#
+# Zenoh samples are stored as received (raw payload bytes, key expression as stream
+# name). Camera frames are copied out of shared memory with one memcpy on the iox2
+# reactor thread, raw RGBA with flip_mode and the GenericHeader frame id / timestamp,
+# and every queued frame is taken (not just the newest) so nothing is skipped.
+# Disk writes happen on the RecordingWriter thread; see recording.py for the format.
+import argparse
+import ctypes
+import functools
+import json
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+import iceoryx2 as iox2
+
+from .iox2_reactor import get_reactor
+from .node_iox2_utils import GenericHeader, ImageResolution, get_payload_type
+from .recording import RecordingWriter
+from .session_pool import acquire_iox2_node, acquire_zenoh_session, release_iox2_node, release_zenoh_session
+
+DEFAULT_TOPICS = ("vr/*/states", "vr/*/cmd", "vr/*/rtg")
+_RESOLUTIONS = {r.label: r for r in ImageResolution}
+
+
+def parse_camera(spec: str) -> Tuple[int, str, ImageResolution]:
+    """'0:left:720p' -> (0, 'left', ImageResolution.P720)"""
+    try:
+        sysId, side, res = spec.split(":")
+        return int(sysId), side, _RESOLUTIONS[res]
+    except (ValueError, KeyError):
+        raise ValueError(f"camera spec must look like 0:left:720p (resolutions: {', '.join(_RESOLUTIONS)}), got '{spec}'")
+
+
+class Recorder:
+    def __init__(self, path: str, topics: Sequence[str] = DEFAULT_TOPICS,
+                 cameras: Sequence[Tuple[int, str, ImageResolution]] = (),
+                 max_queue_mb: int = 1024):
+        self.writer = RecordingWriter(path, max_queue_bytes=max_queue_mb << 20)
+        self._stream_ids: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.session = acquire_zenoh_session()
+        self.subscribers = [self.session.declare_subscriber(t, self._on_zenoh_sample) for t in topics]
+        self.node = acquire_iox2_node() if cameras else None
+        self._cams: Dict[str, tuple] = {}    # topic -> (subscriber, stream id, image_data size)
+        self._sources = []
+        for sysId, side, res in cameras:
+            self._add_camera(sysId, side, res)
+        print(f"[Recorder] Recording {list(topics)} + {len(self._cams)} cameras to '{path}'")
+
+    def _stream(self, name: str, kind: str, **meta) -> int:
+        sid = self._stream_ids.get(name)
+        if sid is None:
+            with self._lock:
+                sid = self._stream_ids.get(name)
+                if sid is None:
+                    sid = self._stream_ids[name] = self.writer.add_stream(name, kind, **meta)
+        return sid
+
+    def _on_zenoh_sample(self, sample):
+        key = str(sample.key_expr)
+        self.writer.write(self._stream(key, "zenoh"), sample.payload.to_bytes())
+
+    def _add_camera(self, sysId: int, side: str, res: ImageResolution):
+        topic = f"vr/{sysId}/cams/{side}/{res.label}"
+        service = (
+            self.node.service_builder(iox2.ServiceName.new(topic))
+                .publish_subscribe(get_payload_type(res))
+                .user_header(GenericHeader)
+                .open_or_create()
+        )
+        # take the deepest buffer the service allows so bursts are queued, not overwritten
+        depth = service.static_config.subscriber_max_buffer_size
+        subscriber = service.subscriber_builder().buffer_size(depth).create()
+        width, height, channels = res.value
+        sid = self._stream(topic, "iox2", sysId=sysId, cam_side=side, resolution=res.name,
+                           width=width, height=height, channels=channels)
+        self._cams[topic] = (subscriber, sid, width * height * channels)
+        self._sources.append(get_reactor().register(
+            topic, functools.partial(self._service_camera, topic), poll_interval=0.005))
+
+    def _service_camera(self, topic: str) -> bool:
+        subscriber, sid, size = self._cams[topic]
+        got = False
+        sample = subscriber.receive()
+        while sample is not None:
+            header = sample.user_header().contents
+            body = sample.payload().contents
+            data = ctypes.string_at(ctypes.addressof(body.image_data), size)
+            self.writer.write(sid, data, src_ns=header.timestamp, seq=header.frame_id, flags=body.flip_mode)
+            sample.delete()
+            got = True
+            sample = subscriber.receive()
+        return got
+
+    def stats(self) -> Dict:
+        return self.writer.stats()
+
+    def stop(self):
+        reactor = get_reactor()
+        for src in self._sources:
+            reactor.unregister(src)
+        self._sources.clear()
+        for sub in self.subscribers:
+            sub.undeclare()
+        self.subscribers.clear()
+        self._cams.clear()
+        if self.node is not None:
+            release_iox2_node(self.node)
+            self.node = None
+        if self.session is not None:
+            release_zenoh_session(self.session)
+            self.session = None
+        self.writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record Zenoh topics and iceoryx2 camera streams to a .vrrec file.")
+    parser.add_argument("output", help="Output file, e.g. run1.vrrec")
+    parser.add_argument("-t", "--topic", action="append", default=None,
+                        help=f"Zenoh key expression, repeatable [default: {' '.join(DEFAULT_TOPICS)}]")
+    parser.add_argument("-c", "--cam", action="append", default=[],
+                        help="Camera as sysId:side:res, e.g. 0:left:720p (repeatable)")
+    parser.add_argument("-d", "--duration", type=float, default=None, help="Stop after this many seconds")
+    parser.add_argument("--max-queue-mb", type=int, default=1024,
+                        help="Write queue limit before records are dropped [default: 1024]")
+    args = parser.parse_args()
+
+    cameras = [parse_camera(c) for c in args.cam]
+    rec = Recorder(args.output, args.topic or DEFAULT_TOPICS, cameras, args.max_queue_mb)
+    t0 = time.monotonic()
+    try:
+        while args.duration is None or time.monotonic() - t0 < args.duration:
+            time.sleep(1.0)
+            st = rec.stats()
+            print(f"[Recorder] {st['records']} records, {st['bytes'] / 2**20:.0f} MB, "
+                  f"queue {st['queued_bytes'] / 2**20:.0f} MB, dropped {sum(st['dropped'].values())}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        rec.stop()
+        print(json.dumps(rec.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
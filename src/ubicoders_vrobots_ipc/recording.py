@@ -0,0 +1,273 @@
+# On-disk format for recorded sessions (.vrrec), written by recorder.py, read by replay.py.
+#
+# file    header "<8sII": magic b"VRREC\0\0\0", version, header size
+#         records, append-only
+#         index + stream table + trailer, written by close()
+# record  "<IHBBIIqQ" (32 bytes): length, stream id, flags, reserved, seq, reserved,
+#         recv_ns (wall clock at capture), src_ns (publisher timestamp, 0 if none)
+#         followed by `length` payload bytes. Stream id 0xFFFF is a stream definition
+#         (JSON payload), so a file cut short by a crash is still readable: the reader
+#         rebuilds the index by scanning the records.
+# index   numpy INDEX_DTYPE rows in write order; the trailer "<QQQ8s" holds index offset,
+#         row count, stream table (JSON) length and b"VRRIDX01".
+#
+# The writer thread drains the queue in bulk and hands header/payload buffers to one
+# os.writev per chunk, so payloads are never copied into an intermediate buffer. When
+# the queue holds more than max_queue_bytes, new records are dropped and counted.
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import numpy as np
+
+REC_MAGIC = b"VRREC\0\0\0"
+REC_VERSION = 1
+IDX_MAGIC = b"VRRIDX01"
+STREAM_DEF = 0xFFFF
+_FILE_HEADER = struct.Struct("<8sII")
+_RECORD = struct.Struct("<IHBBIIqQ")
+_TRAILER = struct.Struct("<QQQ8s")
+INDEX_DTYPE = np.dtype([
+    ("recv_ns", "<i8"), ("src_ns", "<u8"), ("offset", "<u8"),
+    ("length", "<u4"), ("seq", "<u4"), ("stream", "<u2"), ("flags", "u1"), ("_pad", "u1"),
+])
+_IOV_MAX = 512   # buffers per writev (header + payload per record)
+
+
+class RecordingWriter:
+    def __init__(self, path: str, max_queue_bytes: int = 1 << 30, chunk_bytes: int = 16 << 20):
+        self.path = path
+        self.max_queue_bytes = max_queue_bytes
+        self.chunk_bytes = chunk_bytes
+        self.streams: Dict[int, Dict[str, Any]] = {}
+        self._fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        header = _FILE_HEADER.pack(REC_MAGIC, REC_VERSION, _FILE_HEADER.size)
+        os.write(self._fd, header)
+        self._pos = len(header)
+        self._index: List[tuple] = []
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._closing = False
+        self._lock = threading.Lock()   # stream table
+        # stats
+        self.queued_bytes = 0
+        self.queue_peak_bytes = 0
+        self.records = 0
+        self.bytes_written = 0
+        self.dropped: Dict[int, int] = {}
+        self.write_time = 0.0
+        self._thread = threading.Thread(target=self._run, daemon=True, name="vrrec-writer")
+        self._thread.start()
+
+    def add_stream(self, name: str, kind: str, **meta) -> int:
+        """Register a stream (kind "zenoh" or "iox2"); returns its id. Thread-safe."""
+        with self._lock:
+            sid = len(self.streams)
+            info = {"id": sid, "name": name, "kind": kind, **meta}
+            self.streams[sid] = info
+        self._enqueue(STREAM_DEF, json.dumps(info).encode(), time.time_ns(), 0, 0, 0, force=True)
+        return sid
+
+    def write(self, stream_id: int, payload, recv_ns: Optional[int] = None, src_ns: int = 0,
+              seq: int = 0, flags: int = 0) -> bool:
+        """Queue one record (payload: bytes-like, not modified afterwards). False if dropped."""
+        return self._enqueue(stream_id, payload, recv_ns or time.time_ns(), src_ns, seq, flags)
+
+    def _enqueue(self, stream_id, payload, recv_ns, src_ns, seq, flags, force=False) -> bool:
+        size = len(payload) + _RECORD.size
+        with self._cond:
+            if self._closing:
+                return False
+            if not force and self.queued_bytes + size > self.max_queue_bytes:
+                self.dropped[stream_id] = self.dropped.get(stream_id, 0) + 1
+                return False
+            self._queue.append((stream_id, payload, recv_ns, src_ns, seq, flags))
+            self.queued_bytes += size
+            self.queue_peak_bytes = max(self.queue_peak_bytes, self.queued_bytes)
+            self._cond.notify()
+        return True
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._closing:
+                    self._cond.wait()
+                if not self._queue and self._closing:
+                    return
+                batch = []
+                size = 0
+                while self._queue and size < self.chunk_bytes and len(batch) * 2 < _IOV_MAX:
+                    item = self._queue.popleft()
+                    batch.append(item)
+                    size += len(item[1]) + _RECORD.size
+            self._write_batch(batch)
+            with self._cond:
+                self.queued_bytes -= size
+
+    def _write_batch(self, batch):
+        t0 = time.perf_counter()
+        buffers = []
+        pos = self._pos
+        for stream_id, payload, recv_ns, src_ns, seq, flags in batch:
+            length = len(payload)
+            buffers.append(_RECORD.pack(length, stream_id, flags, 0, seq, 0, recv_ns, src_ns))
+            buffers.append(payload)
+            if stream_id != STREAM_DEF:
+                self._index.append((recv_ns, src_ns, pos + _RECORD.size, length, seq, stream_id, flags, 0))
+            pos += _RECORD.size + length
+        total = pos - self._pos
+        written = os.writev(self._fd, buffers)
+        if written < total:
+            # short write: fall back to writing the rest piecewise
+            view = memoryview(b"".join(buffers))[written:]
+            while view:
+                view = view[os.write(self._fd, view):]
+        self._pos = pos
+        self.records += len(batch)
+        self.bytes_written += total
+        self.write_time += time.perf_counter() - t0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "records": self.records,
+            "bytes": self.bytes_written,
+            "queued_bytes": self.queued_bytes,
+            "queue_peak_bytes": self.queue_peak_bytes,
+            "dropped": {self.streams[s]["name"] if s in self.streams else s: n for s, n in self.dropped.items()},
+            "write_MBps": self.bytes_written / self.write_time / 2**20 if self.write_time else 0.0,
+        }
+
+    def close(self):
+        """Flush everything queued, then write the index and trailer."""
+        with self._cond:
+            if self._closing:
+                return
+            self._closing = True
+            self._cond.notify()
+        self._thread.join()
+        index = np.array(self._index, dtype=INDEX_DTYPE)
+        streams = json.dumps(list(self.streams.values())).encode()
+        index_offset = self._pos
+        os.write(self._fd, index.tobytes())
+        os.write(self._fd, streams)
+        os.write(self._fd, _TRAILER.pack(index_offset, len(index), len(streams), IDX_MAGIC))
+        os.close(self._fd)
+
+
+class RecordingReader:
+    """
+    Memory-mapped, random access by time:
+        rec = RecordingReader("run.vrrec")
+        i = rec.seek(rec.start_ns + 5_000_000_000)
+        row, payload = rec.read(i)      # payload: memoryview into the map, no copy
+    The index is sorted by recv_ns (stable, so per-stream order is kept).
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mm)
+        magic, version, header_size = _FILE_HEADER.unpack_from(self._mm, 0)
+        if magic != REC_MAGIC:
+            raise ValueError(f"{path} is not a vrrec file")
+        if version != REC_VERSION:
+            raise ValueError(f"unsupported vrrec version {version}")
+        self._header_size = header_size
+        self.recovered = False
+        index, streams = self._read_trailer()
+        if index is None:
+            index, streams = self._scan()
+            self.recovered = True
+        order = np.argsort(index["recv_ns"], kind="stable")
+        self.index = index[order]
+        self.streams: Dict[int, Dict[str, Any]] = {s["id"]: s for s in streams}
+
+    def _read_trailer(self):
+        size = len(self._mm)
+        if size < self._header_size + _TRAILER.size:
+            return None, None
+        index_offset, count, streams_len, magic = _TRAILER.unpack_from(self._mm, size - _TRAILER.size)
+        if magic != IDX_MAGIC:
+            return None, None
+        index = np.frombuffer(self._mm, dtype=INDEX_DTYPE, count=count, offset=index_offset)
+        start = index_offset + count * INDEX_DTYPE.itemsize
+        streams = json.loads(bytes(self._mm[start:start + streams_len]))
+        return index, streams
+
+    def _scan(self):
+        # no trailer (recorder killed): walk the records
+        rows, streams = [], []
+        pos, size = self._header_size, len(self._mm)
+        while pos + _RECORD.size <= size:
+            length, sid, flags, _, seq, _, recv_ns, src_ns = _RECORD.unpack_from(self._mm, pos)
+            start = pos + _RECORD.size
+            if start + length > size:
+                break  # torn last record
+            if sid == STREAM_DEF:
+                streams.append(json.loads(bytes(self._mm[start:start + length])))
+            else:
+                rows.append((recv_ns, src_ns, start, length, seq, sid, flags, 0))
+            pos = start + length
+        return np.array(rows, dtype=INDEX_DTYPE), streams
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    @property
+    def start_ns(self) -> int:
+        return int(self.index["recv_ns"][0]) if len(self.index) else 0
+
+    @property
+    def end_ns(self) -> int:
+        return int(self.index["recv_ns"][-1]) if len(self.index) else 0
+
+    @property
+    def duration(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e9
+
+    def stream_id(self, name: str) -> int:
+        for sid, info in self.streams.items():
+            if info["name"] == name:
+                return sid
+        raise KeyError(name)
+
+    def seek(self, t_ns: int) -> int:
+        """Index position of the first record at or after t_ns."""
+        return int(np.searchsorted(self.index["recv_ns"], t_ns, side="left"))
+
+    def read(self, i: int) -> Tuple[np.void, memoryview]:
+        row = self.index[i]
+        offset = int(row["offset"])
+        return row, self._view[offset:offset + int(row["length"])]
+
+    def iter_records(self, start: int = 0, stop: Optional[int] = None,
+                     streams: Optional[List[int]] = None) -> Iterator[Tuple[np.void, memoryview]]:
+        stop = len(self.index) if stop is None else stop
+        wanted = None if streams is None else set(streams)
+        for i in range(start, stop):
+            row = self.index[i]
+            if wanted is not None and int(row["stream"]) not in wanted:
+                continue
+            offset = int(row["offset"])
+            yield row, self._view[offset:offset + int(row["length"])]
+
+    def summary(self) -> List[Dict[str, Any]]:
+        out = []
+        for sid, info in sorted(self.streams.items()):
+            rows = self.index[self.index["stream"] == sid]
+            span = float(rows["recv_ns"][-1] - rows["recv_ns"][0]) / 1e9 if len(rows) > 1 else 0.0
+            out.append({
+                "name": info["name"], "kind": info["kind"], "records": len(rows),
+                "bytes": int(rows["length"].sum()), "rate_hz": (len(rows) - 1) / span if span else 0.0,
+            })
+        return out
+
+    def close(self):
+        """Payload views handed out by read() must be released first."""
+        self._view.release()
+        self._mm.close()
+        self._file.close()
@@ -0,0 +1,249 @@
+# vrobot-replay: republish a .vrrec session into the interfaces VRobotNodeBase consumes.
+#
+# Zenoh streams go back to their recorded key expressions (vr/{id}/states, ...), camera
+# streams to vr/{id}/cams/{side}/{res} over iceoryx2 with the recorded GenericHeader
+# frame id / timestamp and flip mode, so a node can't tell replay from the simulator.
+# Records are scheduled on the capture clock (recv_ns) divided by `speed`; speed=0 sends
+# as fast as possible. lockstep=True makes the consumer set the pace instead: after each
+# vr/{id}/states message, replay waits (up to lockstep_timeout) for that robot's next
+# vr/{id}/cmd, the same request/response rhythm a controller has with the simulator.
+# Recorded */cmd streams are skipped unless include_cmd, since the controller under test
+# publishes its own. Nodes ignore states / frames that aren't newer than the last ones,
+# so after a loop or a backwards seek the states and image timestamps are shifted forward
+# (monotonic=True) to continue where the previous segment ended.
+import argparse
+import json
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+
+from .node_iox2 import Iox2ImagePublisher
+from .node_iox2_utils import ImageResolution
+from .perf_stats import LatencyStats, format_summary
+from .recording import RecordingReader
+from .states_fast import shift_states_timestamp
+from .session_pool import acquire_iox2_node, acquire_zenoh_session, release_iox2_node, release_zenoh_session
+
+
+class Replayer:
+    def __init__(self, path: str, speed: float = 1.0, loop: bool = False, start_s: float = 0.0,
+                 end_s: Optional[float] = None, streams: Optional[Sequence[str]] = None,
+                 include_cmd: bool = False, lockstep: bool = False, lockstep_timeout: float = 1.0,
+                 monotonic: bool = True):
+        """
+        start_s / end_s: seconds from the start of the recording.
+        streams: only replay streams whose name contains one of these substrings.
+        """
+        self.reader = RecordingReader(path)
+        self.speed = speed
+        self.loop = loop
+        self.lockstep = lockstep
+        self.lockstep_timeout = lockstep_timeout
+        self.monotonic = monotonic
+        self.start_i = self.reader.seek(self.reader.start_ns + int(start_s * 1e9))
+        self.stop_i = len(self.reader) if end_s is None else self.reader.seek(self.reader.start_ns + int(end_s * 1e9))
+
+        self._selected = set()
+        for sid, info in self.reader.streams.items():
+            if not include_cmd and info["name"].endswith("/cmd"):
+                continue
+            if streams and not any(s in info["name"] for s in streams):
+                continue
+            self._selected.add(sid)
+
+        self.session = acquire_zenoh_session()
+        self.node = None
+        self._zenoh_pubs: Dict[int, Any] = {}
+        self._img_pubs: Dict[int, Iox2ImagePublisher] = {}
+        self._state_sysIds: Dict[int, int] = {}   # states stream id -> sysId, for lockstep
+        for sid in sorted(self._selected):
+            info = self.reader.streams[sid]
+            if info["kind"] == "iox2":
+                if self.node is None:
+                    self.node = acquire_iox2_node()
+                res = ImageResolution[info["resolution"]]
+                self._img_pubs[sid] = Iox2ImagePublisher(self.node, info["name"], res)
+            else:
+                self._zenoh_pubs[sid] = self.session.declare_publisher(info["name"])
+                parts = info["name"].split("/")
+                if len(parts) == 3 and parts[0] == "vr" and parts[2] == "states" and parts[1].isdigit():
+                    self._state_sysIds[sid] = int(parts[1])
+
+        self._time_offset_ns = 0     # added to states / image timestamps after jumps back
+        self._last_recv_ns = None    # capture time of the last published record
+
+        self._cmd_events: Dict[int, threading.Event] = {}
+        self._cmd_subs = []
+        if lockstep:
+            for sysId in set(self._state_sysIds.values()):
+                ev = self._cmd_events[sysId] = threading.Event()
+                self._cmd_subs.append(self.session.declare_subscriber(f"vr/{sysId}/cmd", lambda _s, ev=ev: ev.set()))
+
+        self._stop = threading.Event()
+        self._seek_to: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self.published: Dict[str, int] = {}
+        self.lockstep_timeouts = 0
+        self.lag = LatencyStats()   # ms behind schedule (paced modes)
+        self.position_s = 0.0
+        self.loops = 0
+        print(f"[Replayer] {path}: {len(self._selected)} streams, {self.reader.duration:.1f}s, "
+              f"speed={'max' if not speed else speed}{' lockstep' if lockstep else ''}")
+
+    def seek(self, t_s: float):
+        """Jump to t_s seconds from the start of the recording (thread-safe, applied before the next record)."""
+        self._seek_to = self.reader.seek(self.reader.start_ns + int(t_s * 1e9))
+
+    def _jump(self, i: int):
+        # continue the timeline instead of going back in time
+        if self.monotonic and self._last_recv_ns is not None:
+            back = self._last_recv_ns - int(self.reader.index["recv_ns"][i])
+            if back >= 0:
+                self._time_offset_ns += back + 50_000_000  # plus a short gap
+
+    def _publish(self, sid: int, row, payload: memoryview):
+        img_pub = self._img_pubs.get(sid)
+        if img_pub is not None:
+            img_pub.publish(np.frombuffer(payload, dtype=np.uint8), timestamp_ns=int(row["src_ns"]) + self._time_offset_ns,
+                            flip_mode=int(row["flags"]), frame_id=int(row["seq"]))
+        else:
+            state_sysId = self._state_sysIds.get(sid)
+            if state_sysId is not None and self._time_offset_ns:
+                payload = bytearray(payload)
+                shift_states_timestamp(payload, self._time_offset_ns / 1e6)
+            ev = self._cmd_events.get(state_sysId)
+            if ev is not None:
+                ev.clear()
+            self._zenoh_pubs[sid].put(bytes(payload))
+            if ev is not None and not self._stop.is_set():
+                if not ev.wait(self.lockstep_timeout):
+                    self.lockstep_timeouts += 1
+        name = self.reader.streams[sid]["name"]
+        self.published[name] = self.published.get(name, 0) + 1
+
+    def run(self):
+        """Blocks until the end of the range (or stop() when looping)."""
+        recv_ns = self.reader.index["recv_ns"]
+        streams = self.reader.index["stream"]
+        paced = self.speed > 0 and not self.lockstep
+        i = self.start_i
+        base_ns, base_t = int(recv_ns[i]) if i < len(recv_ns) else 0, time.perf_counter()
+        while not self._stop.is_set():
+            if self._seek_to is not None:
+                i, self._seek_to = self._seek_to, None
+                if i < len(recv_ns):
+                    self._jump(i)
+                base_ns, base_t = int(recv_ns[min(i, len(recv_ns) - 1)]), time.perf_counter()
+            if i >= self.stop_i:
+                if not self.loop or self.start_i >= self.stop_i:
+                    break
+                self.loops += 1
+                i = self.start_i
+                self._jump(i)
+                base_ns, base_t = int(recv_ns[i]), time.perf_counter()
+                continue
+            sid = int(streams[i])
+            if sid in self._selected:
+                if paced:
+                    due = base_t + (int(recv_ns[i]) - base_ns) / 1e9 / self.speed
+                    wait = due - time.perf_counter()
+                    if wait > 0 and self._stop.wait(wait):
+                        break
+                    self.lag.add(max(0.0, -wait) * 1e3)
+                row, payload = self.reader.read(i)
+                self._publish(sid, row, payload)
+                del payload
+                self._last_recv_ns = int(recv_ns[i])
+                self.position_s = (self._last_recv_ns - self.reader.start_ns) / 1e9
+            i += 1
+
+    def start(self) -> threading.Thread:
+        """Run in a background thread."""
+        self._thread = threading.Thread(target=self.run, daemon=True, name="vrobot-replay")
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "position_s": self.position_s,
+            "loops": self.loops,
+            "published": dict(self.published),
+            "lockstep_timeouts": self.lockstep_timeouts,
+            "lag_ms": self.lag.summary(),
+        }
+
+    def close(self):
+        self.stop()
+        for sub in self._cmd_subs:
+            sub.undeclare()
+        for pub in self._zenoh_pubs.values():
+            pub.undeclare()
+        self._cmd_subs.clear()
+        self._zenoh_pubs.clear()
+        self._img_pubs.clear()
+        if self.node is not None:
+            release_iox2_node(self.node)
+            self.node = None
+        if self.session is not None:
+            release_zenoh_session(self.session)
+            self.session = None
+        self.reader.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a .vrrec session over Zenoh / iceoryx2.")
+    parser.add_argument("input", help="Recording, e.g. run1.vrrec")
+    parser.add_argument("-s", "--speed", type=float, default=1.0, help="Playback speed, 0 = as fast as possible [default: 1]")
+    parser.add_argument("--max-speed", action="store_true", help="Same as --speed 0")
+    parser.add_argument("--lockstep", action="store_true",
+                        help="After each vr/{id}/states wait for the consumer's vr/{id}/cmd")
+    parser.add_argument("--lockstep-timeout", type=float, default=1.0, help="Seconds to wait for a cmd [default: 1.0]")
+    parser.add_argument("--start", type=float, default=0.0, help="Start at this many seconds into the recording")
+    parser.add_argument("--end", type=float, default=None, help="Stop at this many seconds into the recording")
+    parser.add_argument("-l", "--loop", action="store_true", help="Loop the [start, end] range until Ctrl+C")
+    parser.add_argument("--stream", action="append", default=None,
+                        help="Only streams whose name contains this (repeatable)")
+    parser.add_argument("--include-cmd", action="store_true", help="Also replay recorded */cmd streams")
+    parser.add_argument("--raw-timestamps", action="store_true",
+                        help="Don't shift timestamps forward after a loop / backwards seek")
+    parser.add_argument("--info", action="store_true", help="Print the streams in the recording and exit")
+    args = parser.parse_args()
+
+    if args.info:
+        reader = RecordingReader(args.input)
+        print(f"{args.input}: {reader.duration:.2f}s, {len(reader)} records{' (recovered index)' if reader.recovered else ''}")
+        for s in reader.summary():
+            print(f"  [{s['kind']:<5}] {s['name']:<32} {s['records']:>8} records {s['rate_hz']:8.1f} Hz "
+                  f"{s['bytes'] / 2**20:10.1f} MB")
+        reader.close()
+        return
+
+    replayer = Replayer(
+        args.input, speed=0.0 if args.max_speed else args.speed, loop=args.loop, start_s=args.start,
+        end_s=args.end, streams=args.stream, include_cmd=args.include_cmd,
+        lockstep=args.lockstep, lockstep_timeout=args.lockstep_timeout, monotonic=not args.raw_timestamps,
+    )
+    t0 = time.perf_counter()
+    try:
+        replayer.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        elapsed = time.perf_counter() - t0
+        st = replayer.stats()
+        replayer.close()
+        print(f"[Replayer] {sum(st['published'].values())} records in {elapsed:.2f}s, loops={st['loops']}, "
+              f"lockstep timeouts={st['lockstep_timeouts']}")
+        print(json.dumps(st["published"], indent=2))
+        if st["lag_ms"].get("count"):
+            print(format_summary("lag", st["lag_ms"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# Wire format for real-time graph samples.
+#
+# binary (v1), little endian:
+#   header  4s  magic  b"RTGB"
+#           B   version (1)
+#           B   reserved (0)
+#           H   n_channels
+#           I   n_samples
+#   body    n_samples rows of float64 [t, v0 .. v{n_channels-1}]
+#
+# json (legacy): [t, [v0, v1, ...]], [t, v] or {"t": t, "values": [...]}, one sample per message.
+import json
+import struct
+from typing import Sequence, Tuple
+import numpy as np
+
+RTG_MAGIC = b"RTGB"
+RTG_VERSION = 1
+WIRE_FORMATS = ("binary", "json")
+_HEADER = struct.Struct("<4sBBHI")
+HEADER_SIZE = _HEADER.size
+
+
+def encode_batch(rows: np.ndarray) -> bytes:
+    """rows: (n_samples, 1 + n_channels) float64, column 0 is time."""
+    rows = np.ascontiguousarray(rows, dtype="<f8")
+    n_samples, width = rows.shape
+    return _HEADER.pack(RTG_MAGIC, RTG_VERSION, 0, width - 1, n_samples) + rows.tobytes()
+
+
+def encode_sample(t: float, values: Sequence[float]) -> bytes:
+    if isinstance(values, np.ndarray):
+        values = values.ravel().tolist()
+    elif not isinstance(values, (list, tuple)):
+        values = (values,)
+    n = len(values)
+    return _HEADER.pack(RTG_MAGIC, RTG_VERSION, 0, n, 1) + struct.pack(f"<{n + 1}d", t, *values)
+
+
+def encode_json(t: float, values: Sequence[float]) -> bytes:
+    if isinstance(values, np.ndarray):
+        values = values.tolist()
+    return json.dumps([t, values]).encode("utf-8")
+
+
+def is_binary(payload: bytes) -> bool:
+    return payload[:4] == RTG_MAGIC
+
+
+def decode(payload: bytes) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns (ts (n,), values (n, n_channels)); values are read-only views for binary
+    payloads. JSON payloads decode to a single sample. Raises ValueError on bad input.
+    """
+    if is_binary(payload):
+        if len(payload) < HEADER_SIZE:
+            raise ValueError("truncated header")
+        _, version, _, n_channels, n_samples = _HEADER.unpack_from(payload)
+        if version != RTG_VERSION:
+            raise ValueError(f"unsupported rtg version {version}")
+        width = n_channels + 1
+        expected = HEADER_SIZE + 8 * width * n_samples
+        if len(payload) != expected:
+            raise ValueError(f"expected {expected} bytes, got {len(payload)}")
+        rows = np.frombuffer(payload, dtype="<f8", offset=HEADER_SIZE).reshape(n_samples, width)
+        return rows[:, 0], rows[:, 1:]
+
+    obj = json.loads(payload)
+    if isinstance(obj, dict):
+        t, values = obj["t"], obj["values"]
+    else:
+        if len(obj) != 2:
+            raise ValueError("expected [t, values]")
+        t, values = obj
+    values = np.atleast_1d(np.asarray(values, dtype=np.float64))
+    return np.array([float(t)]), values.reshape(1, -1)
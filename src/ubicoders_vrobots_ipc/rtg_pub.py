@@ -1,23 +1,89 @@
 # pub_zenoh.py
+import threading
 import time
-import json
 import numpy as np
 import zenoh
+from .rtg_codec import WIRE_FORMATS, encode_batch, encode_json, encode_sample
+from .session_pool import acquire_zenoh_session, release_zenoh_session
 
 
 class RTGPub:
-    def __init__(self, topic_name: str = "vr/rtg"):
-        self.session = zenoh.open(zenoh.Config())
+    def __init__(self, topic_name: str = "vr/rtg", wire_format: str = "json",
+                 batch_size: int = 1, flush_ms: float = 0.0):
+        """
+        wire_format="json": the [t, values] text every rtg_sub understands (default);
+        "binary": packed float64 frames (see rtg_codec), read by rtg_sub from this version on.
+        batch_size / flush_ms (binary only): samples are sent in one put once batch_size are
+        pending or the oldest pending sample is flush_ms old, whichever comes first.
+        """
+        if wire_format not in WIRE_FORMATS:
+            raise ValueError(f"wire_format must be one of {WIRE_FORMATS}")
+        if wire_format == "json" and batch_size > 1:
+            raise ValueError("json sends one sample per message, use wire_format='binary' to batch")
+        self.wire_format = wire_format
+        self.batch_size = max(1, batch_size)
+        self.flush_s = flush_ms / 1e3
+        self.session = acquire_zenoh_session()
         self.pub = self.session.declare_publisher(topic_name)
+        self._lock = threading.Lock()
+        self._rows = None        # (batch_size, 1 + n_channels), allocated on the first sample
+        self._count = 0
+        self._first_time = 0.0   # monotonic time of the oldest pending sample
+        self._stop = threading.Event()
+        self._flusher = None
+        if self.batch_size > 1 and self.flush_s > 0:
+            self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+            self._flusher.start()
         print(f"[RTGPub] Publishing on '{topic_name}'")
-    
+
     def publish(self, t: float, values: list):
-        payload = json.dumps([t, values]).encode("utf-8")
-        self.pub.put(payload)
-    
+        if self.wire_format == "json":
+            self.pub.put(encode_json(t, values))
+            return
+        if self.batch_size == 1:
+            self.pub.put(encode_sample(t, values))
+            return
+        if not isinstance(values, (list, tuple, np.ndarray)):
+            values = (values,)
+        width = len(values) + 1
+        with self._lock:
+            rows = self._rows
+            if rows is None or rows.shape[1] != width:
+                self._flush_locked()  # first sample, or the channel count changed
+                rows = self._rows = np.empty((self.batch_size, width))
+            if self._count == 0:
+                self._first_time = time.monotonic()
+            row = rows[self._count]
+            row[0] = t
+            row[1:] = values
+            self._count += 1
+            if self._count == self.batch_size or (self.flush_s and time.monotonic() - self._first_time >= self.flush_s):
+                self._flush_locked()
+
+    def flush(self):
+        """Send pending samples now."""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if self._count:
+            self.pub.put(encode_batch(self._rows[:self._count]))
+            self._count = 0
+
+    def _flush_loop(self):
+        # sends a partial batch when publish() stops being called
+        while not self._stop.wait(self.flush_s / 2):
+            with self._lock:
+                if self._count and time.monotonic() - self._first_time >= self.flush_s:
+                    self._flush_locked()
+
     def shutdown(self):
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush()
         self.pub.undeclare()
-        self.session.close()
+        release_zenoh_session(self.session)
 
 def main():
     rtg_pub = RTGPub()
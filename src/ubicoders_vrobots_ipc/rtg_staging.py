@@ -0,0 +1,82 @@
+# Single-producer / single-consumer hand-off between the Zenoh callback thread and the Qt
+# redraw timer.
+#
+# The producer pushes whole decoded batches (numpy arrays, not per-sample tuples); the
+# consumer drains everything once per frame and concatenates it into one buffer write.
+# deque.append / popleft are atomic under the GIL, and each counter has a single writer
+# (pushed_* by the producer, popped_* by the consumer), so neither side ever takes a lock.
+# When the GUI falls behind by more than capacity samples, new batches are dropped and
+# counted instead of growing the queue without bound.
+from collections import deque
+from typing import Dict, List, Tuple
+import numpy as np
+
+
+class StagingQueue:
+    def __init__(self, capacity: int = 100_000):
+        """capacity: max samples waiting for the consumer."""
+        self.capacity = capacity
+        self._chunks = deque()
+        # producer side
+        self.pushed_samples = 0
+        self.dropped_samples = 0
+        self.overflows = 0        # batches rejected because the queue was full
+        self.bad_payloads = 0
+        self.width = 0            # channel count of the first batch
+        # consumer side
+        self.popped_samples = 0
+
+    def pending(self) -> int:
+        return self.pushed_samples - self.popped_samples
+
+    def push(self, ts: np.ndarray, values: np.ndarray) -> bool:
+        """Producer thread only. Returns False if the batch was dropped."""
+        n = len(ts)
+        if self.pending() + n > self.capacity:
+            self.dropped_samples += n
+            self.overflows += 1
+            return False
+        if not self.width:
+            self.width = values.shape[1]
+        self._chunks.append((ts, values))
+        self.pushed_samples += n
+        return True
+
+    def drain(self) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Consumer thread only: every waiting batch, merged where the channel count matches."""
+        chunks = []
+        popleft = self._chunks.popleft
+        try:
+            while True:
+                chunks.append(popleft())
+        except IndexError:
+            pass
+        if not chunks:
+            return []
+        self.popped_samples += sum(len(ts) for ts, _ in chunks)
+        merged = []
+        run = [chunks[0]]
+        for chunk in chunks[1:]:
+            if chunk[1].shape[1] == run[0][1].shape[1]:
+                run.append(chunk)
+            else:
+                merged.append(_concat(run))
+                run = [chunk]
+        merged.append(_concat(run))
+        return merged
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pushed": self.pushed_samples,
+            "popped": self.popped_samples,
+            "pending": self.pending(),
+            "dropped": self.dropped_samples,
+            "overflows": self.overflows,
+            "bad_payloads": self.bad_payloads,
+        }
+
+
+def _concat(run):
+    if len(run) == 1:
+        return run[0]
+    return np.concatenate([ts for ts, _ in run]), np.concatenate([v for _, v in run])
@@ -1,27 +1,39 @@
 # rtg_spN.py — N subplots; gracefully handle too few / too many channels
 import argparse
-import json
 import signal
 import sys
+import time
 from collections import deque
-from typing import Sequence, List, Optional
+from typing import Dict, Sequence, List, Optional
 import numpy as np
 from PyQt5 import QtCore, QtWidgets
 import pyqtgraph as pg
 import zenoh
+from .session_pool import acquire_zenoh_session, release_zenoh_session
+from .rtg_codec import decode
+from .rtg_staging import StagingQueue
 colors = ['r', 'g', 'b', 'y', 'c', 'm', 'w']
 
 
 # ---------- Data buffer with padding/truncation
 class DataBufferN:
+    """
+    Preallocated ring of [t, ch0..chN] columns, written twice (at i and i + maxlen) so the
+    newest `count` samples are always one contiguous slice: get_all() returns views, no copies.
+    """
     def __init__(self, n_channels: int, maxlen: int = 1000):
         self.n = n_channels
-        self.ts = deque(maxlen=maxlen)
-        self.ys: List[deque] = [deque(maxlen=maxlen) for _ in range(n_channels)]
+        self.maxlen = maxlen
+        self._data = np.full((n_channels + 1, 2 * maxlen), np.nan)
+        self._w = 0        # next write index in [0, maxlen)
+        self.count = 0
+
+    def __len__(self):
+        return self.count
 
     def append(self, t: float, values_in: Sequence[float]):
         # coerce to list
-        if not isinstance(values_in, (list, tuple)):
+        if not isinstance(values_in, (list, tuple, np.ndarray)):
             values_in = [values_in]
 
         # truncate or pad with NaN
@@ -29,48 +41,100 @@ class DataBufferN:
         if len(values) < self.n:
             values.extend([np.nan] * (self.n - len(values)))
 
-        # append shared time and per-channel values
-        self.ts.append(t)
-        for i, v in enumerate(values):
-            self.ys[i].append(v)
+        # shared time and per-channel values, in both halves
+        w = self._w
+        col = self._data[:, w]
+        col[0] = t
+        col[1:] = values
+        self._data[:, w + self.maxlen] = col
+        self._w = (w + 1) % self.maxlen
+        self.count = min(self.count + 1, self.maxlen)
+
+    def extend(self, ts: np.ndarray, values: np.ndarray):
+        """ts (n,), values (n, k): a decoded batch; columns are truncated / NaN padded to n_channels."""
+        n = len(ts)
+        if n > self.maxlen:
+            ts, values, n = ts[-self.maxlen:], values[-self.maxlen:], self.maxlen
+        k = min(values.shape[1], self.n)
+        idx = (self._w + np.arange(n)) % self.maxlen
+        for half in (idx, idx + self.maxlen):
+            self._data[0, half] = ts
+            self._data[1:k + 1, half] = values[:, :k].T
+            if k < self.n:
+                self._data[k + 1:, half] = np.nan
+        self._w = (self._w + n) % self.maxlen
+        self.count = min(self.count + n, self.maxlen)
 
     def get_all(self):
-        ts = list(self.ts)
-        chans = [list(yq) for yq in self.ys]
-        return ts, chans
+        """(ts (count,), chans (n_channels, count)) views, oldest first; valid until the next write."""
+        end = self._w + self.maxlen
+        block = self._data[:, end - self.count:end]
+        return block[0], block[1:]
 
+    def clear(self):
+        self._w = 0
+        self.count = 0
 
-# ---------- Plot window with N stacked plots sharing X (time) axis
-class RealTimePlotN(QtWidgets.QMainWindow):
+
+def minmax_decimate(ts: np.ndarray, chans: np.ndarray, n_bins: int):
+    """
+    Reduce to at most 2 * n_bins points per channel, keeping each bin's min and max so
+    spikes survive (one bin per pixel column). Returns (ts, chans) unchanged when small.
+    """
+    count = len(ts)
+    if n_bins <= 0 or count <= 2 * n_bins:
+        return ts, chans
+    size = count // n_bins
+    start = count - size * n_bins   # drop the oldest remainder, keep the newest sample
+    t_bins = ts[start:].reshape(n_bins, size)
+    y_bins = chans[:, start:].reshape(chans.shape[0], n_bins, size)
+    x = np.empty(2 * n_bins)
+    x[0::2] = t_bins[:, 0]
+    x[1::2] = t_bins[:, -1]
+    y = np.empty((chans.shape[0], 2 * n_bins))
+    y[:, 0::2] = np.fmin.reduce(y_bins, axis=2)   # fmin/fmax: NaN only for all-NaN bins
+    y[:, 1::2] = np.fmax.reduce(y_bins, axis=2)
+    return x, y
+
+
+# ---------- N stacked plots sharing X (time) axis, fed through a staging queue
+class RTGPanel(pg.GraphicsLayoutWidget):
     def __init__(
         self,
         *,
         n_channels: int,
-        fps: int = 60,
         buffer_secs: float = 5.0,
         labels: Optional[Sequence[str]] = None,
         background: str = "k",
+        max_samples: Optional[int] = None,
+        staging: Optional[StagingQueue] = None,
+        staging_capacity: int = 100_000,
+        title: Optional[str] = None,
     ):
+        """
+        max_samples: ring size, default buffer_secs of 1 kHz telemetry.
+        staging_capacity: samples that may wait for the next redraw before new ones are dropped.
+        """
         super().__init__()
-        self.setWindowTitle(f"PyQtGraph — {n_channels}× real-time viewer")
+        self.setBackground(background)
         self.buffer_secs = buffer_secs
-
-        maxlen = int(buffer_secs * fps) + 2
+        maxlen = max_samples or int(buffer_secs * 1000) + 2
         self.buffer = DataBufferN(n_channels=n_channels, maxlen=maxlen)
-
-        # Layout
-        pg.setConfigOptions(antialias=True)
-        layout = pg.GraphicsLayoutWidget()        # <- no show=True
-        layout.setBackground(background)
-        self.setCentralWidget(layout)
+        # add_sample(s) may be called from any one thread; only refresh() touches self.buffer
+        self.staging = staging if staging is not None else StagingQueue(staging_capacity)
+        self.last_data = time.monotonic()   # last refresh() that drained new samples
 
         # Build plots/curves
         self.plots: List[pg.PlotItem] = []
         self.curves: List[pg.PlotDataItem] = []
         labels = list(labels) if labels is not None else [f"Ch {i+1}" for i in range(n_channels)]
+        row0 = 0
+        if title:
+            self.addLabel(title, row=0, col=0)
+            row0 = 1
 
         for i in range(n_channels):
-            p = layout.addPlot(row=i, col=0)
+            p = self.addPlot(row=row0 + i, col=0)
             p.showGrid(x=True, y=True, alpha=0.3)
             p.setLabel("left", labels[i] if i < len(labels) else f"Ch {i+1}")
             p.setLabel("bottom", "Time", units="s")
@@ -78,7 +142,7 @@ class RealTimePlotN(QtWidgets.QMainWindow):
                 pen = pg.mkPen(colors[i], width=2)
             else:
                 pen = pg.mkPen(width=2)  # default
-            c = p.plot(pen=pen)
+            c = p.plot(pen=pen, skipFiniteCheck=True)
             self.plots.append(p)
             self.curves.append(c)
 
@@ -91,41 +155,230 @@ class RealTimePlotN(QtWidgets.QMainWindow):
         for p in self.plots:
             p.enableAutoRange(axis=pg.ViewBox.YAxis, enable=True)
 
+    def add_sample(self, t: float, values: Sequence[float]):
+        values = np.atleast_1d(np.asarray(values, dtype=np.float64))
+        self.staging.push(np.array([t], dtype=np.float64), values.reshape(1, -1))
+
+    def add_samples(self, ts: np.ndarray, values: np.ndarray):
+        self.staging.push(ts, values)
+
+    def refresh(self) -> int:
+        """GUI thread: drain staged samples and redraw. Nothing new -> nothing redrawn (frozen)."""
+        drained = 0
+        for ts, values in self.staging.drain():
+            self.buffer.extend(ts, values)
+            drained += len(ts)
+        if not drained:
+            return 0
+        self.last_data = time.monotonic()
+        if not self.isVisible():
+            return drained
+        ts, chans = self.buffer.get_all()
+        t_end = ts[-1]
+        t_start = max(0.0, t_end - self.buffer_secs)
+        self.plots[0].setXRange(t_start, t_end, padding=0)
+        # only the visible window, decimated to one min/max pair per pixel column
+        i0 = np.searchsorted(ts, t_start)
+        width = int(self.plots[0].getViewBox().width()) or 1000
+        xs, ys = minmax_decimate(ts[i0:], chans[:, i0:], width)
+        for curve, y in zip(self.curves, ys):
+            curve.setData(xs, y)
+        return drained
+
+
+def _status_text(stagings: Sequence[StagingQueue], rate: float) -> str:
+    dropped = sum(q.dropped_samples for q in stagings)
+    overflows = sum(q.overflows for q in stagings)
+    bad = sum(q.bad_payloads for q in stagings)
+    return f"{rate:.0f} samples/s   dropped {dropped} ({overflows} overflows)   bad payloads {bad}"
+
+
+# ---------- Plot window with N stacked plots sharing X (time) axis
+class RealTimePlotN(QtWidgets.QMainWindow):
+    def __init__(
+        self,
+        *,
+        n_channels: int,
+        fps: int = 60,
+        buffer_secs: float = 5.0,
+        labels: Optional[Sequence[str]] = None,
+        background: str = "k",
+        max_samples: Optional[int] = None,
+        staging_capacity: int = 100_000,
+    ):
+        """
+        max_samples: ring size, default buffer_secs of 1 kHz telemetry.
+        staging_capacity: samples that may wait for the next redraw before new ones are dropped.
+        """
+        super().__init__()
+        self.setWindowTitle(f"PyQtGraph — {n_channels}× real-time viewer")
+        self.buffer_secs = buffer_secs
+
+        pg.setConfigOptions(antialias=True)
+        self.panel = RTGPanel(
+            n_channels=n_channels, buffer_secs=buffer_secs, labels=labels, background=background,
+            max_samples=max_samples, staging_capacity=staging_capacity,
+        )
+        self.setCentralWidget(self.panel)
+        self.buffer = self.panel.buffer
+        self.staging = self.panel.staging
+        self.plots = self.panel.plots
+        self.curves = self.panel.curves
+        self._status_t = time.monotonic()
+        self._status_popped = 0
+
         # Redraw timer
         self.timer = QtCore.QTimer(self)
         self.timer.timeout.connect(self.update_plot)
         self.timer.start(int(1000 / fps))
 
+    def staging_for(self, topic: str) -> StagingQueue:
+        return self.staging
+
     def add_sample(self, t: float, values: Sequence[float]):
-        self.buffer.append(t, values)
+        self.panel.add_sample(t, values)
+
+    def add_samples(self, ts: np.ndarray, values: np.ndarray):
+        self.panel.add_samples(ts, values)
+
+    def _update_status(self):
+        # once a second
+        now = time.monotonic()
+        if now - self._status_t < 1.0:
+            return
+        popped = self.staging.popped_samples
+        rate = (popped - self._status_popped) / (now - self._status_t)
+        self._status_t = now
+        self._status_popped = popped
+        self.statusBar().showMessage(_status_text([self.staging], rate))
 
     def update_plot(self):
-        ts, chans = self.buffer.get_all()
-        if not ts:
+        self.panel.refresh()
+        self._update_status()
+
+
+# ---------- One panel group per topic matching a key expression (vr/*/rtg)
+class MultiTopicRTGViewer(QtWidgets.QMainWindow):
+    def __init__(
+        self,
+        *,
+        n_channels: Optional[int] = None,
+        fps: int = 50,
+        buffer_secs: float = 5.0,
+        labels: Optional[Sequence[str]] = None,
+        background: str = "k",
+        max_samples: Optional[int] = None,
+        staging_capacity: int = 100_000,
+        columns: int = 1,
+        idle_secs: float = 2.0,
+        hide_idle: bool = False,
+    ):
+        """
+        Panels are created as topics first publish, in arrival order, `columns` per row.
+        n_channels=None: each panel gets the channel count of its topic's first batch.
+        A panel without new samples is not redrawn (frozen); with hide_idle it is hidden
+        after idle_secs and shown again when its topic publishes.
+        """
+        super().__init__()
+        self.setWindowTitle("PyQtGraph — multi-topic real-time viewer")
+        self.n_channels = n_channels
+        self.buffer_secs = buffer_secs
+        self.labels = labels
+        self.background = background
+        self.max_samples = max_samples
+        self.staging_capacity = staging_capacity
+        self.columns = max(1, columns)
+        self.idle_secs = idle_secs
+        self.hide_idle = hide_idle
+        self.panels: Dict[str, RTGPanel] = {}
+        # written by the Zenoh callback thread; panels are built on the GUI thread
+        self._stagings: Dict[str, StagingQueue] = {}
+        self._new_topics = deque()
+        self._status_t = time.monotonic()
+        self._status_popped = 0
+
+        pg.setConfigOptions(antialias=True)
+        container = QtWidgets.QWidget()
+        self.grid = QtWidgets.QGridLayout(container)
+        scroll = QtWidgets.QScrollArea()
+        scroll.setWidgetResizable(True)
+        scroll.setWidget(container)
+        self.setCentralWidget(scroll)
+
+        # one redraw timer for every panel
+        self.timer = QtCore.QTimer(self)
+        self.timer.timeout.connect(self.update_plot)
+        self.timer.start(int(1000 / fps))
+
+    def staging_for(self, topic: str) -> StagingQueue:
+        """Zenoh callback thread."""
+        q = self._stagings.get(topic)
+        if q is None:
+            q = self._stagings[topic] = StagingQueue(self.staging_capacity)
+            self._new_topics.append(topic)
+        return q
+
+    def _add_panel(self, topic: str) -> bool:
+        staging = self._stagings[topic]
+        n_channels = self.n_channels or staging.width
+        if not n_channels:
+            return False  # first batch not staged yet
+        panel = RTGPanel(
+            n_channels=n_channels, buffer_secs=self.buffer_secs, labels=self.labels,
+            background=self.background, max_samples=self.max_samples, staging=staging, title=topic,
+        )
+        panel.setMinimumHeight(130 * n_channels + 40)
+        i = len(self.panels)
+        self.grid.addWidget(panel, i // self.columns, i % self.columns)
+        self.panels[topic] = panel
+        print(f"[ZenohSub] New topic '{topic}' ({n_channels} channels)")
+        return True
+
+    def update_plot(self):
+        waiting = []
+        while self._new_topics:
+            topic = self._new_topics.popleft()
+            if not self._add_panel(topic):
+                waiting.append(topic)
+        self._new_topics.extend(waiting)
+        now = time.monotonic()
+        for panel in self.panels.values():
+            if panel.refresh():
+                if self.hide_idle and not panel.isVisible():
+                    panel.setVisible(True)
+            elif self.hide_idle and panel.isVisible() and now - panel.last_data > self.idle_secs:
+                panel.setVisible(False)
+        self._update_status(now)
+
+    def _update_status(self, now: float):
+        if now - self._status_t < 1.0:
             return
-        t_end = ts[-1]
-        self.plots[0].setXRange(max(0.0, t_end - self.buffer_secs), t_end, padding=0)
-        for curve, ys in zip(self.curves, chans):
-            curve.setData(ts, ys)
+        stagings = list(self._stagings.values())
+        popped = sum(q.popped_samples for q in stagings)
+        rate = (popped - self._status_popped) / (now - self._status_t)
+        self._status_t = now
+        self._status_popped = popped
+        active = sum(1 for p in self.panels.values() if now - p.last_data <= self.idle_secs)
+        self.statusBar().showMessage(f"{len(self.panels)} topics ({active} active)   " + _status_text(stagings, rate))
+
+
+def is_key_expr_pattern(topic: str) -> bool:
+    return "*" in topic or "$" in topic
 
 
-# ---------- Zenoh callback (accepts [t, y], [t, [..]], or {"t":..,"values":[..]})
-def make_zenoh_callback(window: RealTimePlotN):
+# ---------- Zenoh callback (binary rtg batches, or JSON [t, y], [t, [..]], {"t":..,"values":[..]})
+def make_zenoh_callback(window):
+    """window: RealTimePlotN or MultiTopicRTGViewer (routes by the sample's key expression)."""
     def on_zenoh_sample(sample):
+        staging = window.staging_for(str(sample.key_expr))
         try:
-            payload = sample.payload.to_bytes()
-            obj = json.loads(payload)
-
-            if isinstance(obj, dict):
-                t = obj["t"]
-                values = obj["values"]
-            else:
-                if len(obj) != 2:
-                    raise ValueError("expected [t, values]")
-                t, values = obj
-            window.add_sample(float(t), values)
+            ts, values = decode(sample.payload.to_bytes())
         except Exception as e:
-            print(f"[ZenohSub] bad payload: {e}")
+            staging.bad_payloads += 1
+            if staging.bad_payloads == 1 or staging.bad_payloads % 1000 == 0:
+                print(f"[ZenohSub] bad payload ({staging.bad_payloads} so far): {e}")
+            return
+        staging.push(ts, values)
     return on_zenoh_sample
 
 
@@ -133,17 +386,25 @@ def make_zenoh_callback(window: RealTimePlotN):
 
 def start_rtg(
     *,
-    channels: int = 3,
+    channels: Optional[int] = None,
     fps: int = 50,
     buffer_secs: float = 6.0,
     topic: str = "vr/0/rtg",
     labels: Optional[Sequence[str]] = None,
     background: str = "k",
     start_event_loop: bool = True,
+    max_samples: Optional[int] = None,
+    columns: int = 1,
+    idle_secs: float = 2.0,
+    hide_idle: bool = False,
 ):
     """
     Create a real-time viewer and a Zenoh subscriber.
 
+    topic may be a key expression (vr/*/rtg, vr/**): every matching topic gets its own panel
+    group in one window, fed by one subscriber. channels=None: 3 for a single topic,
+    per-topic from the data for key expressions.
+
     Returns:
         If start_event_loop=False:
             (app, window, session, subscriber)
@@ -153,22 +414,39 @@ def start_rtg(
     # Reuse existing QApplication if the caller already created one
     app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
 
-    lbls = list(labels) if labels is not None else ["X", "Y", "Z", "W"][:channels]
-    window = RealTimePlotN(
-        n_channels=channels,
-        fps=fps,
-        buffer_secs=buffer_secs,
-        labels=lbls,
-        background=background,
-    )
-    # size heuristic per number of channels
-    window.resize(900, 160 * channels + 30)
+    lbls = list(labels) if labels is not None else (["X", "Y", "Z", "W"][:channels] if channels else None)
+    if is_key_expr_pattern(topic):
+        window = MultiTopicRTGViewer(
+            n_channels=channels,
+            fps=fps,
+            buffer_secs=buffer_secs,
+            labels=lbls,
+            background=background,
+            max_samples=max_samples,
+            columns=columns,
+            idle_secs=idle_secs,
+            hide_idle=hide_idle,
+        )
+        window.resize(900 * min(columns, 2), 800)
+    else:
+        channels = channels or 3
+        lbls = lbls or ["X", "Y", "Z", "W"][:channels]
+        window = RealTimePlotN(
+            n_channels=channels,
+            fps=fps,
+            buffer_secs=buffer_secs,
+            labels=lbls,
+            background=background,
+            max_samples=max_samples,
+        )
+        # size heuristic per number of channels
+        window.resize(900, 160 * channels + 30)
     window.show()
 
     # Zenoh wiring
-    session = zenoh.open(zenoh.Config())
+    session = acquire_zenoh_session()
     subscriber = session.declare_subscriber(topic, make_zenoh_callback(window))
-    print(f"[ZenohSub] Subscribed to '{topic}' for {channels} channels")
+    print(f"[ZenohSub] Subscribed to '{topic}'" + (f" for {channels} channels" if channels else ""))
 
     # Make Ctrl+C work only if we own the loop
     if start_event_loop:
@@ -177,7 +455,7 @@ def start_rtg(
             sys.exit(app.exec_())
         finally:
             subscriber.undeclare()
-            session.close()
+            release_zenoh_session(session)
     else:
         return app, window, session, subscriber
 
@@ -187,23 +465,31 @@ def stop_rtg(session, subscriber):
     try:
         subscriber.undeclare()
     finally:
-        session.close()
+        release_zenoh_session(session)
 
 def main():
     """CLI entrypoint: parse args and run the viewer (blocking)."""
     parser = argparse.ArgumentParser(
         description="Real-time multi-channel plotter using PyQtGraph + Zenoh"
     )
-    parser.add_argument("-c", "--channels", type=int, default=3,
-                        help="Number of subplots (channels) [default: 3]")
+    parser.add_argument("-c", "--channels", type=int, default=None,
+                        help="Number of subplots (channels) [default: 3, or per topic from the data for key expressions]")
     parser.add_argument("-f", "--fps", type=int, default=50,
                         help="Qt redraw rate [default: 50]")
     parser.add_argument("-b", "--buffer-secs", type=float, default=6.0,
                         help="Time window length in seconds [default: 6.0]")
     parser.add_argument("-t", "--topic", type=str, default="vr/0/rtg",
-                        help="Zenoh topic to subscribe to [default: vr/0/rtg]")
+                        help="Zenoh topic or key expression, e.g. 'vr/*/rtg' [default: vr/0/rtg]")
     parser.add_argument("--background", type=str, default="k",
                         help="Plot background color [default: 'k']")
+    parser.add_argument("--max-samples", type=int, default=None,
+                        help="Samples kept per channel [default: buffer-secs x 1 kHz]")
+    parser.add_argument("--columns", type=int, default=1,
+                        help="Panel groups per row for key expressions [default: 1]")
+    parser.add_argument("--idle-secs", type=float, default=2.0,
+                        help="A topic silent this long counts as idle [default: 2.0]")
+    parser.add_argument("--hide-idle", action="store_true",
+                        help="Hide panels of idle topics (they are always frozen)")
     args = parser.parse_args()
 
     # Run and block
@@ -214,6 +500,10 @@ def main():
         topic=args.topic,
         background=args.background,
         start_event_loop=True,
+        max_samples=args.max_samples,
+        columns=args.columns,
+        idle_secs=args.idle_secs,
+        hide_idle=args.hide_idle,
     )
 
 # --- Script mode -------------------------------------------------------------
@@ -0,0 +1,134 @@
+# Fixed-rate loop scheduling on absolute monotonic deadlines.
+#
+# Each task gets deadlines at t0 + k * period, so time spent in update() never shifts
+# the phase and the achieved rate doesn't drift below the target. When a tick runs
+# past its period the overrun policy decides what happens to the missed ticks:
+#   "catchup" runs them back-to-back until the task is on schedule again,
+#   "skip"    drops them and resumes at the next deadline still in the future.
+import math
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from .perf_stats import LatencyStats
+
+OVERRUN_POLICIES = ("catchup", "skip")
+
+
+class LoopStats:
+    """Per-task loop statistics; all times in ms."""
+    def __init__(self, name: str, rate_hz: float, window: int = 1000):
+        self.name = name
+        self.rate_hz = rate_hz
+        self.ticks = 0
+        self.overruns = 0           # ticks that finished after the next deadline
+        self.skipped = 0            # deadlines dropped by the "skip" policy
+        self.worst_overrun_ms = 0.0
+        self.intervals = LatencyStats(window)   # start-to-start
+        self.lateness = LatencyStats(window)    # start - deadline
+        self.exec_time = LatencyStats(window)   # duration of the task call
+        self._last_start: Optional[float] = None
+
+    def record(self, deadline: float, start: float, end: float, period: float):
+        self.ticks += 1
+        if self._last_start is not None:
+            self.intervals.add((start - self._last_start) * 1e3)
+        self._last_start = start
+        self.lateness.add((start - deadline) * 1e3)
+        self.exec_time.add((end - start) * 1e3)
+        overrun = end - (deadline + period)
+        if overrun > 0:
+            self.overruns += 1
+            self.worst_overrun_ms = max(self.worst_overrun_ms, overrun * 1e3)
+
+    def summary(self) -> Dict[str, float]:
+        intervals = self.intervals.values()
+        lateness = self.lateness.summary()
+        exec_time = self.exec_time.summary()
+        return {
+            "name": self.name,
+            "target_hz": self.rate_hz,
+            "achieved_hz": float(1e3 / intervals.mean()) if intervals.size else 0.0,
+            "jitter_ms": float(intervals.std()) if intervals.size else 0.0,
+            "lateness_p99_ms": lateness.get("p99", 0.0),
+            "exec_p50_ms": exec_time.get("p50", 0.0),
+            "exec_max_ms": exec_time.get("max", 0.0),
+            "worst_overrun_ms": self.worst_overrun_ms,
+            "overruns": self.overruns,
+            "skipped": self.skipped,
+            "ticks": self.ticks,
+        }
+
+
+class _Task:
+    def __init__(self, name: str, func: Callable[[], None], rate_hz: float, first_deadline: float):
+        self.name = name
+        self.func = func
+        self.period = 1.0 / rate_hz
+        self.deadline = first_deadline
+        self.stats = LoopStats(name, rate_hz)
+
+
+class RateScheduler:
+    """
+    add(name, func, rate_hz) tasks, then run() until stop() (or run_once() from your own loop).
+    Tasks run sequentially on the calling thread in deadline order.
+    """
+    def __init__(self, overrun_policy: str = "skip", clock: Callable[[], float] = time.monotonic):
+        if overrun_policy not in OVERRUN_POLICIES:
+            raise ValueError(f"overrun_policy must be one of {OVERRUN_POLICIES}")
+        self.overrun_policy = overrun_policy
+        self.clock = clock
+        self.stop_event = threading.Event()
+        self._tasks: List[_Task] = []
+        self._lock = threading.Lock()
+
+    def add(self, name: str, func: Callable[[], None], rate_hz: float) -> LoopStats:
+        """name must be unique, it keys remove() and stats()."""
+        if rate_hz <= 0:
+            raise ValueError("rate_hz must be > 0")
+        task = _Task(name, func, rate_hz, self.clock())
+        with self._lock:
+            if any(t.name == name for t in self._tasks):
+                raise ValueError(f"a task named '{name}' already exists")
+            self._tasks.append(task)
+        return task.stats
+
+    def remove(self, name: str):
+        with self._lock:
+            self._tasks = [t for t in self._tasks if t.name != name]
+
+    def run_once(self) -> float:
+        """Run every task that is due; returns seconds until the next deadline."""
+        with self._lock:
+            tasks = list(self._tasks)
+        if not tasks:
+            return 0.1
+        now = self.clock()
+        for task in sorted(tasks, key=lambda t: t.deadline):
+            if task.deadline > now:
+                continue
+            start = self.clock()
+            task.func()
+            end = self.clock()
+            task.stats.record(task.deadline, start, end, task.period)
+            task.deadline += task.period
+            if self.overrun_policy == "skip" and task.deadline < end:
+                missed = math.floor((end - task.deadline) / task.period) + 1
+                task.deadline += missed * task.period
+                task.stats.skipped += missed
+            now = end
+        return max(0.0, min(t.deadline for t in tasks) - self.clock())
+
+    def run(self):
+        while not self.stop_event.is_set():
+            wait = self.run_once()
+            if wait > 0:
+                self.stop_event.wait(wait)
+
+    def stop(self):
+        self.stop_event.set()
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {t.name: t.stats.summary() for t in self._tasks}
@@ -0,0 +1,103 @@
+# Process-wide, reference-counted Zenoh session and iceoryx2 node.
+#
+# Every zenoh.open() starts its own scouting, transport threads and buffers, and every
+# iceoryx2 node registers itself in shared memory (and counts against each service's
+# max_nodes). Nodes, publishers and service clients in one process share one of each
+# instead. Users acquire them, undeclare their own publishers/subscribers/queriers
+# first and release last; the session/node is closed when the last user releases it.
+import atexit
+import os
+import threading
+from typing import Any, Dict, Optional
+import iceoryx2 as iox2
+import zenoh
+
+iox2.set_log_level_from_env_or(iox2.LogLevel.Error)
+
+
+class _Shared:
+    def __init__(self, name: str, create, close):
+        self.name = name
+        self._create = create
+        self._close = close
+        self._lock = threading.Lock()
+        self.resource: Optional[Any] = None
+        self.refs = 0
+        self.opened = 0   # times the resource was created, for stats
+
+    def acquire(self):
+        with self._lock:
+            if self.resource is None:
+                self.resource = self._create()
+                self.opened += 1
+            self.refs += 1
+            return self.resource
+
+    def release(self, resource):
+        with self._lock:
+            if resource is not self.resource or self.refs == 0:
+                return  # not ours (already force-closed), nothing to do
+            self.refs -= 1
+            if self.refs == 0:
+                self._close_locked()
+
+    def close(self):
+        with self._lock:
+            self.refs = 0
+            self._close_locked()
+
+    def _close_locked(self):
+        resource, self.resource = self.resource, None
+        if resource is not None:
+            try:
+                self._close(resource)
+            except Exception as e:
+                print(f"[SessionPool] closing {self.name} failed: {e}")
+
+
+def _close_zenoh(session):
+    session.close()
+
+
+def _create_iox2_node():
+    return (
+        iox2.NodeBuilder.new()
+            .name(iox2.NodeName.new(f"vrobots_{os.getpid()}"))
+            .create(iox2.ServiceType.Ipc)
+    )
+
+
+_zenoh = _Shared("zenoh session", lambda: zenoh.open(zenoh.Config()), _close_zenoh)
+_iox2 = _Shared("iox2 node", _create_iox2_node, lambda node: None)  # dropped with the last reference
+
+
+def acquire_zenoh_session() -> zenoh.Session:
+    return _zenoh.acquire()
+
+
+def release_zenoh_session(session: zenoh.Session):
+    _zenoh.release(session)
+
+
+def acquire_iox2_node():
+    return _iox2.acquire()
+
+
+def release_iox2_node(node):
+    _iox2.release(node)
+
+
+def pool_stats() -> Dict[str, int]:
+    return {
+        "zenoh_refs": _zenoh.refs, "zenoh_opened": _zenoh.opened,
+        "iox2_refs": _iox2.refs, "iox2_opened": _iox2.opened,
+    }
+
+
+def shutdown_pool():
+    """Close the shared session/node regardless of outstanding references (runs at exit)."""
+    _zenoh.close()
+    _iox2.close()
+
+
+atexit.register(shutdown_pool)
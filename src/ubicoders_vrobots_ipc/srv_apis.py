@@ -1,36 +1,63 @@
 from ubicoders_vrobots_msgs import MissionMsgT, VRSceneObjectT, SrvSimParamsMsgT, SrvVRobotPhysicalPropertyMsgT,SrvResetAllMsgT
-from .srv_base import ServiceBase
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from .srv_client import ServiceReply, gather, get_service_client
 import time
 
-def req_srv_mission(mission:MissionMsgT=None,):
-    service_base = ServiceBase(key="vr/service", recv_timeout=3.0)
-    service_base.pack_and_send(mission, file_id="M100")
+# Every req_srv_* shares one session + querier (see srv_client). wait=True returns the
+# ServiceReply (None on timeout), wait=False returns a Future resolving to it.
+# req_srv_many / req_srv_reset_many pipeline a batch: every request goes out at once,
+# each with its own request id, and the batch takes about one round trip.
 
-def req_srv_physical_property(prop:SrvVRobotPhysicalPropertyMsgT=None,):
-    service_base = ServiceBase(key="vr/service", recv_timeout=3.0)
-    service_base.pack_and_send(prop, file_id="S007")
+def _send(message, file_id: str, wait: bool, timeout: float) -> Union[Optional[ServiceReply], Future]:
+    fut = get_service_client("vr/service").request(message, file_id, timeout=timeout)
+    if not wait:
+        return fut
+    try:
+        return fut.result(timeout + 1.0)
+    except (TimeoutError, FutureTimeout):
+        print(f"[srv_apis] No reply to {file_id} within {timeout}s")
+        return None
 
-def req_srv_reset(sysId:int=0):
-    service_base = ServiceBase(key="vr/service", recv_timeout=3.0)
+def req_srv_many(requests: Iterable[Tuple[object, str]], wait: bool = True, timeout: float = 3.0,
+                 max_in_flight: Optional[int] = None) -> Union[List[Optional[ServiceReply]], List[Future]]:
+    """(message, file_id) pairs, e.g. [(propT, "S007"), ...]; replies in request order, None on timeout."""
+    futures = get_service_client("vr/service").request_many(requests, timeout, max_in_flight)
+    if not wait:
+        return futures
+    replies = gather(futures)
+    missed = sum(r is None for r in replies)
+    if missed:
+        print(f"[srv_apis] {missed}/{len(replies)} requests got no reply within {timeout}s")
+    return replies
+
+def _reset_msg(sysId: int, resetAll: bool) -> SrvResetAllMsgT:
     msgT = SrvResetAllMsgT()
     msgT.timestamp = time.time() * 1e3
-    msgT.request_id = 0
     msgT.sysId = sysId
-    msgT.resetAll = False
-    service_base.pack_and_send(msgT, file_id="S000")
+    msgT.resetAll = resetAll
+    return msgT
 
-def req_srv_reset_all():
-    service_base = ServiceBase(key="vr/service", recv_timeout=3.0)
-    msgT = SrvResetAllMsgT()
-    msgT.timestamp = time.time() * 1e3
-    msgT.request_id = 0
-    msgT.sysId = 0
-    msgT.resetAll = True
-    service_base.pack_and_send(msgT, file_id="S000")
-
-def req_srv_simparams(simParams:SrvSimParamsMsgT=None,):
-    service_base = ServiceBase(key="vr/service", recv_timeout=3.0)
-    service_base.pack_and_send(simParams, file_id="S003")
+def req_srv_mission(mission:MissionMsgT=None, wait: bool = True, timeout: float = 3.0):
+    return _send(mission, "M100", wait, timeout)
+
+def req_srv_physical_property(prop:SrvVRobotPhysicalPropertyMsgT=None, wait: bool = True, timeout: float = 3.0):
+    return _send(prop, "S007", wait, timeout)
+
+def req_srv_reset(sysId:int=0, wait: bool = True, timeout: float = 3.0):
+    return _send(_reset_msg(sysId, False), "S000", wait, timeout)
+
+def req_srv_reset_many(sysIds: Sequence[int], wait: bool = True, timeout: float = 3.0,
+                       max_in_flight: Optional[int] = None) -> Union[Dict[int, Optional[ServiceReply]], List[Future]]:
+    """Reset several robots in one pipelined batch; {sysId: reply or None}."""
+    replies = req_srv_many([(_reset_msg(i, False), "S000") for i in sysIds], wait, timeout, max_in_flight)
+    return dict(zip(sysIds, replies)) if wait else replies
+
+def req_srv_reset_all(wait: bool = True, timeout: float = 3.0):
+    return _send(_reset_msg(0, True), "S000", wait, timeout)
+
+def req_srv_simparams(simParams:SrvSimParamsMsgT=None, wait: bool = True, timeout: float = 3.0):
+    return _send(simParams, "S003", wait, timeout)
 
 if __name__ == "__main__":
     # pos = Vec3MsgT()
@@ -0,0 +1,232 @@
+# Long-lived service client: one pooled Zenoh session and one querier per service key.
+#
+# request() sends the query and returns a concurrent.futures.Future right away; the
+# Zenoh reply callback completes it with a ServiceReply, and the query's drop callback
+# (called once Zenoh has finished the query, replies or not) fails it with
+# ServiceTimeout if no reply came. call() is request().result(), a real wait on the
+# future instead of polling a flag with sleep(0.1).
+#
+# Every request gets a request id: sent as the query attachment (u32 little endian) and,
+# for messages with a reqSrcId field left at 0, stamped into the message as well. A
+# server that echoes the attachment lets replies be checked against their request.
+# request_many() pipelines a batch: all queries go out back to back (optionally at most
+# max_in_flight unanswered at a time) and their replies arrive concurrently, so N
+# requests cost about one round trip instead of N.
+import itertools
+import struct
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError, TimeoutError as FutureTimeout
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+import flatbuffers
+import zenoh
+
+from .perf_stats import LatencyStats
+from .session_pool import acquire_zenoh_session, release_zenoh_session
+
+
+_REQUEST_ID = struct.Struct("<I")
+
+
+class ServiceTimeout(TimeoutError):
+    pass
+
+
+class ServiceReply:
+    __slots__ = ("ok", "payload", "key_expr", "rtt_ms", "request_id")
+
+    def __init__(self, ok: bool, payload: bytes, key_expr: str, rtt_ms: float, request_id: int = 0):
+        self.ok = ok                # False: the service answered with reply_err
+        self.payload = payload
+        self.key_expr = key_expr
+        self.rtt_ms = rtt_ms
+        self.request_id = request_id
+
+    @property
+    def text(self) -> str:
+        return self.payload.decode("utf-8", errors="replace")
+
+    @property
+    def file_id(self) -> Optional[str]:
+        """FlatBuffer file identifier if the reply is a finished FlatBuffer with one."""
+        if len(self.payload) >= 8:
+            fid = self.payload[4:8]
+            if fid.isalnum():
+                return fid.decode("ascii")
+        return None
+
+    def __repr__(self) -> str:
+        body = self.text if len(self.payload) < 200 else f"{len(self.payload)} bytes"
+        return (f"ServiceReply({'OK' if self.ok else 'ERR'} {self.key_expr} #{self.request_id} {body!r} "
+                f"rtt={self.rtt_ms:.2f}ms)")
+
+
+def pack_message(message: Any, file_id: str) -> bytes:
+    """Pack an object-API message (MissionMsgT, SrvResetAllMsgT, ...) with its file identifier."""
+    builder = flatbuffers.Builder(1024)
+    os = message.Pack(builder)
+    builder.Finish(os, bytes(file_id, "utf-8"))
+    return bytes(builder.Output())
+
+
+def _attachment_id(attachment) -> Optional[int]:
+    if attachment is None:
+        return None
+    data = attachment.to_bytes()
+    return _REQUEST_ID.unpack(data)[0] if len(data) == _REQUEST_ID.size else None
+
+
+def _complete(fut: Future, result=None, exc: Optional[BaseException] = None) -> bool:
+    # reply and drop callbacks can race; the first one wins
+    try:
+        if exc is not None:
+            fut.set_exception(exc)
+        else:
+            fut.set_result(result)
+        return True
+    except InvalidStateError:
+        return False
+
+
+class ServiceClient:
+    def __init__(self, key: str = "vr/service", timeout: float = 3.0):
+        self.key = key
+        self.timeout = timeout
+        self.session = acquire_zenoh_session()
+        self.querier = self.session.declare_querier(key, timeout=timeout)
+        self.rtt = LatencyStats()
+        self.requests = 0
+        self.timeouts = 0
+        self.mismatches = 0      # replies whose echoed request id wasn't the one sent
+        self._ids = itertools.count()
+
+    def next_request_id(self) -> int:
+        return next(self._ids) % 0xFFFFFFFF + 1   # u32, never 0
+
+    def request(self, message: Any = None, file_id: Optional[str] = None,
+                payload: Optional[bytes] = None, timeout: Optional[float] = None) -> Future:
+        """
+        Send message (packed with file_id) or raw payload; the future resolves to a ServiceReply.
+        timeout: this request only (defaults to the client's); raises ServiceTimeout on the future.
+        """
+        request_id = self.next_request_id()
+        if payload is None:
+            stamp = getattr(message, "reqSrcId", None) == 0
+            if stamp:
+                message.reqSrcId = request_id
+            try:
+                payload = pack_message(message, file_id)
+            finally:
+                if stamp:
+                    message.reqSrcId = 0   # the caller's message is left as it was, ready for reuse
+        timeout = self.timeout if timeout is None else timeout
+        fut: Future = Future()
+        fut.request_id = request_id
+        t0 = time.perf_counter()
+
+        def on_reply(reply):
+            rtt_ms = (time.perf_counter() - t0) * 1e3
+            if reply.ok is not None:
+                sample = reply.ok
+                echoed = _attachment_id(sample.attachment)
+                if echoed is not None and echoed != request_id:
+                    self.mismatches += 1
+                result = ServiceReply(True, sample.payload.to_bytes(), str(sample.key_expr), rtt_ms, request_id)
+            elif reply.replier_id is None:
+                # Zenoh's own "Timeout" error: a queryable matched but didn't answer in time
+                on_done()
+                return
+            else:
+                result = ServiceReply(False, reply.err.payload.to_bytes(), self.key, rtt_ms, request_id)
+            if _complete(fut, result):
+                self.rtt.add(rtt_ms)
+
+        def on_done():
+            if _complete(fut, exc=ServiceTimeout(f"no reply from '{self.key}' to #{request_id} (timeout {timeout}s)")):
+                self.timeouts += 1
+
+        self.requests += 1
+        # run on the Zenoh thread: the default (indirect) starts a Python thread per query
+        handler = zenoh.handlers.Callback(on_reply, on_done, indirect=False)
+        attachment = _REQUEST_ID.pack(request_id)
+        if timeout == self.timeout:
+            self.querier.get(handler, payload=payload, attachment=attachment)
+        else:
+            # the querier's timeout is fixed at declaration
+            self.session.get(self.key, handler, payload=payload, attachment=attachment, timeout=timeout)
+        return fut
+
+    def call(self, message: Any = None, file_id: Optional[str] = None,
+             payload: Optional[bytes] = None, timeout: Optional[float] = None) -> ServiceReply:
+        """Blocking request; raises ServiceTimeout."""
+        timeout = self.timeout if timeout is None else timeout
+        fut = self.request(message, file_id, payload, timeout)
+        try:
+            return fut.result(timeout + 1.0)  # Zenoh's own timeout normally fires first
+        except (TimeoutError, FutureTimeout) as e:
+            raise ServiceTimeout(str(e) or f"no reply from '{self.key}'") from None
+
+    def request_many(self, requests: Iterable[Union[Tuple[Any, str], bytes]], timeout: Optional[float] = None,
+                     max_in_flight: Optional[int] = None) -> List[Future]:
+        """
+        Pipeline a batch of (message, file_id) pairs or raw payloads; futures in request order.
+        With max_in_flight, blocks while that many requests are still unanswered.
+        """
+        window = threading.BoundedSemaphore(max_in_flight) if max_in_flight else None
+        futures = []
+        for req in requests:
+            if window is not None:
+                window.acquire()
+            try:
+                if isinstance(req, (bytes, bytearray)):
+                    fut = self.request(payload=bytes(req), timeout=timeout)
+                else:
+                    fut = self.request(req[0], req[1], timeout=timeout)
+            except BaseException:
+                if window is not None:
+                    window.release()
+                raise
+            if window is not None:
+                fut.add_done_callback(lambda _f: window.release())
+            futures.append(fut)
+        return futures
+
+    def call_many(self, requests: Iterable[Union[Tuple[Any, str], bytes]], timeout: Optional[float] = None,
+                  max_in_flight: Optional[int] = None) -> List[Optional[ServiceReply]]:
+        """Blocking request_many; replies in request order, None where a request timed out."""
+        return gather(self.request_many(requests, timeout, max_in_flight))
+
+    def stats(self) -> Dict[str, Any]:
+        return {"requests": self.requests, "timeouts": self.timeouts, "mismatches": self.mismatches,
+                "rtt_ms": self.rtt.summary()}
+
+    def close(self):
+        if self.session is None:
+            return
+        self.querier.undeclare()
+        release_zenoh_session(self.session)
+        self.session = None
+
+
+def gather(futures: Sequence[Future]) -> List[Optional[ServiceReply]]:
+    """Wait for every future; None for the ones that timed out."""
+    replies = []
+    for fut in futures:
+        try:
+            replies.append(fut.result())
+        except TimeoutError:
+            replies.append(None)
+    return replies
+
+
+_clients: Dict[str, ServiceClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_service_client(key: str = "vr/service") -> ServiceClient:
+    """Process-wide client for key, created on first use."""
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None or client.session is None:
+            client = _clients[key] = ServiceClient(key)
+        return client
@@ -0,0 +1,238 @@
+# Service server: one Zenoh queryable, queries dispatched by FlatBuffer file identifier.
+#
+# The queryable callback (Zenoh thread) only reads the payload and queues the query;
+# `workers` threads take queries off the queue, call the handler registered for the
+# payload's file identifier (bytes 4:8, e.g. b"S000" as packed by ServiceBase.pack),
+# reply with what it returns and finish the query. The request attachment is echoed on
+# the reply so ServiceClient can match request ids. workers=0 runs handlers inline on the
+# Zenoh thread (only for handlers that return immediately). When more than max_queue
+# queries are waiting, new ones are answered with reply_err("busy") right away.
+#
+#   server = ServiceServer("vr/service", workers=4)
+#   server.register("S000", lambda req: f"reset {SrvResetAllMsg.GetRootAs(req.payload, 0).SysId()}")
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+import zenoh
+
+from .perf_stats import LatencyStats
+from .session_pool import acquire_zenoh_session, release_zenoh_session
+
+
+class ServiceRequest:
+    __slots__ = ("query", "payload", "file_id", "key_expr", "t_recv")
+
+    def __init__(self, query, payload: bytes, file_id: Optional[str], key_expr: str, t_recv: float):
+        self.query = query
+        self.payload = payload
+        self.file_id = file_id
+        self.key_expr = key_expr
+        self.t_recv = t_recv
+
+
+def payload_file_id(payload: bytes) -> Optional[str]:
+    """File identifier of a finished FlatBuffer (bytes 4:8), None if it doesn't look like one."""
+    if len(payload) >= 8:
+        fid = payload[4:8]
+        if fid.isalnum():
+            return fid.decode("ascii")
+    return None
+
+
+# handler(request) -> reply payload (bytes / str), None for b"OK"; raising replies with reply_err
+Handler = Callable[[ServiceRequest], Any]
+
+
+class ServiceServer:
+    def __init__(self, key: str = "vr/service", workers: int = 4, max_queue: int = 1000):
+        self.key = key
+        self.max_queue = max_queue
+        self._handlers: Dict[str, Handler] = {}
+        self._default: Optional[Handler] = None
+        self._queue: "queue.SimpleQueue[Optional[ServiceRequest]]" = queue.SimpleQueue()
+        self._running = True
+        # stats, updated from the Zenoh thread and every worker
+        self._stats_lock = threading.Lock()
+        self.received = 0
+        self.replied = 0
+        self.errors = 0
+        self.rejected = 0
+        self.queue_peak = 0
+        self.by_file_id: Dict[str, int] = {}
+        self.wait_ms = LatencyStats()      # queued -> picked up by a worker
+        self.handle_ms = LatencyStats()    # handler + reply
+        self.total_ms = LatencyStats()     # received -> replied
+
+        self._workers = [threading.Thread(target=self._work, daemon=True, name=f"srv-worker-{i}")
+                         for i in range(workers)]
+        for t in self._workers:
+            t.start()
+        self.session = None
+        try:
+            self.session = acquire_zenoh_session()
+            self.queryable = self.session.declare_queryable(
+                key, zenoh.handlers.Callback(self._on_query, indirect=False))
+        except Exception:
+            # don't leave the workers blocked on the queue or the pooled session held
+            self._running = False
+            self._stop_workers()
+            if self.session is not None:
+                release_zenoh_session(self.session)
+                self.session = None
+            raise
+        print(f"[ServiceServer] Serving '{key}' with {workers} workers")
+
+    def register(self, file_id: str, handler: Handler):
+        """Handle payloads with this file identifier, e.g. "S000"."""
+        self._handlers[file_id] = handler
+
+    def set_default(self, handler: Optional[Handler]):
+        """Handler for payloads with no registered file identifier (otherwise reply_err)."""
+        self._default = handler
+
+    def _on_query(self, query):
+        t_recv = time.perf_counter()
+        payload = query.payload.to_bytes() if query.payload is not None else b""
+        req = ServiceRequest(query, payload, payload_file_id(payload), str(query.key_expr), t_recv)
+        with self._stats_lock:
+            self.received += 1
+        if not self._running:
+            with self._stats_lock:
+                self.rejected += 1
+            self._finish(req, err=b"shutting down")
+            return
+        if not self._workers:
+            self._handle(req)
+            return
+        depth = self._queue.qsize()
+        if depth >= self.max_queue:
+            with self._stats_lock:
+                self.rejected += 1
+            self._finish(req, err=b"busy")
+            return
+        with self._stats_lock:
+            self.queue_peak = max(self.queue_peak, depth + 1)
+        self._queue.put(req)
+
+    def _work(self):
+        while True:
+            req = self._queue.get()
+            if req is None:
+                return
+            self.wait_ms.add((time.perf_counter() - req.t_recv) * 1e3)
+            self._handle(req)
+
+    def _handle(self, req: ServiceRequest):
+        t0 = time.perf_counter()
+        fid = req.file_id or ""
+        with self._stats_lock:
+            self.by_file_id[fid] = self.by_file_id.get(fid, 0) + 1
+        handler = self._handlers.get(fid, self._default)
+        if handler is None:
+            self._finish(req, err=f"no handler for file id '{fid}'".encode())
+            return
+        try:
+            result = handler(req)
+        except Exception as e:
+            print(f"[ServiceServer] {fid} handler failed: {e}")
+            self._finish(req, err=str(e).encode())
+            return
+        if result is None:
+            result = b"OK"
+        elif isinstance(result, str):
+            result = result.encode()
+        self._finish(req, reply=result)
+        t1 = time.perf_counter()
+        self.handle_ms.add((t1 - t0) * 1e3)
+        self.total_ms.add((t1 - req.t_recv) * 1e3)
+
+    def _finish(self, req: ServiceRequest, reply: Optional[bytes] = None, err: Optional[bytes] = None):
+        query = req.query
+        try:
+            if err is not None:
+                with self._stats_lock:
+                    self.errors += 1
+                query.reply_err(err)
+            else:
+                query.reply(query.key_expr, reply, attachment=query.attachment)
+                with self._stats_lock:
+                    self.replied += 1
+        except Exception as e:
+            print(f"[ServiceServer] reply failed: {e}")
+        finally:
+            query.drop()   # finish the query now so the client doesn't wait for its timeout
+            req.query = None
+
+    def _stop_workers(self):
+        for _ in self._workers:
+            self._queue.put(None)
+        for t in self._workers:
+            t.join()
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "received": self.received,
+                "replied": self.replied,
+                "errors": self.errors,
+                "rejected": self.rejected,
+                "queue_depth": self.queue_depth(),
+                "queue_peak": self.queue_peak,
+                "by_file_id": dict(self.by_file_id),
+                "wait_ms": self.wait_ms.summary(),
+                "handle_ms": self.handle_ms.summary(),
+                "total_ms": self.total_ms.summary(),
+            }
+
+    def shutdown(self):
+        if not self._running:
+            return
+        self._running = False
+        self.queryable.undeclare()
+        self._stop_workers()
+        # anything queued after the sentinels
+        while True:
+            try:
+                req = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if req is not None:
+                self._finish(req, err=b"shutting down")
+        release_zenoh_session(self.session)
+        self.session = None
+
+
+def standin_handlers(verbose: bool = True) -> Dict[str, Handler]:
+    """Acknowledge the simulator's vr/service requests (M100, S000, S003, S007) without a simulator."""
+    from ubicoders_vrobots_msgs.M100_mission_generated import MissionMsg
+    from ubicoders_vrobots_msgs.S000_srv_resetallmsg_generated import SrvResetAllMsg
+    from ubicoders_vrobots_msgs.S003_srv_simparamsmsg_generated import SrvSimParamsMsg
+    from ubicoders_vrobots_msgs.S007_srv_vrobotphysicalpropertymsg_generated import SrvVRobotPhysicalPropertyMsg
+
+    def ack(text: str) -> str:
+        if verbose:
+            print(f"[ServiceServer] {text}")
+        return f"OK {text}"
+
+    def mission(req):
+        m = MissionMsg.GetRootAs(req.payload, 0)
+        scene = m.MainScene()
+        return ack(f"M100 mission scene={scene.decode() if scene else None} vrobots={m.VrobotsLength()}")
+
+    def reset(req):
+        m = SrvResetAllMsg.GetRootAs(req.payload, 0)
+        return ack("S000 reset all" if m.ResetAll() else f"S000 reset sysId={m.SysId()}")
+
+    def simparams(req):
+        m = SrvSimParamsMsg.GetRootAs(req.payload, 0)
+        return ack(f"S003 simparams sysId={m.SysId()} imgResolution={m.SetImgResolution()}")
+
+    def physical_property(req):
+        m = SrvVRobotPhysicalPropertyMsg.GetRootAs(req.payload, 0)
+        return ack(f"S007 physical property sysId={m.SysId()} mass={m.Mass() if m.SetMass() else None}")
+
+    return {"M100": mission, "S000": reset, "S003": simparams, "S007": physical_property}
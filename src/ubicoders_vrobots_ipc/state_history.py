@@ -0,0 +1,157 @@
+# Columnar ring buffer of robot states for estimators that need seconds of history.
+import threading
+from collections import deque
+from typing import Dict, Union
+import numpy as np
+
+# column name (VRobotState attribute) -> width; vectors are stored as x, y, z(, w)
+STATE_COLUMNS: Dict[str, int] = {
+    "linPos": 3,
+    "linVel": 3,
+    "linAcc": 3,
+    "euler": 3,
+    "quaternion": 4,
+    "angVel": 3,
+    "angAcc": 3,
+    "altitude": 1,
+}
+_AXES = ("x", "y", "z", "w")
+
+
+class StateHistory:
+    """
+    Preallocated float64 columns (timestamp + STATE_COLUMNS) packed into one
+    (capacity, n_values) array; append writes a single row in place, so it is O(1) on
+    the Zenoh callback thread. Queries return dicts of
+    column arrays in chronological order ({"timestamp": (n,), "linPos": (n, 3), ...})
+    without building any per-state Python objects.
+    Timestamps are assumed to be non-decreasing (simulator millis).
+    append_deferred() only queues the state (e.g. a LazyVRobotState, still undecoded) and
+    its fields are read into the columns by the next query, on the querying thread.
+    """
+    def __init__(self, capacity: int = 4096):
+        if capacity < 1:
+            raise ValueError("capacity must be >= 1")
+        self.capacity = capacity
+        self._data = np.zeros((capacity, 1 + sum(STATE_COLUMNS.values())), dtype=np.float64)
+        self.timestamp = self._data[:, 0]
+        self.columns: Dict[str, np.ndarray] = {}
+        col = 1
+        for name, width in STATE_COLUMNS.items():
+            self.columns[name] = self._data[:, col:col + width]
+            col += width
+        self._count = 0  # total states ever appended
+        self._pending: deque = deque(maxlen=capacity)  # append_deferred states not yet in _data
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return min(self._count + len(self._pending), self.capacity)
+
+    def append(self, state) -> None:
+        """state: VRobotState or anything with the same attributes (vectors with .x/.y/.z/.w)."""
+        with self._lock:
+            self._flush()
+            self._write(state)
+
+    def append_deferred(self, state) -> None:
+        """Like append, but the state's fields are only read by the next query."""
+        with self._lock:
+            self._pending.append(state)
+
+    def _write(self, state) -> None:
+        row = [state.timestamp]
+        for name, width in STATE_COLUMNS.items():
+            value = getattr(state, name)
+            if width == 1:
+                row.append(value)
+            elif isinstance(value, np.ndarray):  # LazyVRobotState vectors
+                row.extend(value.tolist())
+            else:
+                row.extend([getattr(value, axis) for axis in _AXES[:width]])
+        self._data[self._count % self.capacity] = row
+        self._count += 1
+
+    def _flush(self) -> None:
+        while self._pending:
+            self._write(self._pending.popleft())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pending.clear()
+            self._count = 0
+
+    # --- queries ------------------------------------------------------------------
+
+    def _physical(self, logical: np.ndarray) -> np.ndarray:
+        # logical index 0 = oldest entry still in the buffer
+        start = self._count - len(self) if self._count > self.capacity else 0
+        return (start + logical) % self.capacity
+
+    def _logical_timestamps(self) -> np.ndarray:
+        n = len(self)
+        if self._count <= self.capacity:
+            return self.timestamp[:n].copy()
+        head = self._count % self.capacity
+        return np.concatenate((self.timestamp[head:], self.timestamp[:head]))
+
+    def _gather(self, logical: np.ndarray) -> Dict[str, np.ndarray]:
+        data = self._data[self._physical(logical)]
+        out = {"timestamp": data[:, 0]}
+        col = 1
+        for name, width in STATE_COLUMNS.items():
+            out[name] = data[:, col:col + width]
+            col += width
+        return out
+
+    def last(self, n: int) -> Dict[str, np.ndarray]:
+        """The newest n entries (fewer if the buffer holds less)."""
+        with self._lock:
+            self._flush()
+            size = len(self)
+            n = max(0, min(n, size))
+            return self._gather(np.arange(size - n, size))
+
+    def between(self, t0: float, t1: float) -> Dict[str, np.ndarray]:
+        """Entries with t0 <= timestamp <= t1."""
+        with self._lock:
+            self._flush()
+            ts = self._logical_timestamps()
+            i0 = np.searchsorted(ts, t0, side="left")
+            i1 = np.searchsorted(ts, t1, side="right")
+            return self._gather(np.arange(i0, max(i0, i1)))
+
+    def interpolate(self, t: Union[float, np.ndarray]) -> Dict[str, np.ndarray]:
+        """
+        Linear interpolation at time(s) t, clamped to the stored range. Quaternions are
+        normalized after interpolation (nlerp); euler angles are interpolated as-is.
+        Scalar t gives (width,) arrays, array t gives (len(t), width) arrays.
+        """
+        with self._lock:
+            self._flush()
+            n = len(self)
+            if n == 0:
+                raise ValueError("[StateHistory] empty")
+            t_arr = np.atleast_1d(np.asarray(t, dtype=np.float64))
+            ts = self._logical_timestamps()
+            if n == 1:
+                j0 = j1 = np.zeros(t_arr.shape, dtype=np.int64)
+                w = np.zeros(t_arr.shape)
+            else:
+                j1 = np.clip(np.searchsorted(ts, t_arr, side="right"), 1, n - 1)
+                j0 = j1 - 1
+                dt = ts[j1] - ts[j0]
+                w = np.clip(np.divide(t_arr - ts[j0], dt, out=np.zeros_like(t_arr), where=dt > 0), 0.0, 1.0)
+            r0, r1 = self._physical(j0), self._physical(j1)
+            d0 = self._data[r0]
+            data = d0 + w[:, None] * (self._data[r1] - d0)
+        out = {"timestamp": t_arr}
+        col = 1
+        for name, width in STATE_COLUMNS.items():
+            out[name] = data[:, col:col + width]
+            col += width
+        q = out["quaternion"]
+        norm = np.linalg.norm(q, axis=1, keepdims=True)
+        np.divide(q, norm, out=q, where=norm > 0)
+        if np.ndim(t) == 0:
+            return {name: values[0] for name, values in out.items()}
+        return out
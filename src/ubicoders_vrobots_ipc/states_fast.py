@@ -0,0 +1,234 @@
+# Lazy decoding of StatesMsg (R000) payloads straight from the FlatBuffer.
+#
+# StatesMsgT.InitFromPackedBuf unpacks the whole object tree (30+ fields, a Python
+# object per vector) on the Zenoh callback thread. LazyVRobotState only reads the
+# vtable up front and decodes a field the first time it is accessed, with struct
+# reads on the payload instead of the generated accessor objects.
+# StatesEncoder goes the other way for publishers (fakesim, benchmarks): a fixed-layout
+# template patched in place, like CommandEncoder does for commands.
+import struct
+from typing import Any, Dict, Tuple
+import flatbuffers
+import numpy as np
+from ubicoders_vrobots_msgs.states_msg_helper import VRobotState, StatesMsgT, Vec3MsgT, Vec4MsgT
+
+_u16 = struct.Struct("<H").unpack_from
+_u32 = struct.Struct("<I").unpack_from
+_i32 = struct.Struct("<i").unpack_from
+_f32 = struct.Struct("<f").unpack_from
+_f64 = struct.Struct("<d").unpack_from
+
+# field -> vtable offset, taken from R000_states_generated.StatesMsg
+_SCALARS: Dict[str, Tuple[int, Any]] = {
+    "sysId": (6, _u32),
+    "timestamp": (8, _f64),
+    "altitude": (16, _f32),
+    "barometer": (42, _f32),
+    "temperature": (44, _f32),
+    "mass": (50, _f32),
+}
+_VEC3: Dict[str, int] = {
+    "linAcc": 10, "linVel": 12, "linPos": 14, "angAcc": 18, "angVel": 20, "euler": 22,
+    "eulerDot": 24, "force": 32, "torque": 34, "accelerometer": 36, "gyroscope": 38,
+    "magnetometer": 40, "gpsPos": 46, "gpsVel": 48, "cg": 52, "moi3x1": 56,
+}
+_VEC4: Dict[str, int] = {"quaternion": 26}
+_ARRAYS: Dict[str, Tuple[int, Any]] = {
+    "pwm": (28, np.dtype("<u4")),
+    "actuators": (30, np.dtype("<f4")),
+    "momentArms": (54, np.dtype("<f4")),
+    "moi3x3": (58, np.dtype("<f4")),
+    "extraProps": (60, np.dtype("<f4")),
+}
+_NAME_OFFSET = 4
+# everything else (collisions, imageData0/1) comes from the full object-API decode
+
+
+class StateVec(np.ndarray):
+    """float64 vector that also answers .x .y .z (.w) like the Vec3/Vec4 wrappers."""
+    @property
+    def x(self) -> float:
+        return float(self[0])
+
+    @property
+    def y(self) -> float:
+        return float(self[1])
+
+    @property
+    def z(self) -> float:
+        return float(self[2])
+
+    @property
+    def w(self) -> float:
+        return float(self[3])
+
+
+def _table(buf: bytes, pos: int) -> Tuple[int, int]:
+    """(vtable position, vtable length) of the table at pos."""
+    vt = pos - _i32(buf, pos)[0]
+    return vt, _u16(buf, vt)[0]
+
+
+def _read_vec(buf: bytes, field_pos: int, n: int) -> StateVec:
+    values = [0.0] * n
+    if field_pos:
+        pos = field_pos + _u32(buf, field_pos)[0]
+        vt, vt_len = _table(buf, pos)
+        for k in range(n):
+            off = 4 + 2 * k
+            o = _u16(buf, vt + off)[0] if off < vt_len else 0
+            if o:
+                values[k] = _f32(buf, pos + o)[0]
+    return np.array(values, dtype=np.float64).view(StateVec)
+
+
+def shift_states_timestamp(buf: bytearray, delta: float) -> bool:
+    """Add delta ms to a StatesMsg payload's timestamp (unix time in ms) in place; False if the field is absent."""
+    pos = _u32(buf, 0)[0]
+    vt, vt_len = _table(buf, pos)
+    vt_offset = _SCALARS["timestamp"][0]
+    o = _u16(buf, vt + vt_offset)[0] if vt_offset < vt_len else 0
+    if not o:
+        return False
+    struct.pack_into("<d", buf, pos + o, _f64(buf, pos + o)[0] + delta)
+    return True
+
+
+class LazyVRobotState:
+    """
+    Read-only VRobotState look-alike over a StatesMsg payload. Fields are decoded on
+    first access and cached; vectors are StateVec arrays (state.linPos.x still works,
+    as do numpy ops on state.linPos), array fields are read-only numpy views of the
+    payload. timestamp is decoded eagerly since read_new_states always needs it.
+    """
+    def __init__(self, payload: bytes):
+        self._buf = payload
+        self._pos = _u32(payload, 0)[0]
+        self._vt, self._vt_len = _table(payload, self._pos)
+        self.timestamp = self._scalar(*_SCALARS["timestamp"], 0.0)
+
+    def _field(self, vt_offset: int) -> int:
+        """Absolute position of a field, 0 if it is absent (default value)."""
+        if vt_offset >= self._vt_len:
+            return 0
+        o = _u16(self._buf, self._vt + vt_offset)[0]
+        return self._pos + o if o else 0
+
+    def _scalar(self, vt_offset: int, unpack, default):
+        p = self._field(vt_offset)
+        return unpack(self._buf, p)[0] if p else default
+
+    def __getattr__(self, name: str):
+        # only called for fields that have not been decoded yet
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if name in _VEC3:
+            value = _read_vec(self._buf, self._field(_VEC3[name]), 3)
+        elif name in _VEC4:
+            value = _read_vec(self._buf, self._field(_VEC4[name]), 4)
+        elif name in _SCALARS:
+            vt_offset, unpack = _SCALARS[name]
+            value = self._scalar(vt_offset, unpack, 0)
+        elif name in _ARRAYS:
+            vt_offset, dtype = _ARRAYS[name]
+            p = self._field(vt_offset)
+            if p:
+                start = p + _u32(self._buf, p)[0]
+                value = np.frombuffer(self._buf, dtype, _u32(self._buf, start)[0], start + 4)
+            else:
+                value = np.zeros(0, dtype)
+        elif name == "name":
+            p = self._field(_NAME_OFFSET)
+            if p:
+                start = p + _u32(self._buf, p)[0]
+                value = self._buf[start + 4:start + 4 + _u32(self._buf, start)[0]].decode("utf-8")
+            else:
+                value = ""
+        else:
+            value = getattr(self.to_vrobot_state(), name)
+        self.__dict__[name] = value
+        return value
+
+    def to_vrobot_state(self) -> VRobotState:
+        """Full object-API decode (cached), for fields the lazy path does not cover."""
+        full = self.__dict__.get("_full")
+        if full is None:
+            msg = StatesMsgT.InitFromPackedBuf(self._buf, 0)
+            # VRobotState assumes these are always present
+            if msg.name is None:
+                msg.name = b""
+            if msg.collisions is None:
+                msg.collisions = []
+            full = VRobotState(msg)
+            self.__dict__["_full"] = full
+        return full
+
+    def __str__(self) -> str:
+        return str(self.to_vrobot_state())
+
+
+_SCALAR_STRUCTS = {"sysId": struct.Struct("<I"), "timestamp": struct.Struct("<d")}
+_F32 = struct.Struct("<f")
+
+
+class StatesEncoder:
+    """
+    encode(sysId, timestamp, linPos=(x, y, z), quaternion=(x, y, z, w), pwm=[...], ...) -> R000 payload.
+    The message is packed once with ForceDefaults, so every scalar and every vector
+    component is present at a fixed position whatever its value; encode() copies that
+    template and patches the given fields with struct.pack_into. Fields not given stay 0;
+    pwm / actuators must have the lengths given here. Not thread-safe.
+    """
+    def __init__(self, name: str = "vrobot", n_pwm: int = 4, n_actuators: int = 4):
+        msg = StatesMsgT()
+        msg.name = name
+        for field in _VEC3:
+            setattr(msg, field, Vec3MsgT())
+        msg.quaternion = Vec4MsgT()
+        msg.pwm = [0] * n_pwm
+        msg.actuators = [0.0] * n_actuators
+        msg.collisions = []
+        builder = flatbuffers.Builder(1024)
+        builder.ForceDefaults(True)
+        builder.Finish(msg.Pack(builder), b"R000")
+        self.template = bytes(builder.Output())
+        self._plan: Dict[str, Tuple[str, Any, Any]] = {}
+        buf = self.template
+        root = _u32(buf, 0)[0]
+        vt, vt_len = _table(buf, root)
+
+        def field_pos(table_pos: int, table_vt: int, table_vt_len: int, vt_offset: int) -> int:
+            o = _u16(buf, table_vt + vt_offset)[0] if vt_offset < table_vt_len else 0
+            if not o:
+                raise ValueError(f"field at vtable offset {vt_offset} missing from the template")
+            return table_pos + o
+
+        for name, (vt_offset, _) in _SCALARS.items():
+            self._plan[name] = ("scalar", _SCALAR_STRUCTS.get(name, _F32), field_pos(root, vt, vt_len, vt_offset))
+        for name, vt_offset, n in [(k, v, 3) for k, v in _VEC3.items()] + [(k, v, 4) for k, v in _VEC4.items()]:
+            p = field_pos(root, vt, vt_len, vt_offset)
+            sub = p + _u32(buf, p)[0]
+            sub_vt, sub_vt_len = _table(buf, sub)
+            self._plan[name] = ("vec", _F32, [field_pos(sub, sub_vt, sub_vt_len, 4 + 2 * k) for k in range(n)])
+        for name, count, kind in (("pwm", n_pwm, "I"), ("actuators", n_actuators, "f")):
+            p = field_pos(root, vt, vt_len, _ARRAYS[name][0])
+            start = p + _u32(buf, p)[0]
+            self._plan[name] = ("array", struct.Struct(f"<{count}{kind}"), start + 4)
+
+    def encode(self, sysId: int, timestamp: float, **fields) -> bytes:
+        buf = bytearray(self.template)
+        plan = self._plan
+        kind, st, pos = plan["sysId"]
+        st.pack_into(buf, pos, sysId)
+        kind, st, pos = plan["timestamp"]
+        st.pack_into(buf, pos, timestamp)
+        for name, value in fields.items():
+            kind, st, pos = plan[name]
+            if kind == "vec":
+                for p, v in zip(pos, value):
+                    st.pack_into(buf, p, v)
+            elif kind == "array":
+                st.pack_into(buf, pos, *value)
+            else:
+                st.pack_into(buf, pos, value)
+        return bytes(buf)
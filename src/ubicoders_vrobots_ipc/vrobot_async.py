@@ -0,0 +1,154 @@
+# asyncio front end for VRobotNodeBase.
+#
+# Zenoh and iceoryx2 deliver data on their own threads. Instead of hopping to the loop
+# per message, a node schedules at most one call_soon_threadsafe until the loop has
+# picked the data up, then hands the newest state / frame to every async iterator.
+# Commands are Zenoh puts and don't block, so update_cmd_* can be called directly
+# from coroutines; service requests are awaited as futures (see srv_client).
+import asyncio
+import functools
+import inspect
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from .vrobot_node import VRobotNodeBase
+
+
+def _put_latest(q: asyncio.Queue, item: Any):
+    # consumers that fall behind only ever see the newest items
+    if q.full():
+        q.get_nowait()
+    q.put_nowait(item)
+
+
+class AsyncVRobotNode:
+    """
+    async for state in node.states(): ...
+    async for frame in node.images("left"): ...   (register_img_subscriber first)
+    Wraps a VRobotNodeBase (pass your own subclass instance as node=) and forwards every
+    other attribute to it: node.update_cmd_multirotor(...), node.state, node.state_history...
+    Iterators are conflated: with maxsize=1 a slow consumer gets the newest item, not a backlog.
+    Create nodes from a coroutine running on the event loop, or pass loop= explicitly.
+    """
+    def __init__(self, sysId: int = 0, node: Optional[VRobotNodeBase] = None,
+                 loop: Optional[asyncio.AbstractEventLoop] = None, **kwargs):
+        if loop is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                raise RuntimeError("[AsyncVRobotNode] create it inside a running event loop or pass loop=") from None
+        self._loop = loop
+        self._drain_scheduled = False
+        self._state_queues: List[asyncio.Queue] = []
+        self._image_queues: Dict[str, List[asyncio.Queue]] = {}
+        self.node = node if node is not None else VRobotNodeBase(sysId, **kwargs)
+        self.node.set_wakeup(self._on_new_data)
+
+    def __getattr__(self, name: str):
+        if name == "node":
+            raise AttributeError(name)
+        return getattr(self.node, name)
+
+    def _on_new_data(self):
+        # subscriber threads
+        if self._drain_scheduled:
+            return
+        self._drain_scheduled = True
+        try:
+            self._loop.call_soon_threadsafe(self._drain)
+        except RuntimeError:
+            pass  # loop closed
+
+    def _drain(self):
+        self._drain_scheduled = False
+        node = self.node
+        if self._state_queues and node.read_new_states():
+            for q in self._state_queues:
+                _put_latest(q, node.state)
+        for cam_side, queues in self._image_queues.items():
+            if queues and node.read_new_image(cam_side):
+                for q in queues:
+                    _put_latest(q, node.imgStates[cam_side])
+
+    async def states(self, maxsize: int = 1) -> AsyncIterator[Any]:
+        q: asyncio.Queue = asyncio.Queue(maxsize)
+        self._state_queues.append(q)
+        try:
+            self._drain()  # a state may already be waiting
+            while True:
+                yield await q.get()
+        finally:
+            self._state_queues.remove(q)
+
+    async def images(self, cam_side: str, maxsize: int = 1) -> AsyncIterator[Any]:
+        """Frames follow the sync rules: a pooled frame is recycled a few frames later, copy() to keep it."""
+        if cam_side not in self.node.imgResolution:
+            raise ValueError(f"register_img_subscriber('{cam_side}', ...) first")
+        q: asyncio.Queue = asyncio.Queue(maxsize)
+        queues = self._image_queues.setdefault(cam_side, [])
+        queues.append(q)
+        try:
+            self._drain()
+            while True:
+                yield await q.get()
+        finally:
+            queues.remove(q)
+
+    async def request(self, srv_func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Await a service call, e.g. await node.request(req_srv_reset, node.sysId).
+        req_srv_* functions are sent with wait=False and their future awaited directly
+        (None on timeout, like the blocking call); the batch helpers (req_srv_many,
+        req_srv_reset_many) return a list of futures, awaited together into a list of
+        replies in request order. Other callables run in the default executor.
+        """
+        if "wait" in inspect.signature(srv_func).parameters:
+            sent = srv_func(*args, wait=False, **kwargs)
+            if isinstance(sent, list):
+                return list(await asyncio.gather(*(self._await_reply(f) for f in sent)))
+            return await self._await_reply(sent)
+        return await self._loop.run_in_executor(None, functools.partial(srv_func, *args, **kwargs))
+
+    async def _await_reply(self, fut) -> Any:
+        try:
+            return await asyncio.wrap_future(fut, loop=self._loop)
+        except TimeoutError as e:
+            print(f"[AsyncVRobotNode] {e}")
+            return None
+
+
+class AsyncVRobotClient:
+    """
+    async with AsyncVRobotClient() as client:
+        nodes = [client.add_vrobot_node(AsyncVRobotNode(i)) for i in range(24)]
+        await client.run(*(control(n) for n in nodes))
+    """
+    def __init__(self):
+        self.vrnode_list: List[AsyncVRobotNode] = []
+
+    def add_vrobot_node(self, vrnode: Any) -> AsyncVRobotNode:
+        """Takes an AsyncVRobotNode or a plain VRobotNodeBase (wrapped for you)."""
+        if not isinstance(vrnode, AsyncVRobotNode):
+            vrnode = AsyncVRobotNode(node=vrnode)
+        self.vrnode_list.append(vrnode)
+        return vrnode
+
+    async def run(self, *coros):
+        """Run the coroutines concurrently; the first exception cancels the rest."""
+        tasks = [asyncio.ensure_future(c) for c in coros]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for t in tasks:
+                t.cancel()
+
+    async def shutdown(self):
+        # node shutdown waits for subscriber threads, keep it off the loop
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(None, n.shutdown) for n in self.vrnode_list))
+
+    async def __aenter__(self) -> "AsyncVRobotClient":
+        return self
+
+    async def __aexit__(self, *exc):
+        print(f"Shutting down...")
+        await self.shutdown()
@@ -0,0 +1,358 @@
+# vrobot-bench: benchmarks of the IPC hot paths, for tracking regressions.
+#
+# End to end, against a fakesim child process:
+#   states    fakesim -> Zenoh -> VRobotNodeBase.read_new_states, per decode mode
+#   frames    fakesim camera -> iceoryx2 -> Iox2Node / BaseImageState, per ImageResolution
+#   cmd       update_cmd_multirotor / build_and_publish_cmd encode + publish rate
+#   rtg       RTGPub -> rtg_sub's Zenoh callback + StagingQueue, per wire format
+# From the focused bench_* modules (still runnable on their own with python -m):
+#   decode    bench_states_decode: StatesMsg decode, object API vs LazyVRobotState (us)
+#   encode    bench_cmd_encode: command encode, object API vs CommandEncoder (us)
+#   recv      bench_iox2_recv: Iox2Node receive latency and idle CPU, event vs poll
+#   srv       bench_srv: service round trip and pipelined batch against a z-srv child
+#   sessions  bench_sessions: startup / RSS of N nodes, pooled vs per-robot sessions
+#
+# Latencies are publisher timestamp -> read on this side, from the shared wall clock
+# (states: StatesMsg.timestamp in ms, frames: GenericHeader.timestamp), so they include
+# transport, decode and the node's own copy. Results are LatencyStats percentiles; --json
+# / -o write them with the package version and platform, and --compare prints the p50 /
+# p99 change against an earlier result file.
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from .bench_common import resolution_from_label, start_child, stop_child
+from .perf_stats import LatencyStats, format_summary
+
+SUITES = ("states", "frames", "cmd", "rtg", "decode", "encode", "recv", "srv", "sessions")
+DEFAULT_SUITES = ("states", "frames", "cmd", "rtg", "decode", "encode", "srv")   # sessions / recv are slow
+_US_SUITES = ("cmd", "decode", "encode")   # summaries in microseconds, the rest in ms
+_SYSID_BASE = 950   # robot ids used by the benchmark, away from the usual 0..N
+
+
+def _collect(node, duration: float, ready_timeout: float, read: Callable[[], Optional[float]]) -> Dict[str, Any]:
+    """Wait for node wakeups for `duration` s after the first item; read() -> latency ms or None."""
+    event = threading.Event()
+    node.set_wakeup(event.set)
+    stats = LatencyStats(100_000)
+    t_end = None
+    deadline = time.monotonic() + ready_timeout
+    while True:
+        now = time.monotonic()
+        if t_end is None and now > deadline:
+            break
+        if t_end is not None and now > t_end:
+            break
+        if not event.wait(0.1):
+            continue
+        event.clear()
+        latency = read()
+        if latency is None:
+            continue
+        if t_end is None:
+            t_end = time.monotonic() + duration   # first item: start the measured window
+            continue
+        stats.add(latency)
+    node.set_wakeup(None)
+    result = stats.summary()
+    result["received_hz"] = stats.count / duration if t_end is not None else 0.0
+    return result
+
+
+def bench_states(duration: float = 5.0, state_rate: float = 200.0, sysId: int = _SYSID_BASE) -> Dict[str, Any]:
+    """StatesMsg publish -> read_new_states latency (ms), object vs lazy decode."""
+    from .vrobot_node import VRobotNodeBase
+
+    sim = start_child(["ubicoders_vrobots_ipc.fakesim", "--first-id", str(sysId), "--state-rate", str(state_rate),
+                        "--no-service"])
+    results = {}
+    try:
+        for mode in ("object", "lazy"):
+            node = VRobotNodeBase(sysId, states_decode=mode)
+
+            def read():
+                if not node.read_new_states():
+                    return None
+                return time.time() * 1e3 - node.state.timestamp
+
+            results[mode] = _collect(node, duration, 10.0, read)
+            results[mode]["target_hz"] = state_rate
+            node.shutdown()
+    finally:
+        stop_child(sim)
+    return results
+
+
+def bench_frames(duration: float = 5.0, fps: float = 30.0, resolutions: Optional[List[str]] = None,
+                 sysId: int = _SYSID_BASE + 1) -> Dict[str, Any]:
+    """Camera frame publish -> read_new_image latency (ms) and received fps per resolution."""
+    from .node_iox2_utils import ImageResolution
+    from .vrobot_node import VRobotNodeBase
+
+    results = {}
+    for k, res in enumerate(ImageResolution):
+        if resolutions and res.label not in resolutions:
+            continue
+        robot = sysId + k
+        sim = start_child(["ubicoders_vrobots_ipc.fakesim", "--first-id", str(robot), "--state-rate", "10",
+                            "-c", "1", "-r", res.label, "--fps", str(fps), "--no-service"])
+        try:
+            node = VRobotNodeBase(robot)
+            node.register_img_subscriber("left", res)
+
+            def read():
+                if not node.read_new_image("left"):
+                    return None
+                return time.time_ns() / 1e6 - node.imgStates["left"].ts
+
+            result = _collect(node, duration, 10.0, read)
+            result["target_fps"] = fps
+            result["dropped_pct"] = max(0.0, 100.0 * (1.0 - result["received_hz"] / fps))
+            results[res.label] = result
+            node.shutdown()
+        finally:
+            stop_child(sim)
+    return results
+
+
+def bench_cmd(n: int = 20000, sysId: int = _SYSID_BASE + 5) -> Dict[str, Any]:
+    """Per-call time (us) and calls/s of the command helpers, with a subscriber counting arrivals."""
+    from ubicoders_vrobots_msgs.C000_commands_generated import CommandMsgT
+    from ubicoders_vrobots_msgs.VROBOTS_CMDS import VROBOTS_CMDS
+    from .session_pool import acquire_zenoh_session, release_zenoh_session
+    from .vrobot_node import VRobotNodeBase
+
+    node = VRobotNodeBase(sysId)
+    session = acquire_zenoh_session()
+    received = [0]
+    sub = session.declare_subscriber(f"vr/{sysId}/cmd", lambda _s: received.__setitem__(0, received[0] + 1))
+    time.sleep(0.3)
+    cmd = CommandMsgT()
+    cmd.cmdId = VROBOTS_CMDS.SET_CAR
+    cmd.sysId = sysId
+    cmd.floatArr = [1.0, 0.0, 0.1]
+    node.cmdMsgT = cmd
+    cases = {
+        "update_cmd_multirotor": lambda i: node.update_cmd_multirotor([1500 + i % 100, 1500, 1500, 1500]),
+        "build_and_publish_cmd": lambda i: (setattr(cmd, "timestamp", time.time() * 1e3), node.build_and_publish_cmd()),
+    }
+    results = {}
+    try:
+        for name, call in cases.items():
+            received[0] = 0
+            stats = LatencyStats(n)
+            t_start = time.perf_counter()
+            for i in range(n):
+                t0 = time.perf_counter()
+                call(i)
+                stats.add((time.perf_counter() - t0) * 1e6)
+            elapsed = time.perf_counter() - t_start
+            time.sleep(0.2)
+            result = stats.summary()
+            result.update({"calls_per_s": n / elapsed, "received": received[0], "sent": n})
+            results[name] = result
+    finally:
+        sub.undeclare()
+        release_zenoh_session(session)
+        node.shutdown()
+    return results
+
+
+def bench_srv(**kwargs) -> Dict[str, Any]:
+    """bench_srv.run_srv_bench, flattened to one summary per measurement."""
+    from .bench_srv import run_srv_bench
+
+    r = run_srv_bench(**kwargs)
+    b = r["batch"]
+    return {
+        "legacy_rtt": {**r["legacy"]["rtt_ms"], "failed": r["legacy"]["failed"]},
+        "client_rtt": {**r["client"]["rtt_ms"], "failed": r["client"]["failed"]},
+        f"batch_{b['size']}_sequential": b["sequential_ms"],
+        f"batch_{b['size']}_pipelined": {**b["pipelined_ms"], "failed": b["failed"], "mismatches": b["mismatches"]},
+    }
+
+
+def bench_sessions(robot_counts: List[int]) -> Dict[str, Any]:
+    from .bench_sessions import run_session_bench
+
+    return {f"{r['robots']}_{'shared' if r['shared'] else 'per_robot'}": r for r in run_session_bench(robot_counts)}
+
+
+class _StagingSink:
+    """The part of the rtg_sub window that make_zenoh_callback uses."""
+    def __init__(self):
+        from .rtg_staging import StagingQueue
+        self.staging = StagingQueue(capacity=10_000_000)
+
+    def staging_for(self, topic: str):
+        return self.staging
+
+
+def bench_rtg(n: int = 20000, channels: int = 6, topic: str = "vr/bench/rtg") -> Dict[str, Any]:
+    """RTGPub -> rtg_sub callback + StagingQueue samples/s, per wire format / batch size."""
+    from .rtg_pub import RTGPub
+    from .rtg_sub import make_zenoh_callback
+    from .session_pool import acquire_zenoh_session, release_zenoh_session
+
+    session = acquire_zenoh_session()
+    results = {}
+    values = [float(k) for k in range(channels)]
+    try:
+        for label, wire_format, batch_size in (("json", "json", 1), ("binary", "binary", 1),
+                                               ("binary_batch100", "binary", 100)):
+            sink = _StagingSink()
+            sub = session.declare_subscriber(topic, make_zenoh_callback(sink))
+            with contextlib.redirect_stdout(io.StringIO()):
+                pub = RTGPub(topic, wire_format=wire_format, batch_size=batch_size)
+            time.sleep(0.2)
+            t0 = time.perf_counter()
+            for i in range(n):
+                pub.publish(i * 1e-3, values)
+            pub.flush()
+            t_pub = time.perf_counter() - t0
+            staging = sink.staging
+            deadline = time.monotonic() + 10.0
+            while staging.pushed_samples + staging.dropped_samples < n and time.monotonic() < deadline:
+                time.sleep(0.001)
+            t_all = time.perf_counter() - t0
+            drained = sum(len(ts) for ts, _ in staging.drain())
+            results[label] = {
+                "samples": n, "channels": channels, "batch_size": batch_size,
+                "publish_per_s": n / t_pub, "delivered_per_s": staging.pushed_samples / t_all,
+                "delivered": drained, "lost": n - staging.pushed_samples, "bad_payloads": staging.bad_payloads,
+            }
+            pub.shutdown()
+            sub.undeclare()
+    finally:
+        release_zenoh_session(session)
+    return results
+
+
+def run_benchmarks(suites=DEFAULT_SUITES, duration: float = 5.0, resolutions: Optional[List[str]] = None,
+                   fps: float = 30.0, state_rate: float = 200.0,
+                   robot_counts: Optional[List[int]] = None) -> Dict[str, Any]:
+    from .bench_cmd_encode import run_encode_bench
+    from .bench_iox2_recv import run_recv_bench
+    from .bench_states_decode import run_decode_bench
+    from .node_iox2_utils import ImageResolution
+
+    runners = {
+        "states": lambda: bench_states(duration, state_rate),
+        "frames": lambda: bench_frames(duration, fps, resolutions),
+        "cmd": lambda: bench_cmd(),
+        "rtg": lambda: bench_rtg(),
+        "decode": lambda: run_decode_bench(),
+        "encode": lambda: run_encode_bench(),
+        "recv": lambda: run_recv_bench(resolution_from_label(resolutions[0]) if resolutions else ImageResolution.P360),
+        "srv": lambda: bench_srv(),
+        "sessions": lambda: bench_sessions(robot_counts or [1, 10]),
+    }
+    results = {}
+    for suite in suites:
+        print(f"[vrobot_bench] {suite} ...", file=sys.stderr, flush=True)
+        try:
+            results[suite] = runners[suite]()
+        except Exception as e:
+            print(f"[vrobot_bench] {suite} failed: {e}", file=sys.stderr)
+            results[suite] = {"error": str(e)}
+    return {"meta": _meta(), "results": results}
+
+
+def _version(dist: str) -> str:
+    try:
+        from importlib.metadata import version
+        return version(dist)
+    except Exception:
+        return "unknown"
+
+
+def _meta() -> Dict[str, Any]:
+    return {
+        "package_version": _version("ubicoders-vrobots-ipc"),
+        "versions": {d: _version(d) for d in ("eclipse-zenoh", "iceoryx2", "ubicoders-vrobots-msgs", "numpy")},
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def _print_results(results: Dict[str, Any]):
+    for suite, res in results.items():
+        print(f"== {suite}")
+        if "error" in res:
+            print(f"   failed: {res['error']}")
+            continue
+        for name, r in res.items():
+            if not isinstance(r, dict):
+                print(f"   {name}: {r}")
+            elif "p50" in r:
+                unit = "us" if suite in _US_SUITES else "ms"
+                extra = {k: v for k, v in r.items() if k not in ("count", "mean", "min", "p50", "p90", "p99", "max")}
+                print("   " + format_summary(name, r, unit) + "  " +
+                      " ".join(f"{k}={v:.1f}" if isinstance(v, float) else f"{k}={v}" for k, v in extra.items()))
+            else:
+                print(f"   {name:<28} " + " ".join(f"{k}={v:.0f}" if isinstance(v, float) else f"{k}={v}"
+                                                   for k, v in r.items()))
+
+
+def _compare(results: Dict[str, Any], baseline: Dict[str, Any]):
+    """p50 / p99 (and rate) change for every summary present in both runs."""
+    print("== change vs baseline" + (f" ({baseline['meta'].get('package_version')})" if "meta" in baseline else ""))
+    base_results = baseline.get("results", baseline)
+    for suite, res in results.items():
+        for name, r in res.items():
+            b = base_results.get(suite, {}).get(name)
+            if not isinstance(r, dict) or not isinstance(b, dict):
+                continue
+            parts = []
+            for key in ("p50", "p99", "received_hz", "calls_per_s", "delivered_per_s", "encodes_per_s",
+                        "startup_ms", "rss_mb"):
+                if key in r and key in b and b[key]:
+                    parts.append(f"{key} {b[key]:.3f} -> {r[key]:.3f} ({100.0 * (r[key] - b[key]) / b[key]:+.1f}%)")
+            if parts:
+                print(f"   {suite}/{name}: " + ", ".join(parts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks of the vrobots IPC hot paths.")
+    parser.add_argument("-s", "--suite", action="append", choices=SUITES, default=None,
+                        help=f"Suite to run, repeatable [default: {' '.join(DEFAULT_SUITES)}]")
+    parser.add_argument("-d", "--duration", type=float, default=5.0,
+                        help="Seconds per states / frames measurement [default: 5]")
+    parser.add_argument("--state-rate", type=float, default=200.0, help="States per second [default: 200]")
+    parser.add_argument("--fps", type=float, default=30.0, help="Camera frame rate [default: 30]")
+    parser.add_argument("-r", "--resolution", action="append", default=None,
+                        help="Only these resolutions for the frames suite (the first one for recv), e.g. 720p")
+    parser.add_argument("-n", "--robots", type=int, nargs="+", default=None,
+                        help="Robot counts for the sessions suite [default: 1 10]")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("-o", "--output", default=None, help="Also write the JSON results to this file")
+    parser.add_argument("--compare", default=None, help="Earlier JSON results to compare against")
+    args = parser.parse_args()
+
+    # node / publisher log lines go to stderr so --json output stays parseable
+    with contextlib.redirect_stdout(sys.stderr if args.json else sys.stdout):
+        out = run_benchmarks(args.suite or DEFAULT_SUITES, args.duration, args.resolution, args.fps,
+                             args.state_rate, args.robots)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(out, f, indent=2)
+    if args.json:
+        print(json.dumps(out, indent=2))
+    else:
+        _print_results(out["results"])
+    if args.compare:
+        with open(args.compare) as f:
+            _compare(out["results"], json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,59 +5,264 @@ from ubicoders_vrobots_msgs.VROBOTS_CMDS import VROBOTS_CMDS
 from .node_iox2 import ImageResolution, Iox2Node
 from .node_zenoh import ZenohNode
 from .node_iox2_utils import *
+from .image_pipeline import ImagePipeline, ImageResult
+from .state_history import StateHistory
+from .states_fast import LazyVRobotState
+from .cmd_encoder import CommandEncoder
+from .scheduler import RateScheduler
+from .node_runners import EXECUTORS, ThreadNodeRunner, ProcessNodeRunner
+from .perf_stats import LatencyStats
+from collections import deque
+import threading
 import time
 from colorama import Fore, Style, Back
 import flatbuffers
 
-def vrobot_client_runner(vrobot_nodes: List[Any]):
-    vrclient = VRobotClient()
+DISPATCH_MODES = ("rate", "event")
+
+def vrobot_client_runner(vrobot_nodes: List[Any], rate_hz: float = 50.0, overrun_policy: str = "skip",
+                         dispatch: str = "rate", executor: str = "sequential", node_timeout: float = 1.0):
+    """
+    Run node.update() at rate_hz (or each node's own update_rate_hz) on absolute deadlines.
+    overrun_policy: "skip" drops ticks missed by a slow update, "catchup" runs them back-to-back.
+    dispatch="event": update a node as soon as new states/images arrive instead (see VRobotClient).
+    executor="thread" / "process": isolate nodes from each other (see VRobotClient);
+    with "process", pass picklable node factories instead of nodes.
+    """
+    vrclient = VRobotClient(rate_hz, overrun_policy, dispatch, executor, node_timeout)
     for node in vrobot_nodes:
         vrclient.add_vrobot_node(node)
     try:
-        while True:
-            vrclient.update()            
-            time.sleep(0.02) # sim does not update faster than 50Hz at the best case.
+        vrclient.run()
     finally:
         print(f"Shutting down...")
         vrclient.shutdown()
 
+def update_vrobot_node(vrnode: Any):
+    """One tick of a node; errors are printed, never raised (module level so process workers can pickle it)."""
+    try:
+        if hasattr(vrnode, "dispatch"):
+            vrnode.dispatch()
+        else:
+            vrnode.update()
+    except Exception as e:
+        print(Back.RED + f"[VRobotClient] Error in update: {e}" + Style.RESET_ALL)
+        print(Fore.RED)
+        traceback.print_exc()
+        print(Fore.RED + Style.RESET_ALL)
+
 class VRobotClient:
-    def __init__(self):
+    def __init__(self, rate_hz: float = 50.0, overrun_policy: str = "skip", dispatch: str = "rate",
+                 executor: str = "sequential", node_timeout: float = 1.0):
+        """
+        dispatch="rate": nodes are updated on a fixed-rate schedule.
+        dispatch="event": a node is dispatched (on_state / on_image hooks, then update()) as soon
+        as its Zenoh or iox2 subscriber delivers new data, and at least every 1/rate_hz when idle.
+        executor="sequential": every node runs on the calling thread (one slow node delays the rest).
+        executor="thread": every node runs its own schedule on its own thread.
+        executor="process": add_vrobot_node() takes a picklable factory (a node class,
+        functools.partial(MyNode, sysId=3), ...) and the node is built and run in its own process
+        (workers are spawned: guard your script with if __name__ == "__main__").
+        With "thread" / "process", a node whose update() runs longer than node_timeout seconds is
+        flagged (printed, "stalled" in get_loop_stats()) while the other nodes keep their rates.
+        """
+        if dispatch not in DISPATCH_MODES:
+            raise ValueError(f"dispatch must be one of {DISPATCH_MODES}")
+        if executor not in EXECUTORS:
+            raise ValueError(f"executor must be one of {EXECUTORS}")
+        if dispatch == "event" and executor != "sequential":
+            raise ValueError("dispatch='event' runs on the sequential executor")
         self.vrnode_list = []
-
-    def add_vrobot_node(self, vrnode: Any):
+        self.node_names: List[str] = []   # unique per node, the keys of get_loop_stats / get_latency_stats
+        # sim does not update faster than 50Hz at the best case.
+        self.rate_hz = rate_hz
+        self.dispatch = dispatch
+        self.executor = executor
+        self.overrun_policy = overrun_policy
+        self.node_timeout = node_timeout
+        self.scheduler = RateScheduler(overrun_policy)
+        self.runners: List[Any] = []
+        # event dispatch: nodes with new data, in arrival order
+        self._wake_event = threading.Event()
+        self._pending: Dict[int, Any] = {}
+        self._pending_lock = threading.Lock()
+
+    def _node_name(self, vrnode: Any, index: int) -> str:
+        """"Class:sysId", with "#index" appended if another node already has that name."""
+        if self.executor == "process":
+            # vrnode is a factory; a class or partial still tells us a readable name
+            target = getattr(vrnode, "func", vrnode)
+            sysId = getattr(vrnode, "keywords", {}).get("sysId", index)
+            name = f"{getattr(target, '__name__', type(target).__name__)}:{sysId}"
+        else:
+            name = f"{type(vrnode).__name__}:{getattr(vrnode, 'sysId', index)}"
+        if name in self.node_names:
+            name = f"{name}#{index}"
+        return name
+
+    def add_vrobot_node(self, vrnode: Any, rate_hz: Optional[float] = None):
+        """rate_hz overrides vrnode.update_rate_hz, which overrides the client rate."""
+        index = len(self.vrnode_list)
+        name = self._node_name(vrnode, index)
         self.vrnode_list.append(vrnode)
+        self.node_names.append(name)
+        if self.dispatch == "event":
+            if hasattr(vrnode, "set_wakeup"):
+                vrnode.set_wakeup(lambda: self._wake(vrnode))
+            return
+        rate = rate_hz or getattr(vrnode, "update_rate_hz", None) or self.rate_hz
+        if self.executor == "process":
+            self.runners.append(ProcessNodeRunner(name, vrnode, update_vrobot_node, rate,
+                                                  self.overrun_policy, self.node_timeout))
+            return
+        if self.executor == "thread":
+            self.runners.append(ThreadNodeRunner(name, vrnode, update_vrobot_node, rate,
+                                                 self.overrun_policy, self.node_timeout))
+            return
+        self.scheduler.add(name, lambda: self._update_node(vrnode), rate)
+
+    def _wake(self, vrnode: Any):
+        # called on Zenoh / iox2 reactor threads
+        with self._pending_lock:
+            self._pending[id(vrnode)] = vrnode
+        self._wake_event.set()
+
+    def _update_node(self, vrnode: Any):
+        update_vrobot_node(vrnode)
 
     def update(self):
-        try:
+        """Update every node once, ignoring rates (for callers running their own loop)."""
+        if self.executor == "process":
+            raise RuntimeError("process executor nodes live in their own processes")
+        for vrnode in self.vrnode_list:
+            self._update_node(vrnode)
+
+    def run(self):
+        """Blocks until stop()."""
+        if self.runners:
+            self._run_watchdog()
+            return
+        if self.dispatch == "rate":
+            self.scheduler.run()
+            return
+        stop_event = self.scheduler.stop_event
+        period = 1.0 / self.rate_hz
+        last_dispatch: Dict[int, float] = {}  # id(node) -> monotonic time of its last dispatch
+        while not stop_event.is_set():
+            now = time.monotonic()
             for vrnode in self.vrnode_list:
-                vrnode.update()
-        except Exception as e:
-            print(Back.RED + f"[VRobotClient] Error in update: {e}" + Style.RESET_ALL)
-            print(Fore.RED)
-            traceback.print_exc()
-            print(Fore.RED + Style.RESET_ALL)
+                last_dispatch.setdefault(id(vrnode), now)
+            # sleep until new data or the first idle node is due, whichever comes first
+            next_due = min((last_dispatch[id(n)] for n in self.vrnode_list), default=now) + period
+            self._wake_event.wait(max(0.0, next_due - now))
+            self._wake_event.clear()
+            with self._pending_lock:
+                pending = list(self._pending.values())
+                self._pending.clear()
+            for vrnode in pending:
+                self._update_node(vrnode)
+                last_dispatch[id(vrnode)] = time.monotonic()
+            # idle nodes keep update() ticking even while other nodes stream data
+            now = time.monotonic()
+            for vrnode in self.vrnode_list:
+                if now - last_dispatch[id(vrnode)] >= period:
+                    self._update_node(vrnode)
+                    last_dispatch[id(vrnode)] = time.monotonic()
+
+    def _run_watchdog(self):
+        # the nodes run on their own threads / processes; this thread only watches them
+        for runner in self.runners:
+            runner.start()
+        dead = set()
+        stop_event = self.scheduler.stop_event
+        while not stop_event.wait(min(0.1, self.node_timeout / 4)):
+            now = time.monotonic()
+            for runner in self.runners:
+                runner.poll()
+                msg = runner.check(now)
+                if msg:
+                    color = Back.YELLOW if runner.stalled else Back.GREEN
+                    print(color + f"[VRobotClient] {msg}" + Style.RESET_ALL)
+                if runner.name not in dead and not runner.alive():
+                    dead.add(runner.name)
+                    print(Back.RED + f"[VRobotClient] '{runner.name}' exited" + Style.RESET_ALL)
+
+    def stop(self):
+        self.scheduler.stop()
+        self._wake_event.set()
+
+    def get_loop_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Per node (rate dispatch): achieved_hz, jitter_ms, worst_overrun_ms, overruns, skipped, ...
+        thread / process executors add stalled, stalls (times flagged) and alive.
+        """
+        if self.runners:
+            return {r.name: r.stats() for r in self.runners}
+        return self.scheduler.stats()
+
+    def get_latency_stats(self) -> Dict[str, Dict[str, float]]:
+        """Per node: state receive -> next command publish latency percentiles in ms."""
+        return {
+            name: n.state_cmd_latency.summary()
+            for name, n in zip(self.node_names, self.vrnode_list) if hasattr(n, "state_cmd_latency")
+        }
 
     def shutdown(self):
+        self.stop()
+        if self.runners:
+            for runner in self.runners:
+                runner.stop()
+            for runner in self.runners:
+                runner.shutdown_node()
+            return
         for vrnode in self.vrnode_list:
             vrnode.shutdown()
 
 
+STATES_DECODE_MODES = ("object", "lazy")
+
 class VRobotNodeBase:
-    def __init__(self, sysId:int = 0, max_states_history:int = 10):
+    # set in a subclass to run update() at a different rate than the client's
+    update_rate_hz: Optional[float] = None
+
+    def __init__(self, sysId:int = 0, max_states_history:int = 10, history_capacity:int = 4096,
+                 states_decode:str = "object", shared_sessions:bool = True):
+        """
+        shared_sessions=True: Zenoh session and iceoryx2 node come from the process-wide
+        pool (session_pool) instead of one of each per robot.
+        states_decode="lazy": states are LazyVRobotState, fields decoded from the payload on
+        first access and vectors given as numpy arrays (state.linPos.x still works).
+        "object" keeps the full object-API decode into VRobotState.
+        history_capacity: size of state_history; 0 disables it (state_history is None). With
+        lazy states, history fields are only decoded when state_history is queried.
+        """
+        if states_decode not in STATES_DECODE_MODES:
+            raise ValueError(f"states_decode must be one of {STATES_DECODE_MODES}")
         try:
             self.first_ts = 0.0
             
             self.sysId = sysId
-            self.zenoh_node = ZenohNode(sysId)
-            self.zenoh_node.create_publisher(f"vr/{self.sysId}/cmd")
-            self.zenoh_node.create_subscriber(f"vr/{self.sysId}/states", self.states_listener)
+            self.states_decode = states_decode
             # states and image data can be stored here as needed max size = 10
             self.max_states_history = max_states_history
-            self.states: List[VRobotState] = []
+            self.states: deque[VRobotState] = deque(maxlen=max_states_history)
+            # columnar numpy history for estimators, e.g. state_history.between(t0, t1)
+            self.state_history: Optional[StateHistory] = StateHistory(history_capacity) if history_capacity > 0 else None
+
+            # event dispatch: called when new states/images arrive, see set_wakeup
+            self._wakeup: Optional[Callable[[], None]] = None
+            # state receive -> next command publish, in ms
+            self.state_cmd_latency = LatencyStats(10000)
+            self._state_rx_time: Optional[float] = None
+
+            # patches pre-encoded CMD0 templates instead of packing through the object API
+            self.cmd_encoder = CommandEncoder()
+            self.zenoh_node = ZenohNode(sysId, shared=shared_sessions)
+            self.zenoh_node.create_publisher(f"vr/{self.sysId}/cmd")
+            self.zenoh_node.create_subscriber(f"vr/{self.sysId}/states", self.states_listener)
 
             # iox2 node for image subscriptions
-            self.iox2_node = Iox2Node(sysId, 10)
+            self.iox2_node = Iox2Node(sysId, 10, node_name=None if shared_sessions else f"vrobot_node_{sysId}")
             # self.iox2_node.create_image_subscriber("left", self.image_resolution)
             # self.iox2_node.create_image_subscriber("right", self.image_resolution)
             # self.iox2_node.create_image_subscriber("down", self.image_resolution)
@@ -70,6 +275,10 @@ class VRobotNodeBase:
             self.imgStates: dict[str, BaseImageState] = dict()
             self.imgResolution: dict[str, ImageResolution] = dict()
 
+            # worker-process image processing, see register_img_processor
+            self.image_pipeline: Optional[ImagePipeline] = None
+            self.imgResults: dict[str, ImageResult] = dict()
+
 
 
             self.setup()
@@ -83,14 +292,95 @@ class VRobotNodeBase:
     def setup(self):
         pass
 
-    def register_img_subscriber(self, cam_side:str, img_res: ImageResolution = ImageResolution.P720) -> BaseImageState:
-        self.iox2_node.create_image_subscriber(cam_side, img_res )
-        self.imgStates[cam_side] = get_image_state_type(img_res)()
+    def update(self):
+        pass
+
+    def on_state(self, state: VRobotState):
+        """Override to react to every new state; runs on the client thread before update()."""
+        pass
+
+    def on_image(self, cam_side: str, img_state: Any):
+        """Override to react to every new frame of a registered camera; runs before update()."""
+        pass
+
+    def set_wakeup(self, callback: Optional[Callable[[], None]]):
+        """callback() is called from the subscriber threads whenever new states or frames arrive."""
+        self._wakeup = callback
+
+    def _notify_new_data(self):
+        if self._wakeup is not None:
+            self._wakeup()
+
+    def dispatch(self):
+        """One client step: on_state / on_image for data that arrived (if overridden), then update()."""
+        if type(self).on_state is not VRobotNodeBase.on_state and self.read_new_states():
+            self.on_state(self.state)
+        if type(self).on_image is not VRobotNodeBase.on_image:
+            for cam_side in list(self.imgStates):
+                if self.read_new_image(cam_side):
+                    self.on_image(cam_side, self.imgStates[cam_side])
+        self.update()
+
+    def register_img_subscriber(self, cam_side:str, img_res: ImageResolution = ImageResolution.P720,
+                                zero_copy: bool = False, pooled: bool = True,
+                                output_spec: Optional[ImageOutputSpec] = None) -> BaseImageState:
+        """
+        zero_copy=True: imgStates[cam_side] becomes an ImageLease whose image_data is a
+        read-only RGBA view into shared memory. It stays valid until the next
+        read_new_image(cam_side) or an explicit release().
+        pooled=True: frames are converted into a triple-buffered pool of preallocated
+        buffers. imgStates[cam_side].image_data is never written while you hold it, but
+        the buffer is recycled after the next read_new_image(cam_side) - copy() to keep it.
+        output_spec: format (RGBA/BGR/RGB/GRAY), ROI and downscale applied on the listener
+        thread, e.g. ImageOutputSpec(ImageFormat.GRAY, roi=(320, 180, 640, 360), scale=0.25)
+        """
+        self.iox2_node.create_image_subscriber(cam_side, img_res, zero_copy=zero_copy, pooled=pooled,
+                                               output_spec=output_spec)
+        if zero_copy:
+            self.imgStates[cam_side] = ImageLease(None, 0, 0, *img_res.value)
+        else:
+            self.imgStates[cam_side] = get_image_state_type(img_res)()
+        if self.imgResolution.get(cam_side) != img_res:
+            # once per topic, a second one would double the wakeups
+            self.iox2_node.add_frame_ready_callback(cam_side, img_res, self._notify_new_data)
         self.imgResolution[cam_side] = img_res
         # print(f"imgResolution keys: {self.imgResolution.keys()}")
         return self.imgStates[cam_side]
 
         
+    def register_img_processor(self, cam_side: str, func: Callable[[np.ndarray], Any],
+                               max_workers: Optional[int] = None) -> ImageResult:
+        """
+        Run func(image_data) -> result in worker processes for every new frame of an already
+        registered camera. Frames go through shared memory, func must be a module-level
+        function and its result picklable. Poll results with read_new_img_result(cam_side).
+        Calling it again for the same camera replaces func.
+        """
+        if cam_side not in self.imgResolution:
+            raise ValueError(f"register_img_subscriber('{cam_side}', ...) first")
+        if self.image_pipeline is None:
+            self.image_pipeline = ImagePipeline(max_workers)
+        pipeline = self.image_pipeline
+        pipeline.register(cam_side, func)
+        if cam_side not in self.imgResults:
+            # submit() looks func up per frame, so one callback per camera is enough
+            self.iox2_node.add_frame_callback(
+                cam_side, self.imgResolution[cam_side],
+                lambda img_state: pipeline.submit(cam_side, img_state.ts, img_state.image_data),
+            )
+        self.imgResults[cam_side] = ImageResult()
+        return self.imgResults[cam_side]
+
+    def read_new_img_result(self, cam_side: str) -> bool:
+        """If a newer processing result exists, update self.imgResults[cam_side] and return True."""
+        if self.image_pipeline is None:
+            return False
+        result = self.image_pipeline.get_result(cam_side)
+        if result is None or result.ts <= self.imgResults[cam_side].ts:
+            return False
+        self.imgResults[cam_side] = result
+        return True
+
     def states_listener(self, sample: any):
         try:
             topic: str = sample.key_expr
@@ -99,14 +389,21 @@ class VRobotNodeBase:
             if StatesMsg.StatesMsgBufferHasIdentifier(payload, 0) is False:
                 return
             
-            statesMsgT = StatesMsgT.InitFromPackedBuf(payload, 0)
-            
-            # VRobotState = ubicoders' wrapper to pretty print
-            states: VRobotState = VRobotState(statesMsgT)
+            if self.states_decode == "lazy":
+                states = LazyVRobotState(payload)
+            else:
+                statesMsgT = StatesMsgT.InitFromPackedBuf(payload, 0)
+
+                # VRobotState = ubicoders' wrapper to pretty print
+                states: VRobotState = VRobotState(statesMsgT)
             self.states.append(states)
-            
-            if len(self.states) > self.max_states_history:
-                self.states.pop(0)
+            if self.state_history is not None:
+                if self.states_decode == "lazy":
+                    self.state_history.append_deferred(states)   # keep the Zenoh thread decode-free
+                else:
+                    self.state_history.append(states)
+            self._state_rx_time = time.perf_counter()
+            self._notify_new_data()
 
 
         except Exception as e:
@@ -140,6 +437,11 @@ class VRobotNodeBase:
         if img_state is None:
             return False
         if (img_state.ts > self.imgStates[cam_side].ts):
+            if isinstance(img_state, ImageLease):
+                # listener may have handed the sample back already - wait for the next one
+                if not img_state.acquire():
+                    return False
+                self.imgStates[cam_side].release()
             self.imgStates[cam_side] = img_state
             return True
         return False
@@ -147,6 +449,8 @@ class VRobotNodeBase:
     def shutdown(self):        
         self.zenoh_node.shutdown()
         self.iox2_node.shutdown()
+        if getattr(self, "image_pipeline", None) is not None:
+            self.image_pipeline.shutdown()
 
     def update_cmd_set_force_torque_body(
         self,
@@ -157,81 +461,52 @@ class VRobotNodeBase:
         ty: float,
         tz: float,
     ):        
-        force_vec3 = Vec3MsgT()
-        torque_vec3 = Vec3MsgT()
-        force_vec3.x = fx
-        force_vec3.y = fy
-        force_vec3.z = fz
-        torque_vec3.x = tx
-        torque_vec3.y = ty
-        torque_vec3.z = tz
-
-        self.cmdMsgT: CommandMsgT = CommandMsgT()
-        self.cmdMsgT.timestamp = time.time() * 1e3
-        self.cmdMsgT.cmdId = VROBOTS_CMDS.SET_BODY_FT
-        self.cmdMsgT.sysId = self.sysId
-        self.cmdMsgT.vec3Arr = [
-            force_vec3,
-            torque_vec3,
-        ]
-        self.build_and_publish_cmd()
+        self.publish_cmd(self.cmd_encoder.encode(
+            VROBOTS_CMDS.SET_BODY_FT, self.sysId, time.time() * 1e3,
+            vec3_arr=[(fx, fy, fz), (tx, ty, tz)],
+        ))
 
     def update_cmd_msd(self, pos: float):
-        self.cmdMsgT: CommandMsgT = CommandMsgT()
-        self.cmdMsgT.timestamp = time.time() * 1e3
-        self.cmdMsgT.sysId = self.sysId
-        self.cmdMsgT.cmdId = VROBOTS_CMDS.SET_MSD
-        self.cmdMsgT.floatVal = float(pos)
-        self.build_and_publish_cmd()
+        self.publish_cmd(self.cmd_encoder.encode(
+            VROBOTS_CMDS.SET_MSD, self.sysId, time.time() * 1e3, float_val=float(pos)
+        ))
 
     # m, m/s, rad, rad/s
     def update_cmd_invpen(self, pos: float, vel: float, ang: float, angvel: float):
-        self.cmdMsgT: CommandMsgT = CommandMsgT()
-        self.cmdMsgT.timestamp = time.time() * 1e3
-        self.cmdMsgT.sysId = self.sysId
-        self.cmdMsgT.cmdId = VROBOTS_CMDS.SET_INVPEN
-        self.cmdMsgT.floatArr = [float(pos), float(vel), float(ang), float(angvel)]
-        self.build_and_publish_cmd()
+        self.publish_cmd(self.cmd_encoder.encode(
+            VROBOTS_CMDS.SET_INVPEN, self.sysId, time.time() * 1e3,
+            float_arr=[float(pos), float(vel), float(ang), float(angvel)],
+        ))
 
     def update_cmd_heli(self, force: float):
-        self.cmdMsgT: CommandMsgT = CommandMsgT()
-        self.cmdMsgT.timestamp = time.time() * 1e3
-        self.cmdMsgT.sysId = self.sysId
-        self.cmdMsgT.cmdId = VROBOTS_CMDS.SET_HELI
-        self.cmdMsgT.floatVal = force
-        self.build_and_publish_cmd()
+        self.publish_cmd(self.cmd_encoder.encode(
+            VROBOTS_CMDS.SET_HELI, self.sysId, time.time() * 1e3, float_val=force
+        ))
 
     def update_cmd_multirotor(self, pwm: List[int]):
-        self.cmdMsgT: CommandMsgT = CommandMsgT()
-        self.cmdMsgT.timestamp = time.time() * 1e3
-        self.cmdMsgT.cmdId = VROBOTS_CMDS.SET_PWM
-        self.cmdMsgT.sysId = self.sysId
-        self.cmdMsgT.intArr = [int(pwm[i]) for i in range(4)]
-        self.build_and_publish_cmd()
+        self.publish_cmd(self.cmd_encoder.encode(
+            VROBOTS_CMDS.SET_PWM, self.sysId, time.time() * 1e3, int_arr=[int(pwm[i]) for i in range(4)]
+        ))
 
     def update_cmd_omrover(self, actuators: List[float]):
-        self.cmdMsgT: CommandMsgT = CommandMsgT()
-        self.cmdMsgT.timestamp = time.time() * 1e3
-        self.cmdMsgT.sysId = self.sysId
-        self.cmdMsgT.cmdId = VROBOTS_CMDS.SET_OMROVER
-        self.cmdMsgT.floatArr = actuators
-        self.build_and_publish_cmd()
+        self.publish_cmd(self.cmd_encoder.encode(
+            VROBOTS_CMDS.SET_OMROVER, self.sysId, time.time() * 1e3, float_arr=actuators
+        ))
 
     def update_cmd_car(self, torque, brake, steer):
-        self.cmdMsgT: CommandMsgT = CommandMsgT()
-        self.cmdMsgT.timestamp = time.time() * 1e3
-        self.cmdMsgT.sysId = self.sysId
-        self.cmdMsgT.cmdId = VROBOTS_CMDS.SET_CAR
-        self.cmdMsgT.floatArr = [torque, brake, steer]
-        self.build_and_publish_cmd()
+        self.publish_cmd(self.cmd_encoder.encode(
+            VROBOTS_CMDS.SET_CAR, self.sysId, time.time() * 1e3, float_arr=[torque, brake, steer]
+        ))
 
     def build_and_publish_cmd(self):
-        builder = flatbuffers.Builder(512)
-        os = self.cmdMsgT.Pack(builder)
-        builder.Finish(os, bytes("CMD0", "utf-8"))
-        payload = builder.Output()
-        self.publish_cmd(payload)
+        """Publish a custom self.cmdMsgT."""
+        self.publish_cmd(self.cmd_encoder.encode_msg(self.cmdMsgT))
 
     def publish_cmd(self, cmd_data: bytes):
+        rx = self._state_rx_time
+        if rx is not None:
+            # first command after a new state closes the loop
+            self._state_rx_time = None
+            self.state_cmd_latency.add((time.perf_counter() - rx) * 1e3)
         self.zenoh_node.publish(f"vr/{self.sysId}/cmd", cmd_data)
 
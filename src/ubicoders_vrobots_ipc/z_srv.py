@@ -1,40 +1,52 @@
 #!/usr/bin/env python3
-import zenoh
+# Demo service: answers "demo/hello" (or any key) through ServiceServer's worker pool.
+# With --vr-service it stands in for the simulator's vr/service endpoint and
+# acknowledges M100 / S000 / S003 / S007 requests.
+import argparse
+import json
 import time
-import zenoh
 
-handler = zenoh.handlers.DefaultHandler()
+from .srv_server import ServiceServer, standin_handlers
 
-def on_query(q: zenoh.Query):
-    """
-    This handler is invoked when a client issues a query matching our key expression.
-    You should reply (or reply_err) and then drop the query.
-    """
-    print(f"Received query: selector={q.selector}, payload={q.payload}")
+
+def on_query(req):
+    """Default handler: reply with a greeting whatever the payload."""
+    print(f"Received query: key={req.key_expr}, {len(req.payload)} bytes, file id={req.file_id}")
+    return b"Hello from srv!"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Zenoh service server (demo / local vr/service stand-in).")
+    parser.add_argument("-k", "--key", default=None, help="Key expression [default: demo/hello, or vr/service]")
+    parser.add_argument("--vr-service", action="store_true", help="Stand in for the simulator's vr/service")
+    parser.add_argument("-w", "--workers", type=int, default=4, help="Worker threads, 0 = inline [default: 4]")
+    parser.add_argument("--max-queue", type=int, default=1000, help="Queued queries before replying busy")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Don't print every request")
+    parser.add_argument("--stats-every", type=float, default=0.0, help="Print stats every N seconds (0 = on exit)")
+    args = parser.parse_args()
+
+    key = args.key or ("vr/service" if args.vr_service else "demo/hello")
+    server = ServiceServer(key, workers=args.workers, max_queue=args.max_queue)
+    if args.vr_service:
+        for fid, handler in standin_handlers(verbose=not args.quiet).items():
+            server.register(fid, handler)
+    else:
+        server.set_default((lambda req: b"Hello from srv!") if args.quiet else on_query)
+    print(f"Queryable declared at key '{key}' — waiting for queries...")
     try:
-        # Build a reply payload — here we just echo a message
-        resp_payload = zenoh.ZBytes(b"Hello from srv!")
-        # Reply on the same key expression
-        q.reply(q.selector.key_expr, resp_payload)
-    except Exception as e:
-        # On error
-        q.reply_err(zenoh.ZBytes(str(e).encode()))
+        while True:
+            time.sleep(args.stats_every or 1.0)
+            if args.stats_every:
+                st = server.stats()
+                print(f"[ServiceServer] received={st['received']} replied={st['replied']} "
+                      f"queue={st['queue_depth']} (peak {st['queue_peak']}) "
+                      f"p50={st['total_ms'].get('p50', 0):.3f}ms")
+    except KeyboardInterrupt:
+        pass
     finally:
-        q.drop()
+        server.shutdown()
+        print(json.dumps(server.stats(), indent=2))
 
-def main():
-    # open a session (with default config)
-    with zenoh.open(zenoh.Config()) as session:
-        # declare a queryable on a key expression “demo/hello”
-        # use DefaultHandler to allow manual recv() style
-        with session.declare_queryable("demo/hello", handler) as queryable:
-            print("Queryable declared at key ‘demo/hello’ — waiting for queries...")
-            # continuously receive queries
-            while True:
-                q = queryable.handler.recv()  # blocks until a query arrives
-                on_query(q)
-                # Sleep a bit to avoid busy loop
-                time.sleep(0.1)
 
 if __name__ == "__main__":
     main()